@@ -0,0 +1,26 @@
+"""add ai_summary to chapters and notebooks
+
+Revision ID: 0001_rollup_ai_summaries
+Revises: 
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_rollup_ai_summaries'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: databases created by init_db.py already have the columns
+    op.execute("ALTER TABLE chapters ADD COLUMN IF NOT EXISTS ai_summary TEXT")
+    op.execute("ALTER TABLE notebooks ADD COLUMN IF NOT EXISTS ai_summary TEXT")
+
+
+def downgrade() -> None:
+    op.drop_column('notebooks', 'ai_summary')
+    op.drop_column('chapters', 'ai_summary')
@@ -0,0 +1,34 @@
+"""composite indexes for keyset pagination
+
+Revision ID: 0002_keyset_pagination_indexes
+Revises: 0001_rollup_ai_summaries
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_keyset_pagination_indexes'
+down_revision = '0001_rollup_ai_summaries'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_notebooks_owner_created", "notebooks", "owner_id, created_at, id"),
+    ("ix_chapters_notebook_order", "chapters", "notebook_id, order_index, id"),
+    ("ix_notes_chapter_created", "notes", "chapter_id, created_at, id"),
+    ("ix_note_contents_note_order", "note_contents", "note_id, order_index, id"),
+]
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: databases created by init_db.py already have the indexes
+    for name, table, columns in INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def downgrade() -> None:
+    for name, _, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,50 @@
+"""change_seq columns and tombstones for delta sync
+
+Revision ID: 0003_delta_sync
+Revises: 0002_keyset_pagination_indexes
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_delta_sync'
+down_revision = '0002_keyset_pagination_indexes'
+branch_labels = None
+depends_on = None
+
+
+SYNCED_TABLES = ["notebooks", "chapters", "notes", "note_contents"]
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS sync_change_seq")
+
+    # The volatile default numbers existing rows as the column is added
+    for table in SYNCED_TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS change_seq BIGINT "
+            f"NOT NULL DEFAULT nextval('sync_change_seq')"
+        )
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_change_seq ON {table} (change_seq)")
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS tombstones (
+            id SERIAL PRIMARY KEY,
+            entity_type VARCHAR(16) NOT NULL,
+            entity_id INTEGER NOT NULL,
+            owner_id INTEGER NOT NULL,
+            change_seq BIGINT NOT NULL DEFAULT nextval('sync_change_seq'),
+            deleted_at TIMESTAMPTZ DEFAULT now()
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_tombstones_owner_seq ON tombstones (owner_id, change_seq)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS tombstones")
+    for table in SYNCED_TABLES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_change_seq")
+        op.drop_column(table, 'change_seq')
+    op.execute("DROP SEQUENCE IF EXISTS sync_change_seq")
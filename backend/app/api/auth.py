@@ -2,8 +2,10 @@
 Authentication API endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+import asyncio
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, Token, LoginRequest
 from app.auth.security import verify_password,hash_password, create_access_token
@@ -13,7 +15,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user.
     
@@ -28,15 +30,16 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         HTTPException: If email already exists
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user
-    hashed_password = hash_password(user_data.password)
+    # Create new user (bcrypt is CPU-bound: keep it off the event loop)
+    hashed_password = await asyncio.to_thread(hash_password, user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -44,14 +47,14 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 
 @router.post("/login", response_model=Token)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate user and return JWT token.
     
@@ -66,9 +69,13 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
         HTTPException: If credentials are invalid
     """
     # Find user by email
-    user = db.query(User).filter(User.email == login_data.email).first()
+    result = await db.execute(select(User).where(User.email == login_data.email))
+    user = result.scalars().first()
     
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    password_ok = user is not None and await asyncio.to_thread(
+        verify_password, login_data.password, user.hashed_password
+    )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -1,54 +1,55 @@
 """
 Chapter API endpoints for CRUD operations.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query, BackgroundTasks
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List
-from app.database import get_db
-from app.models.user import User
-from app.models.notebook import Notebook
+from app.database import get_async_db
 from app.models.chapter import Chapter
+from app.models.note import Note
 from app.schemas.chapter import ChapterCreate, ChapterUpdate, ChapterResponse
-from app.auth.dependencies import get_current_active_user
+from app.auth.access import AccessControl, get_access_control
+from app.services.note_summary_service import reserve_summary_job, summarize_chapter_job
+from app.utils.pagination import Keyset, PageParams
 
 router = APIRouter(prefix="/chapters", tags=["Chapters"])
 
+# ChapterResponse nests notes -> contents
+CHAPTER_TREE = selectinload(Chapter.notes).selectinload(Note.contents)
 
-def verify_notebook_ownership(notebook_id: int, user_id: int, db: Session) -> Notebook:
+# Reading order; backed by ix_chapters_notebook_order
+CHAPTER_KEYSET = Keyset(Chapter.order_index, Chapter.id)
+
+
+async def reload_chapter(db: AsyncSession, chapter_id: int) -> Chapter:
     """
-    Verify that a notebook exists and is owned by the user.
+    Reload a chapter with its notes and contents after a commit.
     
     Args:
-        notebook_id: Notebook ID
-        user_id: User ID
         db: Database session
+        chapter_id: Chapter ID
     
     Returns:
-        Notebook object
-    
-    Raises:
-        HTTPException: If notebook not found or not owned by user
+        Chapter object
     """
-    notebook = db.query(Notebook).filter(
-        Notebook.id == notebook_id,
-        Notebook.owner_id == user_id
-    ).first()
-    
-    if not notebook:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Notebook not found"
-        )
-    
-    return notebook
+    # populate_existing: refresh attributes expired by the commit
+    result = await db.execute(
+        select(Chapter)
+        .where(Chapter.id == chapter_id)
+        .options(CHAPTER_TREE)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().one()
 
 
 @router.post("", response_model=ChapterResponse, status_code=status.HTTP_201_CREATED)
 async def create_chapter(
     chapter_data: ChapterCreate,
     notebook_id: int = Query(..., description="Notebook ID to create chapter in"),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new chapter in a notebook.
@@ -56,14 +57,14 @@ async def create_chapter(
     Args:
         chapter_data: Chapter creation data
         notebook_id: Notebook ID (query parameter)
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
         Created chapter object
     """
     # Verify notebook ownership
-    verify_notebook_ownership(notebook_id, current_user.id, db)
+    await access.notebook(notebook_id)
     
     new_chapter = Chapter(
         title=chapter_data.title,
@@ -73,48 +74,56 @@ async def create_chapter(
     )
     
     db.add(new_chapter)
-    db.commit()
-    db.refresh(new_chapter)
+    await db.commit()
     
-    return new_chapter
+    return await reload_chapter(db, new_chapter.id)
 
 
 @router.get("/notebook/{notebook_id}", response_model=List[ChapterResponse])
 async def get_chapters_by_notebook(
     notebook_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    page: PageParams = Depends(),
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get all chapters for a specific notebook.
+    Get the chapters of a notebook in order, one page at a time.
     
     Args:
         notebook_id: Notebook ID
-        current_user: Current authenticated user
+        response: Response (carries the X-Next-Cursor header)
+        page: Cursor and page size
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
         List of chapters
     """
     # Verify notebook ownership
-    verify_notebook_ownership(notebook_id, current_user.id, db)
+    await access.notebook(notebook_id)
     
-    chapters = db.query(Chapter).filter(Chapter.notebook_id == notebook_id).order_by(Chapter.order_index).all()
-    return chapters
+    query = (
+        select(Chapter)
+        .where(Chapter.notebook_id == notebook_id)
+        .options(CHAPTER_TREE)
+    )
+    result = await db.execute(CHAPTER_KEYSET.apply(query, page))
+    return CHAPTER_KEYSET.page(result.scalars().all(), page, response)
 
 
 @router.get("/{chapter_id}", response_model=ChapterResponse)
 async def get_chapter(
     chapter_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific chapter by ID.
     
     Args:
         chapter_id: Chapter ID
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
@@ -123,16 +132,7 @@ async def get_chapter(
     Raises:
         HTTPException: If chapter not found or not accessible
     """
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
-    
-    if not chapter:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Chapter not found"
-        )
-    
-    # Verify notebook ownership
-    verify_notebook_ownership(chapter.notebook_id, current_user.id, db)
+    chapter = await access.chapter(chapter_id, CHAPTER_TREE)
     
     return chapter
 
@@ -141,8 +141,8 @@ async def get_chapter(
 async def update_chapter(
     chapter_id: int,
     chapter_data: ChapterUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a chapter.
@@ -150,22 +150,13 @@ async def update_chapter(
     Args:
         chapter_id: Chapter ID
         chapter_data: Chapter update data
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
         Updated chapter object
     """
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
-    
-    if not chapter:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Chapter not found"
-        )
-    
-    # Verify notebook ownership
-    verify_notebook_ownership(chapter.notebook_id, current_user.id, db)
+    chapter = await access.chapter(chapter_id)
     
     # Update fields
     if chapter_data.title is not None:
@@ -175,39 +166,62 @@ async def update_chapter(
     if chapter_data.order_index is not None:
         chapter.order_index = chapter_data.order_index
     
-    db.commit()
-    db.refresh(chapter)
+    await db.commit()
     
-    return chapter
+    return await reload_chapter(db, chapter_id)
 
 
 @router.delete("/{chapter_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_chapter(
     chapter_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a chapter.
     
     Args:
         chapter_id: Chapter ID
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     """
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+    # The ORM cascade walks notes -> contents, so load them up front
+    chapter = await access.chapter(chapter_id, CHAPTER_TREE)
+    
+    await db.delete(chapter)
+    await db.commit()
+    
+    return None
+
+
+@router.post("/{chapter_id}/summarize", status_code=status.HTTP_202_ACCEPTED)
+async def summarize_chapter(
+    chapter_id: int,
+    background_tasks: BackgroundTasks,
+    access: AccessControl = Depends(get_access_control)
+):
+    """
+    Queue AI summary generation for a chapter.
+    
+    The chapter summary is rolled up from its note summaries; notes without
+    one are summarized first.
     
-    if not chapter:
+    Args:
+        chapter_id: Chapter ID
+        background_tasks: FastAPI background tasks
+        access: Ownership checks for the current user
+    
+    Returns:
+        Queued job status
+    """
+    await access.chapter(chapter_id)
+    
+    if not reserve_summary_job(access.user.id):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Chapter not found"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Summary limit reached, try again in a minute"
         )
     
-    # Verify notebook ownership
-    verify_notebook_ownership(chapter.notebook_id, current_user.id, db)
-    
-    db.delete(chapter)
-    db.commit()
+    background_tasks.add_task(summarize_chapter_job, chapter_id, access.user.id)
     
-    return None
-
+    return {"chapter_id": chapter_id, "status": "queued"}
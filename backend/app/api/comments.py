@@ -3,11 +3,16 @@ Comments API endpoints.
 Handles CRUD operations for resource comments with notifications.
 """
 from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from app.config import settings
+from app.database import get_async_db
 from app.models.schemas import CommentCreate, CommentUpdate, CommentResponse
 from app.core.security import get_current_user_id, get_current_user
-from app.core.supabase_client import supabase_db
+from app.core.supabase_client import supabase_db, verified_claims
+from app.repositories import ResourceRepository
 from app.services.notification_service import notification_service
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,23 +33,24 @@ async def create_comment(
     """
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         # Create comment
         data = comment.model_dump()
         data["user_id"] = user_id
         
-        result = client.table("comments").insert(data).execute()
+        # Insert the comment and look up the resource owner concurrently
+        result, resource = await asyncio.gather(
+            client.table("comments").insert(data).execute(),
+            supabase_db.service_async.table("resources").select("uploaded_by").eq("id", str(comment.resource_id)).maybe_single().execute(),
+        )
         
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to create comment")
         
         comment_data = result.data[0]
         
-        # Get resource owner
-        resource = supabase_db.service_client.table("resources").select("uploaded_by").eq("id", comment.resource_id).single().execute()
-        
-        if resource.data and resource.data["uploaded_by"] != user_id:
+        if resource and resource.data and resource.data["uploaded_by"] != user_id:
             # Notify resource owner
             background_tasks.add_task(
                 notification_service.notify_new_comment,
@@ -67,17 +73,24 @@ async def list_comments(
     resource_id: str,
     limit: int = 50,
     offset: int = 0,
-    authorization: Optional[str] = Header(None)
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all comments for a resource."""
+    token = authorization.replace("Bearer ", "") if authorization else ""
     try:
-        token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token) if token else supabase_db.anon_client
+        if settings.SUPABASE_DIRECT_READS:
+            repository = ResourceRepository(db, (await verified_claims(token)) if token else None)
+            return await repository.list_comments(resource_id, limit, offset)
+        
+        client = supabase_db.user_or_anon_async(token)
         
-        result = client.table("comments").select("*").eq("resource_id", resource_id).order("created_at", desc=False).range(offset, offset + limit - 1).execute()
+        result = await client.table("comments").select("*").eq("resource_id", resource_id).order("created_at", desc=False).range(offset, offset + limit - 1).execute()
         
         return result.data or []
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing comments: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -93,12 +106,12 @@ async def update_comment(
     """Update own comment."""
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         data = comment_update.model_dump()
         data["is_edited"] = True
         
-        result = client.table("comments").update(data).eq("id", comment_id).eq("user_id", user_id).execute()
+        result = await client.table("comments").update(data).eq("id", comment_id).eq("user_id", user_id).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Comment not found or unauthorized")
@@ -121,9 +134,9 @@ async def delete_comment(
     """Delete own comment."""
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
-        result = client.table("comments").delete().eq("id", comment_id).eq("user_id", user_id).execute()
+        result = await client.table("comments").delete().eq("id", comment_id).eq("user_id", user_id).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Comment not found or unauthorized")
@@ -7,6 +7,7 @@ from app.models.schemas import LikeResponse
 from app.core.security import get_current_user_id, get_current_user
 from app.core.supabase_client import supabase_db
 from app.services.notification_service import notification_service
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,7 +28,7 @@ async def like_resource(
     """
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         # Create like
         data = {
@@ -35,17 +36,18 @@ async def like_resource(
             "user_id": user_id
         }
         
-        result = client.table("resource_likes").insert(data).execute()
+        # Insert the like and look up the resource owner concurrently
+        result, resource = await asyncio.gather(
+            client.table("resource_likes").insert(data).execute(),
+            supabase_db.service_async.table("resources").select("uploaded_by").eq("id", resource_id).maybe_single().execute(),
+        )
         
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to like resource (might already be liked)")
         
         like_data = result.data[0]
         
-        # Get resource owner
-        resource = supabase_db.service_client.table("resources").select("uploaded_by").eq("id", resource_id).single().execute()
-        
-        if resource.data and resource.data["uploaded_by"] != user_id:
+        if resource and resource.data and resource.data["uploaded_by"] != user_id:
             # Notify resource owner
             background_tasks.add_task(
                 notification_service.notify_new_like,
@@ -72,9 +74,9 @@ async def unlike_resource(
     """Unlike a resource."""
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
-        result = client.table("resource_likes").delete().eq("resource_id", resource_id).eq("user_id", user_id).execute()
+        result = await client.table("resource_likes").delete().eq("resource_id", resource_id).eq("user_id", user_id).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Like not found")
@@ -96,7 +98,7 @@ async def get_resource_likes(
 ):
     """Get all likes for a resource."""
     try:
-        result = supabase_db.anon_client.table("resource_likes").select("*").eq("resource_id", resource_id).order("created_at", desc=True).range(offset, offset + limit - 1).execute()
+        result = await supabase_db.anon_async.table("resource_likes").select("*").eq("resource_id", resource_id).order("created_at", desc=True).range(offset, offset + limit - 1).execute()
         
         return result.data or []
         
@@ -113,9 +115,9 @@ async def get_my_likes(
     """Get current user's liked resources."""
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
-        result = client.table("resource_likes").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+        result = await client.table("resource_likes").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
         
         return result.data or []
         
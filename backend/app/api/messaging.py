@@ -7,8 +7,14 @@ from typing import List, Optional
 from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db
 from app.core.security import get_current_user_id
-from app.core.supabase_client import supabase_db
+from app.core.supabase_client import supabase_db, verified_claims
+from app.repositories import MessageRepository
+from app.services.realtime_service import realtime_gateway, conversation_channel, community_channel
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -83,11 +89,11 @@ async def create_or_get_conversation(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         if not data.is_group:
             # Use stored procedure to get or create 1-1 conversation
-            result = client.rpc(
+            result = await client.rpc(
                 'get_or_create_conversation',
                 {'user1_id': user_id, 'user2_id': str(data.other_user_id)}
             ).execute()
@@ -101,7 +107,7 @@ async def create_or_get_conversation(
             conversation_id = result.data
             
             # Fetch conversation details
-            conv_result = client.table("conversations").select("*").eq("id", conversation_id).single().execute()
+            conv_result = await client.table("conversations").select("*").eq("id", conversation_id).single().execute()
             return conv_result.data
         
         else:
@@ -111,7 +117,7 @@ async def create_or_get_conversation(
                 "name": data.name or "Group Chat"
             }
             
-            conv_result = client.table("conversations").insert(conv_data).execute()
+            conv_result = await client.table("conversations").insert(conv_data).execute()
             
             if not conv_result.data:
                 raise HTTPException(
@@ -122,7 +128,7 @@ async def create_or_get_conversation(
             conversation_id = conv_result.data[0]["id"]
             
             # Add creator as member
-            client.table("conversation_members").insert({
+            await client.table("conversation_members").insert({
                 "conversation_id": conversation_id,
                 "user_id": user_id,
                 "is_admin": True
@@ -145,91 +151,63 @@ async def get_user_conversations(
     limit: int = 50,
     offset: int = 0,
     user_id: str = Depends(get_current_user_id),
-    authorization: Optional[str] = Header(None)
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all conversations for the authenticated user.
     Includes last message preview and unread count.
+    
+    The page is built by the get_user_conversations() SQL function
+    (messaging_schema.sql) in one query, most recently active first.
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
         
-        # Get conversations the user is a member of
-        result = client.table("conversation_members").select(
-            "conversation_id"
-        ).eq("user_id", user_id).execute()
+        if settings.SUPABASE_DIRECT_READS:
+            repository = MessageRepository(db, await verified_claims(token))
+            return await repository.list_conversations(limit, offset)
         
-        if not result.data:
-            return []
+        client = supabase_db.get_user_client_async(token)
+        result = await client.rpc(
+            "get_user_conversations",
+            {"p_limit": limit, "p_offset": offset}
+        ).execute()
         
-        conversation_ids = [item["conversation_id"] for item in result.data]
+        return result.data or []
         
-        # Get conversation details with last message
-        conversations = []
-        for conv_id in conversation_ids:
-            # Get conversation
-            conv_result = client.table("conversations").select("*").eq("id", conv_id).single().execute()
-            conv_data = conv_result.data
-            
-            # Get last message
-            last_msg_result = client.table("messages").select(
-                "content, created_at"
-            ).eq("conversation_id", conv_id).order("created_at", desc=True).limit(1).execute()
-            
-            last_message = last_msg_result.data[0]["content"] if last_msg_result.data else None
-            
-            # Get other user info (for direct chats)
-            other_user_name = None
-            other_user_avatar = None
-            if not conv_data["is_group"]:
-                members_result = client.table("conversation_members").select(
-                    "user_id"
-                ).eq("conversation_id", conv_id).neq("user_id", user_id).execute()
-                
-                if members_result.data:
-                    other_user_id = members_result.data[0]["user_id"]
-                    user_result = client.table("users").select(
-                        "full_name, avatar_url"
-                    ).eq("id", other_user_id).single().execute()
-                    
-                    if user_result.data:
-                        other_user_name = user_result.data["full_name"]
-                        other_user_avatar = user_result.data.get("avatar_url")
-            
-            # Get unread count (messages after last_read_at)
-            members_result = client.table("conversation_members").select(
-                "last_read_at"
-            ).eq("conversation_id", conv_id).eq("user_id", user_id).single().execute()
-            
-            last_read = members_result.data.get("last_read_at") if members_result.data else None
-            
-            if last_read:
-                unread_result = client.table("messages").select(
-                    "id", count="exact"
-                ).eq("conversation_id", conv_id).gt("created_at", last_read).execute()
-                unread_count = unread_result.count or 0
-            else:
-                unread_result = client.table("messages").select(
-                    "id", count="exact"
-                ).eq("conversation_id", conv_id).execute()
-                unread_count = unread_result.count or 0
-            
-            conversations.append(ConversationWithDetails(
-                **conv_data,
-                last_message=last_message,
-                unread_count=unread_count,
-                other_user_name=other_user_name,
-                other_user_avatar=other_user_avatar
-            ))
+    except Exception as e:
+        logger.error(f"Error fetching conversations: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/unread-count", response_model=dict)
+async def get_total_unread_count(
+    user_id: str = Depends(get_current_user_id),
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the total number of unread messages across the user's conversations.
+    Reads the per-member counters (one index-only scan), not the messages.
+    """
+    try:
+        token = authorization.replace("Bearer ", "") if authorization else ""
         
-        # Sort by last_message_at
-        conversations.sort(key=lambda x: x.last_message_at or x.created_at, reverse=True)
+        if settings.SUPABASE_DIRECT_READS:
+            repository = MessageRepository(db, await verified_claims(token))
+            return {"count": await repository.total_unread()}
         
-        return conversations[offset:offset + limit]
+        client = supabase_db.get_user_client_async(token)
+        result = await client.rpc("get_total_unread_count", {}).execute()
+        
+        return {"count": result.data or 0}
         
     except Exception as e:
-        logger.error(f"Error fetching conversations: {e}")
+        logger.error(f"Error counting unread messages: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -242,7 +220,8 @@ async def get_conversation_messages(
     limit: int = 50,
     before: Optional[datetime] = None,
     user_id: str = Depends(get_current_user_id),
-    authorization: Optional[str] = Header(None)
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get messages for a specific conversation.
@@ -250,10 +229,25 @@ async def get_conversation_messages(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
+        # Advances last_read_at and resets the unread counter
+        mark_read = client.rpc("mark_conversation_read", {"p_conversation_id": str(conversation_id)})
+        
+        if settings.SUPABASE_DIRECT_READS:
+            # Membership check and page in one Postgres transaction; the
+            # read marker still goes through PostgREST
+            repository = MessageRepository(db, await verified_claims(token))
+            messages = await repository.list_messages(str(conversation_id), limit, before)
+            if messages is None:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You are not a member of this conversation"
+                )
+            await mark_read.execute()
+            return messages
         
         # Verify user is a member of this conversation
-        member_check = client.table("conversation_members").select("user_id").eq(
+        member_check = await client.table("conversation_members").select("user_id").eq(
             "conversation_id", str(conversation_id)
         ).eq("user_id", user_id).execute()
         
@@ -271,12 +265,8 @@ async def get_conversation_messages(
         
         query = query.order("created_at", desc=True).limit(limit)
         
-        result = query.execute()
-        
-        # Update last_read_at
-        client.table("conversation_members").update({
-            "last_read_at": datetime.utcnow().isoformat()
-        }).eq("conversation_id", str(conversation_id)).eq("user_id", user_id).execute()
+        # Fetch the page and mark the conversation read concurrently
+        result, _ = await asyncio.gather(query.execute(), mark_read.execute())
         
         return result.data or []
         
@@ -303,7 +293,7 @@ async def send_message(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         data = {
             "conversation_id": str(conversation_id),
@@ -311,7 +301,7 @@ async def send_message(
             "content": message.content
         }
         
-        result = client.table("messages").insert(data).execute()
+        result = await client.table("messages").insert(data).execute()
         
         if not result.data:
             raise HTTPException(
@@ -319,6 +309,9 @@ async def send_message(
                 detail="Failed to send message"
             )
         
+        # Push to members connected to the realtime gateway
+        await realtime_gateway.publish(conversation_channel(conversation_id), result.data[0])
+        
         return result.data[0]
         
     except HTTPException:
@@ -343,10 +336,10 @@ async def delete_message(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         # Soft delete
-        result = client.table("messages").update({
+        result = await client.table("messages").update({
             "is_deleted": True,
             "content": "[Message deleted]"
         }).eq("id", str(message_id)).eq("sender_id", user_id).execute()
@@ -432,13 +425,13 @@ async def create_community(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         data = community.model_dump()
         data["created_by"] = user_id
         data["member_count"] = 1
         
-        result = client.table("communities").insert(data).execute()
+        result = await client.table("communities").insert(data).execute()
         
         if not result.data:
             raise HTTPException(
@@ -449,7 +442,7 @@ async def create_community(
         community_id = result.data[0]["id"]
         
         # Add creator as admin member
-        client.table("community_members").insert({
+        await client.table("community_members").insert({
             "community_id": community_id,
             "user_id": user_id,
             "role": "admin"
@@ -481,7 +474,7 @@ async def list_communities(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token) if token else supabase_db.anon_client
+        client = supabase_db.user_or_anon_async(token)
         
         query = client.table("communities").select("*").eq("is_private", False)
         
@@ -493,7 +486,7 @@ async def list_communities(
         
         query = query.order("member_count", desc=True).range(offset, offset + limit - 1)
         
-        result = query.execute()
+        result = await query.execute()
         return result.data or []
         
     except Exception as e:
@@ -514,10 +507,10 @@ async def get_my_communities(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         # Get user's community memberships
-        memberships = client.table("community_members").select(
+        memberships = await client.table("community_members").select(
             "community_id"
         ).eq("user_id", user_id).execute()
         
@@ -527,7 +520,7 @@ async def get_my_communities(
         community_ids = [m["community_id"] for m in memberships.data]
         
         # Get community details
-        result = client.table("communities").select("*").in_("id", community_ids).execute()
+        result = await client.table("communities").select("*").in_("id", community_ids).execute()
         
         return result.data or []
         
@@ -551,10 +544,10 @@ async def join_community(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         # Check if already a member
-        existing = client.table("community_members").select("user_id").eq(
+        existing = await client.table("community_members").select("user_id").eq(
             "community_id", str(community_id)
         ).eq("user_id", user_id).execute()
         
@@ -565,7 +558,7 @@ async def join_community(
             )
         
         # Join community
-        result = client.table("community_members").insert({
+        result = await client.table("community_members").insert({
             "community_id": str(community_id),
             "user_id": user_id,
             "role": "member"
@@ -600,9 +593,9 @@ async def leave_community(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
-        result = client.table("community_members").delete().eq(
+        result = await client.table("community_members").delete().eq(
             "community_id", str(community_id)
         ).eq("user_id", user_id).execute()
         
@@ -612,6 +605,9 @@ async def leave_community(
                 detail="Not a member of this community"
             )
         
+        # Stop pushing the community to the user's open sockets
+        await realtime_gateway.revoke(user_id, community_channel(community_id))
+        
         return None
         
     except HTTPException:
@@ -638,7 +634,7 @@ async def get_community_messages(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         query = client.table("community_messages").select("*").eq("community_id", str(community_id))
         
@@ -647,7 +643,7 @@ async def get_community_messages(
         
         query = query.order("created_at", desc=True).limit(limit)
         
-        result = query.execute()
+        result = await query.execute()
         return result.data or []
         
     except Exception as e:
@@ -671,7 +667,7 @@ async def send_community_message(
     """
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         data = {
             "community_id": str(community_id),
@@ -680,7 +676,7 @@ async def send_community_message(
             "reply_to_id": str(message.reply_to_id) if message.reply_to_id else None
         }
         
-        result = client.table("community_messages").insert(data).execute()
+        result = await client.table("community_messages").insert(data).execute()
         
         if not result.data:
             raise HTTPException(
@@ -688,6 +684,9 @@ async def send_community_message(
                 detail="Failed to send message (may not be a member)"
             )
         
+        # Push to members connected to the realtime gateway
+        await realtime_gateway.publish(community_channel(community_id), result.data[0])
+        
         return result.data[0]
         
     except HTTPException:
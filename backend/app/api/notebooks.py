@@ -1,23 +1,169 @@
 """
 Notebook API endpoints for CRUD operations.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, BackgroundTasks
+from sqlalchemy import select, func, distinct
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+from app.database import get_async_db
 from app.models.user import User
 from app.models.notebook import Notebook
-from app.schemas.notebook import NotebookCreate, NotebookUpdate, NotebookResponse
+from app.models.chapter import Chapter
+from app.models.note import Note
+from app.schemas.notebook import NotebookCreate, NotebookUpdate, NotebookResponse, NotebookTreeResponse
 from app.auth.dependencies import get_current_active_user
+from app.auth.access import AccessControl, get_access_control
+from app.services.note_summary_service import reserve_summary_job, summarize_notebook_job
+from app.utils.pagination import Keyset, PageParams
+from app.utils.etag import make_etag, etag_matches, set_etag, not_modified
 
 router = APIRouter(prefix="/notebooks", tags=["Notebooks"])
 
+# NotebookResponse nests chapters -> notes -> contents
+NOTEBOOK_TREE = selectinload(Notebook.chapters).selectinload(Chapter.notes).selectinload(Note.contents)
+
+# Newest first; backed by ix_notebooks_owner_created
+NOTEBOOK_KEYSET = Keyset(Notebook.created_at, Notebook.id, descending=True)
+
+
+async def reload_notebook(db: AsyncSession, notebook_id: int) -> Notebook:
+    """
+    Reload a notebook with its full tree after a commit.
+    
+    Args:
+        db: Database session
+        notebook_id: Notebook ID
+    
+    Returns:
+        Notebook object
+    """
+    # populate_existing: refresh attributes expired by the commit
+    result = await db.execute(
+        select(Notebook)
+        .where(Notebook.id == notebook_id)
+        .options(NOTEBOOK_TREE)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().one()
+
+
+def tree_filter(query, owner_id: int, notebook_id: Optional[int]):
+    """Restrict a tree query to the owner's notebooks (or one of them)."""
+    query = query.where(Notebook.owner_id == owner_id)
+    if notebook_id is not None:
+        query = query.where(Notebook.id == notebook_id)
+    return query
+
+
+async def tree_etag(db: AsyncSession, owner_id: int, notebook_id: Optional[int] = None) -> Optional[str]:
+    """
+    Version fingerprint of a user's notebook tree (or one notebook's).
+    
+    One aggregate query: row counts catch deletions, the latest
+    updated_at/created_at per level catches inserts and edits.
+    
+    Args:
+        db: Database session
+        owner_id: Owner user ID
+        notebook_id: Restrict to this notebook
+    
+    Returns:
+        ETag, or None if notebook_id is given and the user owns no such notebook
+    """
+    query = tree_filter(
+        select(
+            func.count(distinct(Notebook.id)),
+            func.count(distinct(Chapter.id)),
+            func.count(Note.id),
+            func.max(func.coalesce(Notebook.updated_at, Notebook.created_at)),
+            func.max(func.coalesce(Chapter.updated_at, Chapter.created_at)),
+            func.max(func.coalesce(Note.updated_at, Note.created_at)),
+        )
+        .select_from(Notebook)
+        .outerjoin(Chapter, Chapter.notebook_id == Notebook.id)
+        .outerjoin(Note, Note.chapter_id == Chapter.id),
+        owner_id,
+        notebook_id,
+    )
+    version = (await db.execute(query)).one()
+    
+    if notebook_id is not None and version[0] == 0:
+        return None
+    return make_etag(owner_id, notebook_id, *version)
+
+
+async def load_tree(db: AsyncSession, owner_id: int, notebook_id: Optional[int] = None) -> List[dict]:
+    """
+    Load notebooks -> chapters -> note titles in one query.
+    
+    Args:
+        db: Database session
+        owner_id: Owner user ID
+        notebook_id: Restrict to this notebook
+    
+    Returns:
+        List of notebook tree dicts (NotebookTreeResponse shape)
+    """
+    query = tree_filter(
+        select(
+            Notebook.id.label("notebook_id"),
+            Notebook.title.label("notebook_title"),
+            Notebook.color,
+            Chapter.id.label("chapter_id"),
+            Chapter.title.label("chapter_title"),
+            Chapter.order_index,
+            Note.id.label("note_id"),
+            Note.title.label("note_title"),
+        )
+        .select_from(Notebook)
+        .outerjoin(Chapter, Chapter.notebook_id == Notebook.id)
+        .outerjoin(Note, Note.chapter_id == Chapter.id)
+        # Same orders as the list endpoints
+        .order_by(
+            Notebook.created_at.desc(), Notebook.id.desc(),
+            Chapter.order_index, Chapter.id,
+            Note.created_at.desc(), Note.id.desc(),
+        ),
+        owner_id,
+        notebook_id,
+    )
+    result = await db.execute(query)
+    
+    notebooks = {}
+    chapters = {}
+    for row in result:
+        notebook = notebooks.get(row.notebook_id)
+        if notebook is None:
+            notebook = notebooks[row.notebook_id] = {
+                "id": row.notebook_id,
+                "title": row.notebook_title,
+                "color": row.color,
+                "chapters": [],
+            }
+        if row.chapter_id is None:
+            continue
+        
+        chapter = chapters.get(row.chapter_id)
+        if chapter is None:
+            chapter = chapters[row.chapter_id] = {
+                "id": row.chapter_id,
+                "title": row.chapter_title,
+                "order_index": row.order_index or 0,
+                "notes": [],
+            }
+            notebook["chapters"].append(chapter)
+        if row.note_id is not None:
+            chapter["notes"].append({"id": row.note_id, "title": row.note_title})
+    
+    return list(notebooks.values())
+
 
 @router.post("", response_model=NotebookResponse, status_code=status.HTTP_201_CREATED)
 async def create_notebook(
     notebook_data: NotebookCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new notebook (subject).
@@ -38,71 +184,142 @@ async def create_notebook(
     )
     
     db.add(new_notebook)
-    db.commit()
-    db.refresh(new_notebook)
+    await db.commit()
     
-    return new_notebook
+    return await reload_notebook(db, new_notebook.id)
 
 
 @router.get("", response_model=List[NotebookResponse])
 async def get_notebooks(
+    response: Response,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get all notebooks for the current user.
+    Get the current user's notebooks, newest first, one page at a time.
     
     Args:
+        response: Response (carries the X-Next-Cursor header)
+        page: Cursor and page size
         current_user: Current authenticated user
         db: Database session
     
     Returns:
         List of user's notebooks
     """
-    notebooks = db.query(Notebook).filter(Notebook.owner_id == current_user.id).all()
-    return notebooks
+    query = (
+        select(Notebook)
+        .where(Notebook.owner_id == current_user.id)
+        .options(NOTEBOOK_TREE)
+    )
+    result = await db.execute(NOTEBOOK_KEYSET.apply(query, page))
+    return NOTEBOOK_KEYSET.page(result.scalars().all(), page, response)
 
 
-@router.get("/{notebook_id}", response_model=NotebookResponse)
-async def get_notebook(
+@router.get("/tree", response_model=List[NotebookTreeResponse])
+async def get_notebooks_tree(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get all of the user's notebooks with their chapters and note titles.
+    
+    Replaces one request per notebook and chapter when building the sidebar.
+    Send the returned ETag as If-None-Match to get a 304 while nothing changed.
+    
+    Args:
+        request: Incoming request (If-None-Match)
+        response: Response (carries the ETag)
+        current_user: Current authenticated user
+        db: Database session
+    
+    Returns:
+        List of notebook trees
+    """
+    etag = await tree_etag(db, current_user.id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    set_etag(response, etag)
+    return await load_tree(db, current_user.id)
+
+
+@router.get("/{notebook_id}/tree", response_model=NotebookTreeResponse)
+async def get_notebook_tree(
     notebook_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get a specific notebook by ID.
+    Get one notebook with its chapters and note titles.
     
     Args:
         notebook_id: Notebook ID
+        request: Incoming request (If-None-Match)
+        response: Response (carries the ETag)
         current_user: Current authenticated user
         db: Database session
     
     Returns:
-        Notebook object
+        Notebook tree
     
     Raises:
         HTTPException: If notebook not found or not owned by user
     """
-    notebook = db.query(Notebook).filter(
-        Notebook.id == notebook_id,
-        Notebook.owner_id == current_user.id
-    ).first()
+    # The version query also checks ownership
+    etag = await tree_etag(db, current_user.id, notebook_id)
+    if etag is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Notebook not found"
+        )
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
-    if not notebook:
+    trees = await load_tree(db, current_user.id, notebook_id)
+    if not trees:
+        # Deleted between the two queries
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notebook not found"
         )
     
-    return notebook
+    set_etag(response, etag)
+    return trees[0]
+
+
+@router.get("/{notebook_id}", response_model=NotebookResponse)
+async def get_notebook(
+    notebook_id: int,
+    access: AccessControl = Depends(get_access_control)
+):
+    """
+    Get a specific notebook by ID.
+    
+    Args:
+        notebook_id: Notebook ID
+        access: Ownership checks for the current user
+    
+    Returns:
+        Notebook object
+    
+    Raises:
+        HTTPException: If notebook not found or not owned by user
+    """
+    return await access.notebook(notebook_id, NOTEBOOK_TREE)
 
 
 @router.put("/{notebook_id}", response_model=NotebookResponse)
 async def update_notebook(
     notebook_id: int,
     notebook_data: NotebookUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a notebook.
@@ -110,7 +327,7 @@ async def update_notebook(
     Args:
         notebook_id: Notebook ID
         notebook_data: Notebook update data
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
@@ -119,16 +336,7 @@ async def update_notebook(
     Raises:
         HTTPException: If notebook not found or not owned by user
     """
-    notebook = db.query(Notebook).filter(
-        Notebook.id == notebook_id,
-        Notebook.owner_id == current_user.id
-    ).first()
-    
-    if not notebook:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Notebook not found"
-        )
+    notebook = await access.notebook(notebook_id)
     
     # Update fields
     if notebook_data.title is not None:
@@ -138,42 +346,64 @@ async def update_notebook(
     if notebook_data.color is not None:
         notebook.color = notebook_data.color
     
-    db.commit()
-    db.refresh(notebook)
+    await db.commit()
     
-    return notebook
+    return await reload_notebook(db, notebook_id)
 
 
 @router.delete("/{notebook_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_notebook(
     notebook_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a notebook.
     
     Args:
         notebook_id: Notebook ID
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     
     Raises:
         HTTPException: If notebook not found or not owned by user
     """
-    notebook = db.query(Notebook).filter(
-        Notebook.id == notebook_id,
-        Notebook.owner_id == current_user.id
-    ).first()
+    # The ORM cascade walks chapters -> notes -> contents, so load them up front
+    notebook = await access.notebook(notebook_id, NOTEBOOK_TREE)
+    
+    await db.delete(notebook)
+    await db.commit()
     
-    if not notebook:
+    return None
+
+
+@router.post("/{notebook_id}/summarize", status_code=status.HTTP_202_ACCEPTED)
+async def summarize_notebook(
+    notebook_id: int,
+    background_tasks: BackgroundTasks,
+    access: AccessControl = Depends(get_access_control)
+):
+    """
+    Queue AI summary generation for a notebook.
+    
+    The notebook summary is rolled up from its chapter summaries.
+    
+    Args:
+        notebook_id: Notebook ID
+        background_tasks: FastAPI background tasks
+        access: Ownership checks for the current user
+    
+    Returns:
+        Queued job status
+    """
+    await access.notebook(notebook_id)
+    
+    if not reserve_summary_job(access.user.id):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Notebook not found"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Summary limit reached, try again in a minute"
         )
     
-    db.delete(notebook)
-    db.commit()
+    background_tasks.add_task(summarize_notebook_job, notebook_id)
     
-    return None
-
+    return {"notebook_id": notebook_id, "status": "queued"}
@@ -1,75 +1,71 @@
 """
 Note API endpoints for CRUD operations.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.database import get_db
-from app.models.user import User
-from app.models.chapter import Chapter
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File, Form, BackgroundTasks, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Literal, Optional, Union
+from app.database import get_async_db
 from app.models.note import Note
 from app.models.note_content import NoteContent, ContentType
-from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse
+from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse, NoteSummaryResponse
 from app.schemas.note_content import NoteContentCreate, NoteContentResponse
-from app.auth.dependencies import get_current_active_user
+from app.auth.access import AccessControl, get_access_control
 from app.utils.file_storage import supabase_storage
+from app.services.note_summary_service import reserve_summary_job, summarize_note_job
+from app.utils.pagination import Keyset, PageParams
+import asyncio
 import json
 
 router = APIRouter(prefix="/notes", tags=["Notes"])
 
+# Newest first; backed by ix_notes_chapter_created
+NOTE_KEYSET = Keyset(Note.created_at, Note.id, descending=True)
+# Block order; backed by ix_note_contents_note_order
+CONTENT_KEYSET = Keyset(NoteContent.order_index, NoteContent.id)
 
-def verify_chapter_access(chapter_id: int, user_id: int, db: Session) -> Chapter:
+
+async def load_note(db: AsyncSession, note_id: int, with_contents: bool = True) -> Optional[Note]:
     """
-    Verify that a chapter exists and is accessible by the user.
+    Load a note, optionally with its content blocks (NoteResponse includes them).
     
     Args:
-        chapter_id: Chapter ID
-        user_id: User ID
         db: Database session
+        note_id: Note ID
+        with_contents: Eager-load contents
     
     Returns:
-        Chapter object
-    
-    Raises:
-        HTTPException: If chapter not found or not accessible
+        Note object or None
     """
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
-    
-    if not chapter:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Chapter not found"
-        )
+    query = select(Note).where(Note.id == note_id)
+    if with_contents:
+        # populate_existing: reload attributes refreshed by a preceding commit
+        query = query.options(selectinload(Note.contents)).execution_options(populate_existing=True)
     
-    # Verify notebook ownership
-    if chapter.notebook.owner_id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this chapter"
-        )
-    
-    return chapter
+    result = await db.execute(query)
+    return result.scalars().first()
 
 
 @router.post("", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
 async def create_note(
     note_data: NoteCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new note in a chapter.
     
     Args:
         note_data: Note creation data
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
         Created note object
     """
     # Verify chapter access
-    verify_chapter_access(note_data.chapter_id, current_user.id, db)
+    await access.chapter(note_data.chapter_id)
     
     new_note = Note(
         title=note_data.title,
@@ -77,48 +73,81 @@ async def create_note(
     )
     
     db.add(new_note)
-    db.commit()
-    db.refresh(new_note)
+    await db.commit()
     
-    return new_note
+    return await load_note(db, new_note.id)
 
 
-@router.get("/chapter/{chapter_id}", response_model=List[NoteResponse])
+@router.get("/chapter/{chapter_id}", response_model=List[Union[NoteSummaryResponse, NoteResponse]])
 async def get_notes_by_chapter(
     chapter_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    view: Literal["summary", "full"] = Query("full", description="summary: note columns and content count only"),
+    page: PageParams = Depends(),
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get all notes for a specific chapter.
+    Get the notes of a chapter, newest first, one page at a time.
+    
+    The full view eager-loads every note's content blocks in one extra query;
+    the summary view skips them and returns a content count instead.
     
     Args:
         chapter_id: Chapter ID
-        current_user: Current authenticated user
+        response: Response (carries the X-Next-Cursor header)
+        view: Projection, "full" (with contents) or "summary"
+        page: Cursor and page size
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
         List of notes
     """
     # Verify chapter access
-    verify_chapter_access(chapter_id, current_user.id, db)
-    
-    notes = db.query(Note).filter(Note.chapter_id == chapter_id).order_by(Note.created_at.desc()).all()
-    return notes
+    await access.chapter(chapter_id)
+    
+    if view == "summary":
+        query = (
+            select(
+                Note.id,
+                Note.title,
+                Note.chapter_id,
+                Note.is_ai_structured,
+                Note.ai_summary,
+                Note.created_at,
+                Note.updated_at,
+                func.count(NoteContent.id).label("content_count"),
+            )
+            .outerjoin(NoteContent, NoteContent.note_id == Note.id)
+            .where(Note.chapter_id == chapter_id)
+            .group_by(Note.id)
+        )
+        result = await db.execute(NOTE_KEYSET.apply(query, page))
+        rows = NOTE_KEYSET.page(result.all(), page, response)
+        return [NoteSummaryResponse(**row._mapping) for row in rows]
+    
+    query = (
+        select(Note)
+        .where(Note.chapter_id == chapter_id)
+        .options(selectinload(Note.contents))
+    )
+    result = await db.execute(NOTE_KEYSET.apply(query, page))
+    return NOTE_KEYSET.page(result.scalars().all(), page, response)
 
 
 @router.get("/{note_id}", response_model=NoteResponse)
 async def get_note(
     note_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific note by ID.
     
     Args:
         note_id: Note ID
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
@@ -127,16 +156,7 @@ async def get_note(
     Raises:
         HTTPException: If note not found or not accessible
     """
-    note = db.query(Note).filter(Note.id == note_id).first()
-    
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Note not found"
-        )
-    
-    # Verify chapter access
-    verify_chapter_access(note.chapter_id, current_user.id, db)
+    note = await access.note(note_id, selectinload(Note.contents))
     
     return note
 
@@ -145,8 +165,8 @@ async def get_note(
 async def update_note(
     note_id: int,
     note_data: NoteUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a note.
@@ -154,22 +174,13 @@ async def update_note(
     Args:
         note_id: Note ID
         note_data: Note update data
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
         Updated note object
     """
-    note = db.query(Note).filter(Note.id == note_id).first()
-    
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Note not found"
-        )
-    
-    # Verify chapter access
-    verify_chapter_access(note.chapter_id, current_user.id, db)
+    note = await access.note(note_id)
     
     # Update fields
     if note_data.title is not None:
@@ -177,44 +188,35 @@ async def update_note(
     if note_data.ai_summary is not None:
         note.ai_summary = note_data.ai_summary
     
-    db.commit()
-    db.refresh(note)
+    await db.commit()
     
-    return note
+    return await load_note(db, note_id)
 
 
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_note(
     note_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a note.
     
     Args:
         note_id: Note ID
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     """
-    note = db.query(Note).filter(Note.id == note_id).first()
-    
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Note not found"
-        )
-    
-    # Verify chapter access
-    verify_chapter_access(note.chapter_id, current_user.id, db)
+    # Contents are needed for file cleanup and the ORM cascade
+    note = await access.note(note_id, selectinload(Note.contents))
     
     # Delete associated files from Supabase Storage
     for content in note.contents:
         if content.file_url:
-            supabase_storage.delete_file(content.file_url)
+            await asyncio.to_thread(supabase_storage.delete_file, content.file_url)
     
-    db.delete(note)
-    db.commit()
+    await db.delete(note)
+    await db.commit()
     
     return None
 
@@ -228,8 +230,8 @@ async def add_note_content(
     file_name: Optional[str] = Form(None),
     order_index: int = Form(0),
     metadata: Optional[str] = Form(None),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add content to a note (text, image, PDF, etc.).
@@ -242,22 +244,13 @@ async def add_note_content(
         file_name: Original file name
         order_index: Order of content within note
         metadata: JSON metadata string
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
         Created note content object
     """
-    note = db.query(Note).filter(Note.id == note_id).first()
-    
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Note not found"
-        )
-    
-    # Verify chapter access
-    verify_chapter_access(note.chapter_id, current_user.id, db)
+    await access.note(note_id)
     
     file_url = None
     file_size = None
@@ -273,7 +266,8 @@ async def add_note_content(
         
         # Upload to Supabase Storage
         final_file_name = file.filename or file_name or "uploaded_file"
-        file_url = supabase_storage.upload_file(
+        file_url = await asyncio.to_thread(
+            supabase_storage.upload_file,
             file_content=file_content,
             file_name=final_file_name,
             folder=folder,
@@ -293,8 +287,8 @@ async def add_note_content(
     )
     
     db.add(new_content)
-    db.commit()
-    db.refresh(new_content)
+    await db.commit()
+    await db.refresh(new_content)
     
     return new_content
 
@@ -302,67 +296,85 @@ async def add_note_content(
 @router.get("/{note_id}/content", response_model=List[NoteContentResponse])
 async def get_note_contents(
     note_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    page: PageParams = Depends(),
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get all content for a specific note.
+    Get the content blocks of a note in order, one page at a time.
     
     Args:
         note_id: Note ID
-        current_user: Current authenticated user
+        response: Response (carries the X-Next-Cursor header)
+        page: Cursor and page size
+        access: Ownership checks for the current user
         db: Database session
     
     Returns:
         List of note contents
     """
-    note = db.query(Note).filter(Note.id == note_id).first()
-    
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Note not found"
-        )
+    await access.note(note_id)
     
-    # Verify chapter access
-    verify_chapter_access(note.chapter_id, current_user.id, db)
-    
-    contents = db.query(NoteContent).filter(NoteContent.note_id == note_id).order_by(NoteContent.order_index).all()
-    return contents
+    query = select(NoteContent).where(NoteContent.note_id == note_id)
+    result = await db.execute(CONTENT_KEYSET.apply(query, page))
+    return CONTENT_KEYSET.page(result.scalars().all(), page, response)
 
 
 @router.delete("/content/{content_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_note_content(
     content_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    access: AccessControl = Depends(get_access_control),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a note content item.
     
     Args:
         content_id: Content ID
-        current_user: Current authenticated user
+        access: Ownership checks for the current user
         db: Database session
     """
-    content = db.query(NoteContent).filter(NoteContent.id == content_id).first()
-    
-    if not content:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Content not found"
-        )
-    
-    # Verify note access
-    note = db.query(Note).filter(Note.id == content.note_id).first()
-    verify_chapter_access(note.chapter_id, current_user.id, db)
+    content = await access.content(content_id)
     
     # Delete file from Supabase Storage if exists
     if content.file_url:
-        supabase_storage.delete_file(content.file_url)
+        await asyncio.to_thread(supabase_storage.delete_file, content.file_url)
     
-    db.delete(content)
-    db.commit()
+    await db.delete(content)
+    await db.commit()
     
     return None
 
+
+@router.post("/{note_id}/summarize", status_code=status.HTTP_202_ACCEPTED)
+async def summarize_note(
+    note_id: int,
+    background_tasks: BackgroundTasks,
+    access: AccessControl = Depends(get_access_control)
+):
+    """
+    Queue AI summary generation for a note.
+    
+    The summary is built from the note's most salient passages and stored
+    in `ai_summary`; the note is then marked as AI-structured.
+    
+    Args:
+        note_id: Note ID
+        background_tasks: FastAPI background tasks
+        access: Ownership checks for the current user
+    
+    Returns:
+        Queued job status
+    """
+    await access.note(note_id)
+    
+    if not reserve_summary_job(access.user.id):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Summary limit reached, try again in a minute"
+        )
+    
+    background_tasks.add_task(summarize_note_job, note_id, access.user.id)
+    
+    return {"note_id": note_id, "status": "queued"}
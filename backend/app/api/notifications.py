@@ -2,10 +2,14 @@
 Notifications API endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from app.config import settings
+from app.database import get_async_db
 from app.models.schemas import NotificationResponse
 from app.core.security import get_current_user_id
-from app.core.supabase_client import supabase_db
+from app.core.supabase_client import supabase_db, verified_claims
+from app.repositories import NotificationRepository
 from app.services.notification_service import notification_service
 import logging
 
@@ -19,12 +23,17 @@ async def get_notifications(
     limit: int = 50,
     offset: int = 0,
     user_id: str = Depends(get_current_user_id),
-    authorization: Optional[str] = Header(None)
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's notifications."""
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        if settings.SUPABASE_DIRECT_READS:
+            repository = NotificationRepository(db, await verified_claims(token))
+            return await repository.list_notifications(unread_only, limit, offset)
+        
+        client = supabase_db.get_user_client_async(token)
         
         query = client.table("notifications").select("*").eq("user_id", user_id)
         
@@ -32,7 +41,7 @@ async def get_notifications(
             query = query.eq("is_read", False)
         
         query = query.order("created_at", desc=True).range(offset, offset + limit - 1)
-        result = query.execute()
+        result = await query.execute()
         
         return result.data or []
         
@@ -84,9 +93,9 @@ async def get_unread_count(
     """Get count of unread notifications."""
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
-        result = client.table("notifications").select("id", count="exact").eq("user_id", user_id).eq("is_read", False).execute()
+        result = await client.table("notifications").select("id", count="exact").eq("user_id", user_id).eq("is_read", False).execute()
         
         return {"count": result.count or 0}
         
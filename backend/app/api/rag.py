@@ -2,20 +2,21 @@
 RAG API endpoints for indexing notes and answering questions.
 """
 from typing import List
+import asyncio
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload
 
 from app.database import get_db
 from app.models.note import Note
-from app.models.chapter import Chapter
-from app.models.notebook import Notebook
-from app.models.user import User
-from app.auth.dependencies import get_current_active_user
+from app.auth.access import AccessControl, get_access_control
 from app.schemas.rag import (
     RAGQueryRequest,
     RAGAnswerResponse,
     RAGSource,
+    RAGBatchQueryRequest,
+    RAGBatchAnswerLine,
 )
 from app.services.rag_service import RAGService
 
@@ -23,60 +24,29 @@ router = APIRouter(prefix="/rag", tags=["RAG"])
 
 
 # ✅ FIXED dependency
+# The RAG pipeline (pgvector SQL, embeddings, LLM) is blocking code: it keeps
+# the sync session and always runs in a worker thread.
 def get_rag_service(db: Session = Depends(get_db)) -> RAGService:
     return RAGService(db)
 
 
-def verify_note_access(note_id: int, user: User, db: Session) -> Note:
-    """
-    Ensure the note belongs to the current user via notebook ownership.
-    """
-    note = (
-        db.query(Note)
-        .filter(Note.id == note_id)
-        .first()
-    )
-
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-
-    chapter = db.query(Chapter).filter(
-        Chapter.id == note.chapter_id
-    ).first()
-
-    if not chapter:
-        raise HTTPException(status_code=404, detail="Chapter not found")
-
-    notebook = db.query(Notebook).filter(
-        Notebook.id == chapter.notebook_id
-    ).first()
-
-    if not notebook or notebook.owner_id != user.id:
-        raise HTTPException(
-            status_code=403,
-            detail="Not authorized to access this note",
-        )
-
-    return note
-
-
 @router.post(
     "/index/note/{note_id}",
     status_code=status.HTTP_201_CREATED,
 )
 async def index_note_for_rag(
     note_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    access: AccessControl = Depends(get_access_control),
     rag_service: RAGService = Depends(get_rag_service),
 ):
     """
     Index a specific note into the vector database for RAG.
     """
-    note = verify_note_access(note_id, current_user, db)
+    # Contents are read by the indexer in a worker thread: load them here
+    note = await access.note(note_id, selectinload(Note.contents))
 
     try:
-        chunks_indexed = rag_service.index_note(note)
+        chunks_indexed = await asyncio.to_thread(rag_service.index_note, note)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -95,8 +65,7 @@ async def index_note_for_rag(
 )
 async def rag_query(
     payload: RAGQueryRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    access: AccessControl = Depends(get_access_control),
     rag_service: RAGService = Depends(get_rag_service),
 ):
     """
@@ -110,14 +79,17 @@ async def rag_query(
         )
 
     if payload.note_id is not None:
-        verify_note_access(payload.note_id, current_user, db)
+        await access.note(payload.note_id)
 
     try:
-        answer, sources_raw = rag_service.answer_question(
+        answer, sources_raw, mode = await asyncio.to_thread(
+            rag_service.answer_question,
             question=payload.question,
             top_k=payload.top_k,
             threshold=payload.threshold,
             note_id=payload.note_id,
+            owner_id=access.user.id,
+            mode=payload.mode,
         )
     except Exception as e:
         raise HTTPException(
@@ -137,4 +109,47 @@ async def rag_query(
     return RAGAnswerResponse(
         answer=answer,
         sources=sources,
+        mode=mode,
     )
+
+
+@router.post("/query/batch")
+async def rag_query_batch(
+    payload: RAGBatchQueryRequest,
+    access: AccessControl = Depends(get_access_control),
+    rag_service: RAGService = Depends(get_rag_service),
+):
+    """
+    Answer many questions in one request.
+
+    Questions are embedded together and searched on one connection; answers
+    are streamed back as NDJSON (one RAGBatchAnswerLine per line) in
+    completion order, each carrying the index of its query.
+    """
+    if any(not q.question.strip() for q in payload.queries):
+        raise HTTPException(
+            status_code=400,
+            detail="Question cannot be empty",
+        )
+
+    await access.notes([q.note_id for q in payload.queries if q.note_id is not None])
+
+    queries = [q.model_dump() for q in payload.queries]
+
+    try:
+        retrievals = await asyncio.to_thread(
+            rag_service.retrieve_batch,
+            queries,
+            owner_id=access.user.id,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"RAG query failed: {str(e)}",
+        )
+
+    async def answer_lines():
+        async for item in rag_service.stream_batch_answers(queries, retrievals):
+            yield RAGBatchAnswerLine(**item).model_dump_json() + "\n"
+
+    return StreamingResponse(answer_lines(), media_type="application/x-ndjson")
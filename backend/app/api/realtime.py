@@ -0,0 +1,263 @@
+"""
+WebSocket gateway for chat messages.
+
+Clients open one socket instead of polling the message endpoints:
+
+    ws://<host>/api/realtime/ws?token=<access token>[&cursor=<last cursor>]
+
+On connect the socket follows every conversation and community the user is
+a member of. Each pushed event carries a `cursor`; after a disconnect the
+client reconnects with the last cursor it saw and first receives the
+messages it missed (from the database), then live ones. Delivery is
+at-least-once around a resume: clients dedupe by message id.
+
+Client commands (JSON):
+    {"type": "subscribe", "conversation_id": "..."}   also "community_id"
+    {"type": "unsubscribe", "conversation_id": "..."}
+    {"type": "ping"}
+
+Server events: "ready", "message", "subscribed", "unsubscribed", "pong",
+"error", and "resync" when more was missed than a resume replays (reload
+through the REST endpoints). "unsubscribed" is also sent unprompted when
+the user leaves or is removed from a conversation or community.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+import time
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+
+from app.config import settings
+from app.core.jwt_verifier import jwt_verifier, TokenVerificationError, TokenVerificationUnavailable
+from app.core.supabase_client import supabase_db
+from app.services.realtime_service import (
+    realtime_gateway,
+    Subscriber,
+    conversation_channel,
+    community_channel,
+    message_event,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/realtime", tags=["realtime"])
+
+# Close code for expired or invalid tokens (reconnect with a fresh token)
+WS_TOKEN_INVALID = 4401
+
+
+async def member_channels(client, user_id: str) -> List[str]:
+    """Channels of every conversation and community the user belongs to."""
+    conversations, communities = await asyncio.gather(
+        client.table("conversation_members").select("conversation_id").eq("user_id", user_id).execute(),
+        client.table("community_members").select("community_id").eq("user_id", user_id).execute(),
+    )
+    return (
+        [conversation_channel(row["conversation_id"]) for row in conversations.data or []]
+        + [community_channel(row["community_id"]) for row in communities.data or []]
+    )
+
+
+async def missed_events(client, channels: List[str], cursor: datetime) -> Optional[List[Dict[str, Any]]]:
+    """
+    Messages created at or after the cursor in the given channels, oldest
+    first, or None if there are more than a resume replays.
+    """
+    conversation_ids = [c.rsplit(":", 1)[1] for c in channels if c.startswith(conversation_channel(""))]
+    community_ids = [c.rsplit(":", 1)[1] for c in channels if c.startswith(community_channel(""))]
+    limit = settings.REALTIME_BACKFILL_LIMIT
+
+    queries = []
+    if conversation_ids:
+        queries.append((conversation_channel, "conversation_id", client.table("messages").select("*")
+            .in_("conversation_id", conversation_ids).gte("created_at", cursor.isoformat())
+            .order("created_at").limit(limit + 1).execute()))
+    if community_ids:
+        queries.append((community_channel, "community_id", client.table("community_messages").select("*")
+            .in_("community_id", community_ids).gte("created_at", cursor.isoformat())
+            .order("created_at").limit(limit + 1).execute()))
+
+    results = await asyncio.gather(*[query for _, _, query in queries])
+    events = []
+    for (channel_for, key, _), result in zip(queries, results):
+        rows = result.data or []
+        if len(rows) > limit:
+            return None
+        events.extend((row["created_at"], channel_for(row[key]), row) for row in rows)
+
+    events.sort(key=lambda event: event[0])
+    if len(events) > limit:
+        return None
+    return [{"channel": channel, "message": row} for _, channel, row in events]
+
+
+async def is_member(client, user_id: str, command: Dict[str, Any]) -> Optional[str]:
+    """Channel named by a subscribe command, if the user is a member of it."""
+    if command.get("conversation_id"):
+        table, key, channel = "conversation_members", "conversation_id", conversation_channel
+    elif command.get("community_id"):
+        table, key, channel = "community_members", "community_id", community_channel
+    else:
+        return None
+
+    result = await client.table(table).select("user_id").eq(key, str(command[key])).eq("user_id", user_id).execute()
+    return channel(command[key]) if result.data else None
+
+
+def command_channel(command: Dict[str, Any]) -> Optional[str]:
+    if command.get("conversation_id"):
+        return conversation_channel(command["conversation_id"])
+    if command.get("community_id"):
+        return community_channel(command["community_id"])
+    return None
+
+
+async def read_commands(websocket: WebSocket, subscriber: Subscriber, client, user_id: str):
+    """Handle client commands; replies go through the subscriber's queue."""
+    while True:
+        try:
+            command = json.loads(await websocket.receive_text())
+        except ValueError:
+            subscriber.deliver(json.dumps({"type": "error", "detail": "Invalid JSON"}))
+            continue
+
+        kind = command.get("type") if isinstance(command, dict) else None
+        if kind == "ping":
+            subscriber.deliver(json.dumps({"type": "pong"}))
+        elif kind == "subscribe":
+            channel = await is_member(client, user_id, command)
+            if channel is None:
+                subscriber.deliver(json.dumps({"type": "error", "detail": "Not a member"}))
+                continue
+            await realtime_gateway.subscribe(subscriber, [channel])
+            subscriber.deliver(json.dumps({"type": "subscribed", "channel": channel}))
+        elif kind == "unsubscribe":
+            channel = command_channel(command)
+            if channel is not None:
+                await realtime_gateway.unsubscribe(subscriber, [channel])
+                subscriber.deliver(json.dumps({"type": "unsubscribed", "channel": channel}))
+        else:
+            subscriber.deliver(json.dumps({"type": "error", "detail": f"Unknown command: {kind}"}))
+
+
+async def watch_membership(subscriber: Subscriber, client, user_id: str):
+    """
+    Periodically drop channels the user is no longer a member of (removals
+    made outside the API, which do not go through realtime_gateway.revoke).
+    """
+    while True:
+        await asyncio.sleep(settings.REALTIME_MEMBERSHIP_RECHECK_SECONDS)
+        try:
+            revoked = subscriber.channels - set(await member_channels(client, user_id))
+        except Exception as e:
+            logger.warning(f"Realtime membership re-check failed: {e}")
+            continue
+        if revoked:
+            await realtime_gateway.unsubscribe(subscriber, revoked)
+            for channel in revoked:
+                subscriber.deliver(json.dumps({"type": "unsubscribed", "channel": channel}))
+
+
+async def write_events(websocket: WebSocket, subscriber: Subscriber, skip_ids: Set[str], expires_at: float):
+    """
+    Forward queued events to the socket until the token expires or the
+    client falls too far behind.
+    """
+    while True:
+        try:
+            event = await asyncio.wait_for(subscriber.queue.get(), timeout=max(expires_at - time.time(), 0))
+        except asyncio.TimeoutError:
+            await websocket.close(code=WS_TOKEN_INVALID, reason="Token expired")
+            return
+
+        if subscriber.overflowed:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too far behind, resume from cursor")
+            return
+
+        if skip_ids:
+            # Live events that the resume already replayed
+            data = json.loads(event)
+            if data.get("type") == "message" and str(data["message"].get("id")) in skip_ids:
+                continue
+            if subscriber.queue.empty():
+                skip_ids.clear()
+
+        await websocket.send_text(event)
+
+
+@router.websocket("/ws")
+async def message_stream(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    cursor: Optional[datetime] = Query(None),
+):
+    """
+    Push new messages of the user's conversations and communities.
+
+    Args:
+        websocket: Client connection
+        token: Supabase access token (or an Authorization header)
+        cursor: Cursor of the last event received, to resume after it
+    """
+    authorization = websocket.headers.get("authorization", "")
+    token = token or authorization.replace("Bearer ", "")
+    try:
+        claims = (await jwt_verifier.verify_async(token)) if token else None
+    except TokenVerificationError:
+        claims = None
+    except TokenVerificationUnavailable:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Authentication unavailable")
+        return
+    if claims is None:
+        await websocket.close(code=WS_TOKEN_INVALID, reason="Invalid token")
+        return
+
+    user_id = claims["sub"]
+    expires_at = float(claims.get("exp") or time.time() + 3600)
+    client = supabase_db.get_user_client_async(token)
+
+    await websocket.accept()
+    subscriber = realtime_gateway.connect(user_id)
+    tasks = []
+    try:
+        # Subscribe before replaying, so nothing sent in between is lost
+        channels = await member_channels(client, user_id)
+        await realtime_gateway.subscribe(subscriber, channels)
+
+        skip_ids: Set[str] = set()
+        if cursor is not None:
+            missed = await missed_events(client, channels, cursor)
+            if missed is None:
+                await websocket.send_text(json.dumps({"type": "resync"}))
+            else:
+                for event in missed:
+                    await websocket.send_text(message_event(event["channel"], event["message"]))
+                    skip_ids.add(str(event["message"]["id"]))
+
+        await websocket.send_text(json.dumps({"type": "ready", "channels": len(channels)}))
+
+        tasks = [
+            asyncio.create_task(read_commands(websocket, subscriber, client, user_id)),
+            asyncio.create_task(write_events(websocket, subscriber, skip_ids, expires_at)),
+            asyncio.create_task(watch_membership(subscriber, client, user_id)),
+        ]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Realtime connection error: {e}")
+        try:
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        except Exception:
+            pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        await realtime_gateway.disconnect(subscriber)
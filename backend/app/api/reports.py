@@ -22,13 +22,13 @@ async def create_report(
     """Create a report for inappropriate content."""
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         data = report.model_dump()
         data["reported_by"] = user_id
         data["status"] = "pending"
         
-        result = client.table("reports").insert(data).execute()
+        result = await client.table("reports").insert(data).execute()
         
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to create report")
@@ -51,13 +51,13 @@ async def list_reports(
 ):
     """List all reports (admin only)."""
     try:
-        query = supabase_db.service_client.table("reports").select("*")
+        query = supabase_db.service_async.table("reports").select("*")
         
         if status:
             query = query.eq("status", status)
         
         query = query.order("created_at", desc=True).range(offset, offset + limit - 1)
-        result = query.execute()
+        result = await query.execute()
         
         return result.data or []
         
@@ -74,9 +74,9 @@ async def my_reports(
     """Get current user's reports."""
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
-        result = client.table("reports").select("*").eq("reported_by", user_id).order("created_at", desc=True).execute()
+        result = await client.table("reports").select("*").eq("reported_by", user_id).order("created_at", desc=True).execute()
         
         return result.data or []
         
@@ -94,12 +94,6 @@ async def update_report(
 ):
     """Update report status (admin only). Notifies reporter."""
     try:
-        # Get report to find reporter
-        report = supabase_db.service_client.table("reports").select("reported_by").eq("id", report_id).single().execute()
-        
-        if not report.data:
-            raise HTTPException(status_code=404, detail="Report not found")
-        
         data = report_update.model_dump(exclude_unset=True)
         data["resolved_by"] = admin["id"]
         
@@ -107,16 +101,17 @@ async def update_report(
             from datetime import datetime
             data["resolved_at"] = datetime.utcnow().isoformat()
         
-        result = supabase_db.service_client.table("reports").update(data).eq("id", report_id).execute()
+        # The updated row carries reported_by: no separate lookup needed
+        result = await supabase_db.service_async.table("reports").update(data).eq("id", report_id).execute()
         
         if not result.data:
-            raise HTTPException(status_code=400, detail="Failed to update report")
+            raise HTTPException(status_code=404, detail="Report not found")
         
         # Notify reporter
         background_tasks.add_task(
             notification_service.notify_report_resolved,
             report_id=report_id,
-            reporter_id=report.data["reported_by"],
+            reporter_id=result.data[0]["reported_by"],
             status=report_update.status
         )
         
@@ -3,12 +3,17 @@ Resources API endpoints.
 Handles CRUD operations for educational resources with AI integration.
 """
 from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from app.config import settings
+from app.database import get_async_db
 from app.models.schemas import ResourceCreate, ResourceUpdate, ResourceResponse
 from app.core.security import get_current_user_id, get_current_user, require_admin
-from app.core.supabase_client import supabase_db
+from app.core.supabase_client import supabase_db, verified_claims
+from app.repositories import ResourceRepository
 from app.services.ai_service import ai_service
 from app.services.notification_service import notification_service
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,14 +34,14 @@ async def create_resource(
     try:
         # Get authenticated client
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         # Create resource
         data = resource.model_dump()
         data["uploaded_by"] = user_id
         data["is_approved"] = False  # Requires admin approval
         
-        result = client.table("resources").insert(data).execute()
+        result = await client.table("resources").insert(data).execute()
         
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to create resource")
@@ -67,15 +72,22 @@ async def list_resources(
     approved_only: bool = True,
     limit: int = 50,
     offset: int = 0,
-    authorization: Optional[str] = Header(None)
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List resources with optional filtering.
     Users see approved resources + their own.
     """
+    token = authorization.replace("Bearer ", "") if authorization else ""
     try:
-        token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token) if token else supabase_db.anon_client
+        if settings.SUPABASE_DIRECT_READS:
+            repository = ResourceRepository(db, (await verified_claims(token)) if token else None)
+            return await repository.list_resources(
+                subject, resource_type, approved_only and not token, limit, offset
+            )
+        
+        client = supabase_db.user_or_anon_async(token)
         
         query = client.table("resources").select("*")
         
@@ -89,34 +101,45 @@ async def list_resources(
         
         query = query.order("created_at", desc=True).range(offset, offset + limit - 1)
         
-        result = query.execute()
+        result = await query.execute()
         return result.data or []
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing resources: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def increment_view_count(resource_id: str):
+    try:
+        await supabase_db.service_async.rpc(
+            "increment_view_count",
+            {"resource_id": resource_id}
+        ).execute()
+    except Exception as e:
+        logger.warning(f"Failed to count view of resource {resource_id}: {e}")
+
+
 @router.get("/{resource_id}", response_model=ResourceResponse)
 async def get_resource(
     resource_id: str,
+    background_tasks: BackgroundTasks,
     authorization: Optional[str] = Header(None)
 ):
     """Get a single resource by ID."""
     try:
         token = authorization.replace("Bearer ", "") if authorization else ""
-        client = supabase_db.get_user_client(token) if token else supabase_db.anon_client
+        client = supabase_db.user_or_anon_async(token)
         
-        result = client.table("resources").select("*").eq("id", resource_id).single().execute()
+        result = await client.table("resources").select("*").eq("id", resource_id).single().execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Resource not found")
         
-        # Increment view count (using service client to bypass RLS)
-        supabase_db.service_client.rpc(
-            "increment_view_count",
-            {"resource_id": resource_id}
-        ).execute()
+        # Count the view only once the caller could see the resource
+        # (service client bypasses RLS); after the response is sent
+        background_tasks.add_task(increment_view_count, resource_id)
         
         return result.data
         
@@ -137,16 +160,16 @@ async def update_resource(
     """Update a resource (owner or admin only)."""
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
         # Verify ownership
-        existing = client.table("resources").select("uploaded_by").eq("id", resource_id).single().execute()
+        existing = await client.table("resources").select("uploaded_by").eq("id", resource_id).single().execute()
         if not existing.data:
             raise HTTPException(status_code=404, detail="Resource not found")
         
         # Update resource
         data = resource_update.model_dump(exclude_unset=True)
-        result = client.table("resources").update(data).eq("id", resource_id).execute()
+        result = await client.table("resources").update(data).eq("id", resource_id).execute()
         
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to update resource")
@@ -171,10 +194,13 @@ async def approve_resource(
     Triggers AI summary generation and notifies uploader.
     """
     try:
-        # Approve resource
-        result = supabase_db.service_client.table("resources").update({
-            "is_approved": True
-        }).eq("id", resource_id).execute()
+        # Approve resource and check for an existing AI summary concurrently
+        result, summary_check = await asyncio.gather(
+            supabase_db.service_async.table("resources").update({
+                "is_approved": True
+            }).eq("id", resource_id).execute(),
+            supabase_db.service_async.table("ai_summaries").select("id").eq("resource_id", resource_id).execute(),
+        )
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Resource not found")
@@ -190,8 +216,6 @@ async def approve_resource(
         )
         
         # Generate AI summary if not already exists
-        summary_check = supabase_db.service_client.table("ai_summaries").select("id").eq("resource_id", resource_id).execute()
-        
         if not summary_check.data and resource_data.get("description"):
             background_tasks.add_task(
                 ai_service.generate_summary_async,
@@ -217,9 +241,9 @@ async def delete_resource(
     """Delete a resource (owner or admin only)."""
     try:
         token = authorization.replace("Bearer ", "")
-        client = supabase_db.get_user_client(token)
+        client = supabase_db.get_user_client_async(token)
         
-        result = client.table("resources").delete().eq("id", resource_id).execute()
+        result = await client.table("resources").delete().eq("id", resource_id).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Resource not found or unauthorized")
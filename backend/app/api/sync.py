@@ -0,0 +1,102 @@
+"""
+Delta sync API: what changed in the user's notebooks since a token.
+
+Clients keep the `token` of their last sync and ask for changes after it;
+a first sync (token 0) pages through everything. Tokens are values of the
+sync_change_seq sequence (see app.models.tombstone).
+
+Tokens are commit-safe: writers of one owner's rows hold a per-owner
+advisory lock until they commit, so their sequence values follow commit
+order, and all kinds are read from one REPEATABLE READ snapshot. A token
+therefore never passes a change that commits later with a lower value,
+whether it comes from a request or a background job (e.g. AI summaries).
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.models.user import User
+from app.models.notebook import Notebook
+from app.models.chapter import Chapter
+from app.models.note import Note
+from app.models.note_content import NoteContent
+from app.models.tombstone import Tombstone
+from app.schemas.sync import SyncChangesResponse
+from app.auth.dependencies import get_current_active_user
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+def changed_queries(owner_id: int, since: int):
+    """Per-kind queries for rows written after `since`, scoped to the owner."""
+    return {
+        "notebooks": select(Notebook)
+            .where(Notebook.owner_id == owner_id, Notebook.change_seq > since)
+            .order_by(Notebook.change_seq),
+        "chapters": select(Chapter)
+            .join(Notebook, Chapter.notebook_id == Notebook.id)
+            .where(Notebook.owner_id == owner_id, Chapter.change_seq > since)
+            .order_by(Chapter.change_seq),
+        "notes": select(Note)
+            .join(Chapter, Note.chapter_id == Chapter.id)
+            .join(Notebook, Chapter.notebook_id == Notebook.id)
+            .where(Notebook.owner_id == owner_id, Note.change_seq > since)
+            .order_by(Note.change_seq),
+        "contents": select(NoteContent)
+            .join(Note, NoteContent.note_id == Note.id)
+            .join(Chapter, Note.chapter_id == Chapter.id)
+            .join(Notebook, Chapter.notebook_id == Notebook.id)
+            .where(Notebook.owner_id == owner_id, NoteContent.change_seq > since)
+            .order_by(NoteContent.change_seq),
+        "deleted": select(Tombstone)
+            .where(Tombstone.owner_id == owner_id, Tombstone.change_seq > since)
+            .order_by(Tombstone.change_seq),
+    }
+
+
+@router.get("/changes", response_model=SyncChangesResponse)
+async def get_changes(
+    since: int = Query(0, ge=0, description="Token from the previous sync (0 for a full sync)"),
+    limit: int = Query(500, ge=1, le=2000, description="Maximum changes per kind"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get notebooks, chapters, notes and contents written after `since`, and
+    tombstones of those deleted after it.
+
+    When any kind has more than `limit` changes, every kind is cut at the
+    same sequence value, so the returned token never skips a change.
+
+    Args:
+        since: Sync token
+        limit: Maximum changes per kind
+        current_user: Current authenticated user
+        db: Database session
+
+    Returns:
+        Changes and the token to sync from next
+    """
+    owner_id = current_user.id
+    # End the transaction the auth lookup began, then read every kind from
+    # one snapshot
+    await db.commit()
+    await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    changes = {}
+    for kind, query in changed_queries(owner_id, since).items():
+        result = await db.execute(query.limit(limit + 1))
+        changes[kind] = list(result.scalars().all())
+
+    truncated = [rows for rows in changes.values() if len(rows) > limit]
+    if truncated:
+        token = min(rows[limit - 1].change_seq for rows in truncated)
+        changes = {
+            kind: [row for row in rows if row.change_seq <= token]
+            for kind, rows in changes.items()
+        }
+    else:
+        token = max((rows[-1].change_seq for rows in changes.values() if rows), default=since)
+
+    return {"token": token, "has_more": bool(truncated), **changes}
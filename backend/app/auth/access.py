@@ -0,0 +1,160 @@
+"""
+Ownership checks for notebooks, chapters, notes and note contents.
+
+Every check is a single query that joins up to the owning notebook and
+returns the entity already loaded, so handlers do at most one round trip to
+authorize a request. Results are cached for the rest of the request:
+`AccessControl` is a request-scoped dependency.
+"""
+from typing import Any, Dict, Iterable, List, Tuple, Type
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.models.user import User
+from app.models.notebook import Notebook
+from app.models.chapter import Chapter
+from app.models.note import Note
+from app.models.note_content import NoteContent
+from app.auth.dependencies import get_current_active_user
+
+
+class AccessControl:
+    """
+    Resolves entities the current user owns.
+
+    Raises 404 when the entity does not exist and 403 when it belongs to
+    someone else (notebooks, looked up by owner, are always 404).
+    """
+
+    def __init__(self, db: AsyncSession, user: User):
+        self.db = db
+        self.user = user
+        self._cache: Dict[Tuple[Type, int], Any] = {}
+
+    async def notebook(self, notebook_id: int, *options) -> Notebook:
+        """Get a notebook owned by the user, with optional loader options."""
+        cached = self._cached(Notebook, notebook_id, options)
+        if cached is not None:
+            return cached
+
+        query = select(Notebook).where(
+            Notebook.id == notebook_id,
+            Notebook.owner_id == self.user.id
+        ).options(*options)
+        notebook = (await self.db.execute(query)).scalars().first()
+
+        if not notebook:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Notebook not found"
+            )
+
+        self._cache[(Notebook, notebook_id)] = notebook
+        return notebook
+
+    async def chapter(self, chapter_id: int, *options) -> Chapter:
+        """Get a chapter in one of the user's notebooks, with optional loader options."""
+        cached = self._cached(Chapter, chapter_id, options)
+        if cached is not None:
+            return cached
+
+        query = (
+            select(Chapter, Notebook.owner_id)
+            .join(Notebook, Chapter.notebook_id == Notebook.id)
+            .where(Chapter.id == chapter_id)
+            .options(*options)
+        )
+        row = (await self.db.execute(query)).first()
+
+        chapter = self._check(row, "Chapter", "chapter")
+        self._cache[(Chapter, chapter_id)] = chapter
+        return chapter
+
+    async def note(self, note_id: int, *options) -> Note:
+        """Get a note in one of the user's notebooks, with optional loader options."""
+        cached = self._cached(Note, note_id, options)
+        if cached is not None:
+            return cached
+
+        query = (
+            select(Note, Notebook.owner_id)
+            .join(Chapter, Note.chapter_id == Chapter.id)
+            .join(Notebook, Chapter.notebook_id == Notebook.id)
+            .where(Note.id == note_id)
+            .options(*options)
+        )
+        row = (await self.db.execute(query)).first()
+
+        note = self._check(row, "Note", "note")
+        self._cache[(Note, note_id)] = note
+        return note
+
+    async def notes(self, note_ids: Iterable[int]) -> List[Note]:
+        """Check several notes at once (one query); fails on the first missing or foreign note."""
+        wanted = sorted(set(note_ids) - {key[1] for key in self._cache if key[0] is Note})
+        if wanted:
+            query = (
+                select(Note, Notebook.owner_id)
+                .join(Chapter, Note.chapter_id == Chapter.id)
+                .join(Notebook, Chapter.notebook_id == Notebook.id)
+                .where(Note.id.in_(wanted))
+            )
+            rows = {row[0].id: row for row in (await self.db.execute(query)).all()}
+            for note_id in wanted:
+                self._cache[(Note, note_id)] = self._check(rows.get(note_id), "Note", "note")
+
+        return [self._cache[(Note, note_id)] for note_id in note_ids]
+
+    async def content(self, content_id: int) -> NoteContent:
+        """Get a note content block in one of the user's notebooks."""
+        cached = self._cached(NoteContent, content_id, ())
+        if cached is not None:
+            return cached
+
+        query = (
+            select(NoteContent, Notebook.owner_id)
+            .join(Note, NoteContent.note_id == Note.id)
+            .join(Chapter, Note.chapter_id == Chapter.id)
+            .join(Notebook, Chapter.notebook_id == Notebook.id)
+            .where(NoteContent.id == content_id)
+        )
+        row = (await self.db.execute(query)).first()
+
+        content = self._check(row, "Content", "content")
+        self._cache[(NoteContent, content_id)] = content
+        return content
+
+    def _cached(self, model: Type, entity_id: int, options: tuple):
+        # Loader options may need data the cached object lacks: query again
+        if options:
+            return None
+        return self._cache.get((model, entity_id))
+
+    def _check(self, row, label: str, noun: str):
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{label} not found"
+            )
+        entity, owner_id = row
+        if owner_id != self.user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Not authorized to access this {noun}"
+            )
+        return entity
+
+
+async def get_access_control(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> AccessControl:
+    """
+    Dependency providing the request's AccessControl.
+
+    Shares the handler's session (FastAPI resolves get_async_db once per request).
+    """
+    return AccessControl(db, current_user)
@@ -1,21 +1,60 @@
 """
 FastAPI dependencies for authentication and authorization.
+
+Verified principals are cached per token (subject + iat/jti) for a short
+TTL, so most requests only pay for the JWT signature check. Entries are
+dropped when the user row is updated or deleted in this process; other
+workers see the change once their entry expires.
 """
+from typing import Optional
+import time
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db
 from app.models.user import User
 from app.auth.security import decode_access_token
 from app.schemas.user import TokenData
+from app.utils.ttl_cache import TTLCache
 
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# (sub, jti or iat) -> detached User
+principal_cache = TTLCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def principal_key(payload: dict) -> Optional[tuple]:
+    """Cache key of a decoded token; None for tokens issued without iat/jti."""
+    token_id = payload.get("jti") or payload.get("iat")
+    if token_id is None:
+        return None
+    return (payload["sub"], token_id)
+
+
+def invalidate_principal(email: str) -> None:
+    """Drop cached principals of a user (every token they hold)."""
+    principal_cache.delete_where(lambda key: key[0] == email)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    # Also drop entries under the old email if it just changed
+    emails = {target.email, *inspect(target).attrs.email.history.deleted}
+    for email in emails:
+        invalidate_principal(email)
+
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Dependency to get the current authenticated user from JWT token.
@@ -44,11 +83,23 @@ async def get_current_user(
     if email is None:
         raise credentials_exception
     
-    token_data = TokenData(email=email)
-    user = db.query(User).filter(User.email == token_data.email).first()
+    key = principal_key(payload)
+    user = principal_cache.get(key) if key else None
     
     if user is None:
-        raise credentials_exception
+        token_data = TokenData(email=email)
+        result = await db.execute(select(User).where(User.email == token_data.email))
+        user = result.scalars().first()
+        
+        if user is None:
+            raise credentials_exception
+        
+        if key:
+            # Detach: the cached object outlives this request's session
+            db.expunge(user)
+            ttl = min(principal_cache.ttl, payload.get("exp", 0) - time.time())
+            if ttl > 0:
+                principal_cache.set(key, user, ttl=ttl)
     
     if not user.is_active:
         raise HTTPException(
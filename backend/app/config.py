@@ -3,7 +3,7 @@ Configuration management for SmartNoteX backend.
 Uses Pydantic Settings for type-safe environment variable handling.
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -11,17 +11,37 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DATABASE_PREPARED_STATEMENTS: bool = True  # Disable behind a transaction-mode pooler (Supabase port 6543)
+    DATABASE_PREPARE_THRESHOLD: int = 5  # Executions on a connection before psycopg prepares a statement
     
     # JWT Authentication
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0  # How long a verified token skips the user lookup
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
     
     # Supabase Storage
     SUPABASE_URL: str
     SUPABASE_KEY: str  # Anon/public key
     SUPABASE_SERVICE_KEY: str  # Service role key (for admin operations)
     SUPABASE_STORAGE_BUCKET: str = "smartnotex-files"
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = 50  # Shared PostgREST connection pool
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = 20
+    SUPABASE_DIRECT_READS: bool = False  # Serve hot table reads from Postgres instead of PostgREST (app/repositories)
+    
+    # Supabase access token verification (local; see app/core/jwt_verifier.py)
+    SUPABASE_JWT_SECRET: Optional[str] = None  # Project JWT secret, for HS256 tokens
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    SUPABASE_JWKS_TTL_SECONDS: float = 600.0  # Refetch signing keys after this long
+    AUTH_NEGATIVE_CACHE_SECONDS: float = 30.0  # Remember rejected tokens this long
+    PROFILE_CACHE_TTL_SECONDS: float = 300.0  # Cached role/name (Redis tier)
+    PROFILE_CACHE_LOCAL_TTL_SECONDS: float = 30.0  # Per-process tier
+    
+    # Real-time message delivery (WebSocket gateway, fanned out through Redis pub/sub)
+    REALTIME_QUEUE_SIZE: int = 256  # Undelivered events per connection before it is dropped (client resumes)
+    REALTIME_BACKFILL_LIMIT: int = 500  # Missed messages replayed on resume; beyond this the client resyncs
+    REALTIME_MEMBERSHIP_RECHECK_SECONDS: float = 60.0  # How often open sockets drop channels the user has left
     
     # Vector Database (pgvector - enabled in Supabase PostgreSQL)
     # No additional config needed, uses DATABASE_URL
@@ -30,6 +50,33 @@ class Settings(BaseSettings):
     HUGGINGFACE_API_KEY: str = ""  # Optional: for Inference API, leave empty for local models
     HUGGINGFACE_EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"  # 384 dimensions
     
+    # LLM generation
+    LLM_BACKEND: str = "huggingface"  # huggingface | local | stub
+    HUGGINGFACE_LLM_MODEL: str = "mistralai/Mistral-7B-Instruct-v0.3"  # Used by the huggingface backend
+    LLM_LOCAL_MODEL: str = "Qwen/Qwen2.5-0.5B-Instruct"  # Small CPU model for the local backend
+    LLM_STUB_LATENCY_MS: int = 0  # Simulated inference time for the stub backend
+    LLM_RATE_LIMIT_PER_SECOND: float = 5.0  # Sustained LLM calls per second (per process)
+    LLM_RATE_LIMIT_BURST: int = 10
+    LLM_RATE_LIMIT_MAX_WAIT_SECONDS: float = 5.0  # Give up instead of queueing longer than this
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures/slow calls that open the circuit
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 30.0
+    LLM_BREAKER_RESET_SECONDS: float = 30.0  # Time the circuit stays open before a probe call
+    LLM_MAX_RETRIES: int = 2  # Retries for transient errors (timeouts, 429, 5xx)
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    
+    # RAG retrieval
+    RAG_HIERARCHICAL_RETRIEVAL: bool = True  # Pick notes by centroid first, then search their chunks
+    RAG_CENTROID_TOP_N: int = 20  # Notes kept after the centroid stage
+    RAG_BATCH_LLM_CONCURRENCY: int = 4  # Parallel LLM generations per batch request
+    RAG_LLM_TIMEOUT_SECONDS: float = 20.0  # Past this, answer extractively instead of waiting
+    
+    # AI summaries
+    AI_SUMMARY_CHUNK_CHARS: int = 6000  # Content longer than this is summarized chunk by chunk
+    AI_SUMMARY_MAX_CONCURRENCY: int = 4  # Parallel chunk summaries per resource
+    AI_NOTE_SUMMARY_CONTEXT_CHARS: int = 4000  # Salient note passages sent to the LLM
+    AI_NOTE_SUMMARIES_PER_MINUTE: float = 6.0  # Per-user budget for note/chapter/notebook summaries
+    AI_NOTE_SUMMARY_MAX_WAIT_SECONDS: float = 30.0  # Longest a summary job waits for budget before dropping a call
+    
     # Redis (Upstash)
     # Get your Upstash Redis URL from: https://console.upstash.com/
     # Format: redis://default:[YOUR-PASSWORD]@[YOUR-ENDPOINT]:[PORT]
@@ -0,0 +1,230 @@
+"""
+Local verification of Supabase access tokens.
+
+Supabase signs access tokens either with the project's JWT secret (HS256)
+or with asymmetric signing keys published as a JWKS. Both can be checked
+without calling Supabase Auth:
+
+- HS256 tokens are verified with SUPABASE_JWT_SECRET.
+- RS256/ES256 tokens are verified with the key whose `kid` matches, from
+  the project's JWKS. The key set is cached and refetched when it gets
+  old or a token names an unknown key (key rotation).
+
+Tokens that are definitively rejected (bad signature, expired, wrong
+audience or issuer) are remembered for a short while so a client retrying
+a bad token does not redo the work. When Supabase Auth or the JWKS cannot
+be reached, TokenVerificationUnavailable is raised instead and nothing is
+cached, so valid users are not locked out by a blip. Local verification cannot see
+sessions revoked before expiry; endpoints that must honour revocation use
+`verify_remote`.
+
+Async code uses `verify_async` / `verify_remote_async`: JWKS fetches and
+Supabase Auth calls are blocking, so they run in a worker thread instead of
+stalling the event loop; tokens checkable with keys already in memory are
+verified inline.
+"""
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+
+import httpx
+from jose import JWTError, jwt
+
+from app.config import settings
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+
+# Refetch an unknown kid at most this often (bad tokens could otherwise
+# trigger a JWKS download each)
+JWKS_MIN_REFRESH_SECONDS = 30.0
+
+
+class TokenVerificationError(Exception):
+    """Raised when a token is malformed, expired or not signed by the project."""
+
+
+class TokenVerificationUnavailable(Exception):
+    """Raised when a token cannot be checked right now (Supabase Auth or JWKS unreachable)."""
+
+
+class SupabaseJWTVerifier:
+    """Verifies Supabase access tokens with the project secret or JWKS."""
+
+    def __init__(self):
+        self.secret = settings.SUPABASE_JWT_SECRET
+        self.issuer = f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1"
+        self.jwks_url = f"{self.issuer}/.well-known/jwks.json"
+
+        self._keys: Dict[str, dict] = {}
+        self._keys_fetched_at = 0.0
+        self._keys_fetch_failed = False
+        self._keys_lock = threading.Lock()
+
+        self.negative_cache = TTLCache(maxsize=10000, ttl=settings.AUTH_NEGATIVE_CACHE_SECONDS)
+        self.remote_fallbacks = 0
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Verify a token locally and return its claims.
+
+        Falls back to Supabase Auth for HS256 tokens when no JWT secret is
+        configured.
+
+        Raises:
+            TokenVerificationError: If the token is invalid
+            TokenVerificationUnavailable: If the keys or Supabase Auth
+                could not be reached (not cached; retry later)
+        """
+        token_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        cached_error = self.negative_cache.get(token_key)
+        if cached_error is not None:
+            raise TokenVerificationError(cached_error)
+
+        try:
+            return self._verify(token)
+        except TokenVerificationError as e:
+            self.negative_cache.set(token_key, str(e))
+            raise
+
+    async def verify_async(self, token: str) -> Dict[str, Any]:
+        """Like verify, without blocking the event loop on network calls."""
+        if self._needs_network(token):
+            return await asyncio.to_thread(self.verify, token)
+        return self.verify(token)
+
+    async def verify_remote_async(self, token: str) -> Dict[str, Any]:
+        """Like verify_remote, run in a worker thread."""
+        return await asyncio.to_thread(self.verify_remote, token)
+
+    def verify_remote(self, token: str) -> Dict[str, Any]:
+        """
+        Check the token with Supabase Auth (sees revoked sessions and
+        deleted users).
+
+        Returns:
+            Claims-like dict with `sub` and `email`
+
+        Raises:
+            TokenVerificationError: If Supabase rejects the token
+            TokenVerificationUnavailable: If Supabase Auth could not be reached
+        """
+        from app.core.supabase_client import supabase_db
+
+        try:
+            user = supabase_db.anon_client.auth.get_user(token)
+        except Exception as e:
+            # Auth API answers 4xx for tokens it rejects; anything else
+            # (network errors, 5xx, retryable errors) says nothing about the token
+            status = getattr(e, "status", None)
+            if isinstance(status, int) and 400 <= status < 500:
+                raise TokenVerificationError(f"Token validation failed: {str(e)}")
+            raise TokenVerificationUnavailable(f"Supabase Auth unavailable: {str(e)}")
+        if not user or not user.user:
+            raise TokenVerificationError("Invalid token")
+        return {"sub": user.user.id, "email": user.user.email}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jwks_keys": len(self._keys),
+            "remote_fallbacks": self.remote_fallbacks,
+            "negative_cache": self.negative_cache.stats(),
+        }
+
+    def _needs_network(self, token: str) -> bool:
+        """Whether verifying the token may fetch the JWKS or call Supabase Auth."""
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            return False
+
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            return not self.secret
+        if algorithm in ASYMMETRIC_ALGORITHMS:
+            stale = time.monotonic() - self._keys_fetched_at > settings.SUPABASE_JWKS_TTL_SECONDS
+            return stale or header.get("kid") not in self._keys
+        return False
+
+    def _verify(self, token: str) -> Dict[str, Any]:
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            raise TokenVerificationError(f"Malformed token: {str(e)}")
+
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            if not self.secret:
+                # No secret configured: keep the old behaviour for this token
+                self.remote_fallbacks += 1
+                return self.verify_remote(token)
+            key = self.secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            key = self._signing_key(header.get("kid"))
+        else:
+            raise TokenVerificationError(f"Unsupported token algorithm: {algorithm}")
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=settings.SUPABASE_JWT_AUDIENCE,
+                issuer=self.issuer,
+            )
+        except JWTError as e:
+            raise TokenVerificationError(f"Token validation failed: {str(e)}")
+
+        if not claims.get("sub"):
+            raise TokenVerificationError("Token has no subject")
+        return claims
+
+    def _signing_key(self, kid: Optional[str]) -> dict:
+        if not kid:
+            raise TokenVerificationError("Token has no key id")
+
+        now = time.monotonic()
+        key = self._keys.get(kid)
+        stale = now - self._keys_fetched_at > settings.SUPABASE_JWKS_TTL_SECONDS
+        if key is not None and not stale:
+            return key
+
+        with self._keys_lock:
+            # Unknown kid: refresh unless we just did (rotation vs. garbage)
+            if kid in self._keys and not stale:
+                return self._keys[kid]
+            if stale or now - self._keys_fetched_at > JWKS_MIN_REFRESH_SECONDS:
+                self._refresh_keys()
+
+        key = self._keys.get(kid)
+        if key is None:
+            if self._keys_fetch_failed:
+                raise TokenVerificationUnavailable("Signing keys could not be fetched")
+            raise TokenVerificationError("Token signed with an unknown key")
+        return key
+
+    def _refresh_keys(self) -> None:
+        try:
+            response = httpx.get(self.jwks_url, timeout=5.0)
+            response.raise_for_status()
+            keys = response.json().get("keys", [])
+        except Exception as e:
+            # Keep serving the keys we have; retry after the minimum interval
+            logger.warning(f"Failed to fetch JWKS from {self.jwks_url}: {e}")
+            self._keys_fetch_failed = True
+            self._keys_fetched_at = time.monotonic() - settings.SUPABASE_JWKS_TTL_SECONDS + JWKS_MIN_REFRESH_SECONDS
+            return
+
+        self._keys = {key["kid"]: key for key in keys if key.get("kid")}
+        self._keys_fetched_at = time.monotonic()
+        self._keys_fetch_failed = False
+        logger.info(f"Loaded {len(self._keys)} Supabase signing keys")
+
+
+# Global instance
+jwt_verifier = SupabaseJWTVerifier()
@@ -0,0 +1,104 @@
+"""
+Shared Redis connection (Upstash) for caches and coordination.
+
+Redis is an optimization here: callers must keep working when it is
+unreachable, so `get_redis()` returns None instead of raising.
+"""
+from typing import Optional
+import logging
+import threading
+import time
+
+from app.config import settings
+
+try:
+    import redis
+    import redis.asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# After a failed connection, wait this long before trying again (seconds)
+RECONNECT_INTERVAL = 60.0
+
+_client = None
+_retry_at = 0.0
+_lock = threading.Lock()
+
+_async_client = None
+_async_retry_at = 0.0
+
+
+def get_redis() -> Optional["redis.Redis"]:
+    """
+    Get the shared Redis client, or None if Redis is not reachable.
+    """
+    global _client, _retry_at
+    
+    if _client is not None or not REDIS_AVAILABLE or not settings.REDIS_URL:
+        return _client
+    if time.monotonic() < _retry_at:
+        return None
+    
+    with _lock:
+        if _client is None and time.monotonic() >= _retry_at:
+            try:
+                client = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_timeout=2,
+                    socket_connect_timeout=2,
+                    health_check_interval=30,
+                )
+                client.ping()
+                _client = client
+            except Exception as e:
+                logger.warning(f"Redis unavailable ({e}), using in-process caches only")
+                _retry_at = time.monotonic() + RECONNECT_INTERVAL
+    
+    return _client
+
+
+async def get_async_redis() -> Optional["redis.asyncio.Redis"]:
+    """
+    Get the shared asyncio Redis client (for async code), or None
+    if Redis is not reachable. Must be used from the application's event loop.
+    """
+    global _async_client, _async_retry_at
+    
+    if _async_client is not None or not REDIS_AVAILABLE or not settings.REDIS_URL:
+        return _async_client
+    if time.monotonic() < _async_retry_at:
+        return None
+    
+    client = redis.asyncio.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_timeout=2,
+        socket_connect_timeout=2,
+        health_check_interval=30,
+    )
+    try:
+        await client.ping()
+    except Exception as e:
+        logger.warning(f"Redis unavailable ({e}), real-time delivery limited to this process")
+        _async_retry_at = time.monotonic() + RECONNECT_INTERVAL
+        await client.aclose()
+        return None
+    
+    if _async_client is None:
+        _async_client = client
+    else:
+        await client.aclose()
+    return _async_client
+
+
+async def close_async_redis():
+    """Close the asyncio Redis client (call on shutdown)."""
+    global _async_client
+    
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
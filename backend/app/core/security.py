@@ -1,9 +1,13 @@
 """
 Security utilities for JWT handling and role-based access control.
+
+Tokens are verified locally by default. Revocation-sensitive endpoints
+(admin actions) use the *_strict dependencies, which also ask Supabase Auth.
 """
 from fastapi import HTTPException, Depends, Header
 from typing import Optional
-from app.core.supabase_client import supabase_db, extract_user_id_from_jwt
+from app.core.supabase_client import supabase_db, extract_user_id_from_jwt, extract_user_id_from_jwt_remote
+from app.services.profile_cache import profile_cache, PROFILE_COLUMNS
 
 
 async def get_current_user_id(authorization: Optional[str] = Header(None)) -> str:
@@ -11,26 +15,75 @@ async def get_current_user_id(authorization: Optional[str] = Header(None)) -> st
     Dependency to extract current user ID from JWT.
     Use this in FastAPI route dependencies.
     """
-    return extract_user_id_from_jwt(authorization)
+    return await extract_user_id_from_jwt(authorization)
 
 
-async def get_current_user(user_id: str = Depends(get_current_user_id)) -> dict:
+async def get_current_user_id_strict(authorization: Optional[str] = Header(None)) -> str:
+    """
+    Like get_current_user_id, but also checks the session with Supabase Auth
+    so revoked sessions are rejected before the token expires.
+    """
+    return await extract_user_id_from_jwt_remote(authorization)
+
+
+async def load_user_profile(user_id: str) -> Optional[dict]:
+    """
+    Load the cached profile columns of a user from the database.
+    """
+    response = await (
+        supabase_db.service_async.table("users")
+        .select(PROFILE_COLUMNS)
+        .eq("id", user_id)
+        .limit(1)
+        .execute()
+    )
+    return response.data[0] if response.data else None
+
+
+async def fetch_user_profile(user_id: str, cached: bool = True) -> dict:
     """
-    Get full user profile from database.
+    Get a user's profile (id, role, full_name, avatar_url).
+    
+    Args:
+        user_id: User ID
+        cached: Serve from the profile cache; with False the profile is read
+            from the database (and the cache refreshed with it)
     """
     try:
-        response = supabase_db.service_client.table("users").select("*").eq("id", user_id).single().execute()
-        if not response.data:
-            raise HTTPException(status_code=404, detail="User not found")
-        return response.data
+        if cached:
+            profile = await profile_cache.get_async(user_id, load_user_profile)
+        else:
+            profile = await load_user_profile(user_id)
+            if profile is not None:
+                await profile_cache.set_async(user_id, profile)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch user: {str(e)}")
+    
+    if not profile:
+        raise HTTPException(status_code=404, detail="User not found")
+    return profile
+
+
+async def get_current_user(user_id: str = Depends(get_current_user_id)) -> dict:
+    """
+    Get the current user's profile (id, role, full_name, avatar_url).
+    """
+    return await fetch_user_profile(user_id)
+
+
+async def get_current_user_strict(user_id: str = Depends(get_current_user_id_strict)) -> dict:
+    """
+    Get the current user's profile, with the token checked remotely and the
+    profile read uncached (so a revoked role takes effect immediately).
+    """
+    return await fetch_user_profile(user_id, cached=False)
 
 
-async def require_admin(user: dict = Depends(get_current_user)) -> dict:
+async def require_admin(user: dict = Depends(get_current_user_strict)) -> dict:
     """
     Dependency to ensure current user is admin.
     Raises 403 if user is not admin.
+    Admin sessions are checked with Supabase Auth (revocation-sensitive).
     """
     if user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
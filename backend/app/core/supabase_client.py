@@ -1,11 +1,139 @@
 """
 Supabase client configuration for direct database operations.
 Uses both anon key (with JWT) and service role key (for system operations).
+
+Per-user clients share one pooled HTTP client: the user's JWT is attached
+as a header on each request, so no client, HTTP session or TLS connection
+is created per request.
+
+Async handlers use the *_async clients (same query builder API, awaited
+execute()), so PostgREST round trips do not block the event loop and
+independent calls can run concurrently.
 """
 from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 from app.config import settings
-from typing import Optional
+from typing import Any, Dict, Optional
 from fastapi import HTTPException, Header
+from app.core.jwt_verifier import jwt_verifier, TokenVerificationError, TokenVerificationUnavailable
+import httpx
+import threading
+
+
+POSTGREST_URL = f"{settings.SUPABASE_URL.rstrip('/')}/rest/v1"
+
+
+def _pool_options() -> Dict[str, Any]:
+    return {
+        "base_url": POSTGREST_URL,
+        "limits": httpx.Limits(
+            max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=30.0,
+        ),
+        "timeout": httpx.Timeout(30.0, connect=5.0),
+    }
+
+
+class _PoolStats:
+    """
+    Request, TCP connection and TLS handshake counters (fed by httpcore
+    trace events) so connection reuse is observable.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+    
+    def _count_request(self):
+        with self._lock:
+            self.requests += 1
+    
+    def _count_event(self, event_name: str):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "reuse_rate": 1 - self.connections_opened / self.requests if self.requests else 0.0,
+        }
+
+
+class PostgrestHTTPPool(_PoolStats):
+    """Shared, keep-alive HTTP client for PostgREST requests."""
+    
+    def __init__(self):
+        super().__init__()
+        self.client = httpx.Client(**_pool_options(), event_hooks={"request": [self._on_request]})
+    
+    def _on_request(self, request: httpx.Request):
+        self._count_request()
+        request.extensions["trace"] = self._trace
+    
+    def _trace(self, event_name: str, info: dict):
+        self._count_event(event_name)
+
+
+class AsyncPostgrestHTTPPool(_PoolStats):
+    """Shared, keep-alive async HTTP client for PostgREST requests."""
+    
+    def __init__(self):
+        super().__init__()
+        self.client = httpx.AsyncClient(**_pool_options(), event_hooks={"request": [self._on_request]})
+    
+    async def _on_request(self, request: httpx.Request):
+        self._count_request()
+        request.extensions["trace"] = self._trace
+    
+    async def _trace(self, event_name: str, info: dict):
+        self._count_event(event_name)
+
+
+class PooledPostgrestClient(SyncPostgrestClient):
+    """
+    PostgREST client whose requests go through the shared pool. Its headers
+    (apikey, user JWT, schema) are sent with every request, so the pooled
+    httpx client itself carries no credentials.
+    """
+    
+    def __init__(self, pool: PostgrestHTTPPool, headers: Dict[str, str]):
+        super().__init__(
+            base_url=POSTGREST_URL,
+            headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, **headers},
+            http_client=pool.client,
+        )
+    
+    def aclose(self) -> None:
+        # The pool outlives every per-user client
+        pass
+
+
+class PooledAsyncPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client whose requests go through the shared async pool."""
+    
+    def __init__(self, pool: AsyncPostgrestHTTPPool, headers: Dict[str, str]):
+        super().__init__(
+            base_url=POSTGREST_URL,
+            headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, **headers},
+            http_client=pool.client,
+        )
+    
+    async def aclose(self) -> None:
+        pass
+
+
+def _key_headers(key: str, token: Optional[str] = None) -> Dict[str, str]:
+    return {"apikey": key, "Authorization": f"Bearer {token or key}"}
 
 
 class SupabaseClient:
@@ -24,15 +152,36 @@ class SupabaseClient:
             settings.SUPABASE_URL,
             settings.SUPABASE_SERVICE_KEY  # Service role key with RLS bypass
         )
+        
+        # Shared connection pool for per-user PostgREST clients
+        self.http_pool = PostgrestHTTPPool()
+        
+        # Async PostgREST clients for async handlers (one shared pool)
+        self.async_pool = AsyncPostgrestHTTPPool()
+        self.anon_async = PooledAsyncPostgrestClient(self.async_pool, _key_headers(settings.SUPABASE_KEY))
+        self.service_async = PooledAsyncPostgrestClient(self.async_pool, _key_headers(settings.SUPABASE_SERVICE_KEY))
     
-    def get_user_client(self, token: str) -> Client:
+    def get_user_client(self, token: str) -> PooledPostgrestClient:
         """
-        Get a Supabase client authenticated with user's JWT.
+        Get a PostgREST client authenticated with user's JWT.
         This respects RLS policies.
+        Supports .table() and .rpc(); cheap to create (no network setup).
         """
-        client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-        client.auth.set_session(token, token)  # Set JWT token
-        return client
+        return PooledPostgrestClient(self.http_pool, _key_headers(settings.SUPABASE_KEY, token))
+    
+    def get_user_client_async(self, token: str) -> PooledAsyncPostgrestClient:
+        """
+        Async version of get_user_client: await .execute() on its queries.
+        """
+        return PooledAsyncPostgrestClient(self.async_pool, _key_headers(settings.SUPABASE_KEY, token))
+    
+    def user_or_anon_async(self, token: Optional[str]) -> PooledAsyncPostgrestClient:
+        """Async client for the user if a token is given, else the anon client."""
+        return self.get_user_client_async(token) if token else self.anon_async
+    
+    async def aclose(self):
+        """Close the async pool (call on shutdown)."""
+        await self.async_pool.client.aclose()
     
     def get_service_client(self) -> Client:
         """
@@ -49,21 +198,44 @@ class SupabaseClient:
 supabase_db = SupabaseClient()
 
 
-def extract_user_id_from_jwt(authorization: Optional[str] = Header(None)) -> str:
+def bearer_token(authorization: Optional[str]) -> str:
+    """Token from an Authorization header; 401 if missing."""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
+    return authorization.replace("Bearer ", "")
+
+
+async def verified_claims(token: str) -> Dict[str, Any]:
+    """Claims of a token checked locally; 401 if invalid, 503 if it cannot be checked now."""
+    try:
+        return await jwt_verifier.verify_async(token)
+    except TokenVerificationError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except TokenVerificationUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def extract_user_id_from_jwt(authorization: Optional[str] = Header(None)) -> str:
     """
     Extract user ID from JWT token in Authorization header.
+    The signature is checked locally (no call to Supabase Auth).
     Raises HTTPException if token is missing or invalid.
     """
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
-    
-    token = authorization.replace("Bearer ", "")
+    return (await verified_claims(bearer_token(authorization)))["sub"]
+
+
+async def extract_user_id_from_jwt_remote(authorization: Optional[str] = Header(None)) -> str:
+    """
+    Extract user ID after checking the token with Supabase Auth.
+    Slower than extract_user_id_from_jwt, but sees revoked sessions.
+    """
+    token = bearer_token(authorization)
     
     try:
-        # Use Supabase client to verify token
-        user = supabase_db.anon_client.auth.get_user(token)
-        if not user or not user.user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return user.user.id
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Token validation failed: {str(e)}")
+        # Reject bad signatures locally before the network call
+        await jwt_verifier.verify_async(token)
+        return (await jwt_verifier.verify_remote_async(token))["sub"]
+    except TokenVerificationError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except TokenVerificationUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
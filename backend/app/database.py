@@ -3,6 +3,7 @@ Database connection and session management.
 Uses SQLAlchemy for PostgreSQL database operations.
 """
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -10,8 +11,13 @@ from app.config import settings
 # Create database engine
 # Note: psycopg3 uses different connection string format
 # Convert postgresql:// to postgresql+psycopg:// for psycopg3
-# Add prepare_threshold=0 to connection args to disable prepared statements
+# psycopg prepares a statement server-side once it has run
+# prepare_threshold times on a connection (None disables this, as needed
+# behind a transaction-mode pooler that cannot keep prepared statements)
 database_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
+connect_args = {
+    "prepare_threshold": settings.DATABASE_PREPARE_THRESHOLD if settings.DATABASE_PREPARED_STATEMENTS else None,
+}
 
 engine = create_engine(
     database_url,
@@ -20,11 +26,33 @@ engine = create_engine(
     max_overflow=20,
     pool_recycle=3600,  # Recycle connections after 1 hour
     echo_pool=False,
+    connect_args=connect_args,
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for API handlers (psycopg3 runs the same URL in async mode).
+# The sync engine above stays for scripts, background jobs and the RAG
+# pipeline, which run in worker threads.
+async_engine = create_async_engine(
+    database_url,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    pool_recycle=3600,
+    connect_args=connect_args,
+)
+
+# expire_on_commit=False: objects stay readable after commit without an
+# implicit (and, in async, impossible) lazy refresh
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -40,3 +68,12 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """
+    Dependency function for FastAPI to get an async database session.
+    Relationships are never lazy-loaded in async code: load them with
+    selectinload() in the query that needs them.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -6,8 +6,17 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.database import engine, Base
-from app.api import auth, notebooks, chapters, notes, rag
-from app.api import resources, comments, reports, likes, notifications, public_search, messaging
+from app.api import auth, notebooks, chapters, notes, rag, sync
+from app.api import resources, comments, reports, likes, notifications, public_search, messaging, realtime
+from app.services.llm_service import llm_metrics
+from app.services.summary_cache import summary_cache
+from app.auth.dependencies import principal_cache
+from app.core.jwt_verifier import jwt_verifier
+from app.services.profile_cache import profile_cache
+from app.core.supabase_client import supabase_db
+from app.core.redis_client import close_async_redis
+from app.services.realtime_service import realtime_gateway
+from app.utils.pagination import NEXT_CURSOR_HEADER
 import logging
 
 # Configure logging
@@ -33,6 +42,17 @@ def startup_db():
     except Exception as e:
         logger.error(f"⚠️ Database connection failed: {e}")
 
+
+@app.on_event("shutdown")
+async def close_supabase_pool():
+    await supabase_db.aclose()
+
+
+@app.on_event("shutdown")
+async def close_realtime_gateway():
+    await realtime_gateway.aclose()
+    await close_async_redis()
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -40,6 +60,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include existing routers
@@ -48,6 +69,7 @@ app.include_router(notebooks.router, prefix="/api")
 app.include_router(chapters.router, prefix="/api")
 app.include_router(notes.router, prefix="/api")
 app.include_router(rag.router, prefix="/api")
+app.include_router(sync.router, prefix="/api")
 
 # Include new routers for Smart NoteX platform
 app.include_router(resources.router, prefix="/api")
@@ -61,6 +83,7 @@ app.include_router(public_search.router, prefix="/api")
 
 # Messaging & community chat endpoints
 app.include_router(messaging.router, prefix="/api")
+app.include_router(realtime.router, prefix="/api")
 
 
 @app.get("/")
@@ -86,3 +109,17 @@ async def health_check():
         "database": "connected",
         "ai_service": "enabled"
     }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime state of the LLM resilience layer and caches."""
+    return {
+        "llm": llm_metrics(),
+        "summary_cache": summary_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "supabase_jwt": jwt_verifier.stats(),
+        "profile_cache": profile_cache.stats(),
+        "supabase_http": supabase_db.http_pool.stats(),
+        "realtime": realtime_gateway.stats(),
+    }
@@ -7,6 +7,7 @@ from app.models.chapter import Chapter
 from app.models.note import Note
 from app.models.note_content import NoteContent
 from app.models.share import Share
+from app.models.tombstone import Tombstone
 
 __all__ = [
     "User",
@@ -15,5 +16,6 @@ __all__ = [
     "Note",
     "NoteContent",
     "Share",
+    "Tombstone",
 ]
 
@@ -1,10 +1,11 @@
 """
 Chapter model representing a chapter within a notebook.
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.tombstone import change_seq_column
 
 
 class Chapter(Base):
@@ -17,18 +18,26 @@ class Chapter(Base):
         description: Optional chapter description
         order_index: Order of chapter within notebook (for sorting)
         notebook_id: Foreign key to Notebook
+        ai_summary: AI-generated summary
         created_at: Creation timestamp
         updated_at: Last update timestamp
+        change_seq: Sync sequence value of the last insert/update
     """
     __tablename__ = "chapters"
+    __table_args__ = (
+        # Keyset pagination of a notebook's chapters
+        Index("ix_chapters_notebook_order", "notebook_id", "order_index", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
     order_index = Column(Integer, default=0)  # For ordering chapters
+    ai_summary = Column(Text, nullable=True)  # Rolled up from the summaries below it
     notebook_id = Column(Integer, ForeignKey("notebooks.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = change_seq_column()  # Delta sync token
     
     # Relationships
     notebook = relationship("Notebook", back_populates="chapters")
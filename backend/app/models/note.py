@@ -1,10 +1,11 @@
 """
 Note model representing a single note within a chapter.
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.tombstone import change_seq_column
 
 
 class Note(Base):
@@ -19,8 +20,13 @@ class Note(Base):
         ai_summary: AI-generated summary
         created_at: Creation timestamp
         updated_at: Last update timestamp
+        change_seq: Sync sequence value of the last insert/update
     """
     __tablename__ = "notes"
+    __table_args__ = (
+        # Keyset pagination of a chapter's notes
+        Index("ix_notes_chapter_created", "chapter_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
@@ -29,6 +35,7 @@ class Note(Base):
     ai_summary = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = change_seq_column()  # Delta sync token
     
     # Relationships
     chapter = relationship("Chapter", back_populates="notes")
@@ -2,11 +2,12 @@
 NoteContent model representing different types of content within a note.
 Supports text, images, PDFs, videos, and web links.
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from app.database import Base
+from app.models.tombstone import change_seq_column
 
 
 class ContentType(enum.Enum):
@@ -34,8 +35,13 @@ class NoteContent(Base):
         order_index: Order of content within note
         metadata: JSON metadata (e.g., video timestamp, link preview)
         created_at: Creation timestamp
+        change_seq: Sync sequence value of the last insert/update
     """
     __tablename__ = "note_contents"
+    __table_args__ = (
+        # Keyset pagination of a note's content blocks
+        Index("ix_note_contents_note_order", "note_id", "order_index", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     note_id = Column(Integer, ForeignKey("notes.id"), nullable=False)
@@ -47,6 +53,7 @@ class NoteContent(Base):
     order_index = Column(Integer, default=0)  # For ordering content blocks
     Note_metadata = Column(Text, nullable=True)  # JSON string for additional data
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    change_seq = change_seq_column()  # Delta sync token
     
     # Relationships
     note = relationship("Note", back_populates="contents")
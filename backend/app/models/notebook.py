@@ -1,10 +1,11 @@
 """
 Notebook model representing a subject (e.g., "Data Structures", "Calculus").
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.tombstone import change_seq_column
 
 
 class Notebook(Base):
@@ -17,18 +18,26 @@ class Notebook(Base):
         description: Optional description of the subject
         color: Hex color code for UI customization
         owner_id: Foreign key to User
+        ai_summary: AI-generated summary
         created_at: Creation timestamp
         updated_at: Last update timestamp
+        change_seq: Sync sequence value of the last insert/update
     """
     __tablename__ = "notebooks"
+    __table_args__ = (
+        # Keyset pagination of a user's notebooks
+        Index("ix_notebooks_owner_created", "owner_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
     color = Column(String, default="#3B82F6")  # Default blue color
+    ai_summary = Column(Text, nullable=True)  # Rolled up from the summaries below it
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = change_seq_column()  # Delta sync token
     
     # Relationships
     owner = relationship("User", back_populates="notebooks")
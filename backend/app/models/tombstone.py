@@ -0,0 +1,123 @@
+"""
+Change tracking for delta sync.
+
+Every notebook, chapter, note and note content row carries a `change_seq`
+drawn from one database sequence on insert and on update, so "everything
+that changed after token N" is `change_seq > N` on each table. Deleted rows
+leave a Tombstone with a change_seq from the same sequence.
+
+Sequence values are drawn when a row is written, not when it commits. To
+keep tokens safe anyway, every flush that writes synced rows first takes a
+transaction-level advisory lock per owner: one owner's transactions then
+draw their values and commit in the same order, so a reader never sees a
+value above one that is still uncommitted for that owner.
+"""
+from typing import Optional
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Sequence, Index, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.database import Base
+
+# Shared by all synced tables, so tokens are comparable across them
+SYNC_CHANGE_SEQ = Sequence("sync_change_seq", metadata=Base.metadata)
+
+# First key of the per-owner advisory lock held by transactions writing
+# synced rows (the second key is the owner id)
+SYNC_OWNER_LOCK_NAMESPACE = 31002
+
+
+def change_seq_column() -> Column:
+    """Column stamped with the next sync sequence value on insert and update."""
+    return Column(
+        BigInteger,
+        SYNC_CHANGE_SEQ,
+        server_default=SYNC_CHANGE_SEQ.next_value(),
+        onupdate=SYNC_CHANGE_SEQ.next_value(),
+        nullable=False,
+        index=True,
+    )
+
+
+class Tombstone(Base):
+    """
+    Record of a deleted synced entity.
+
+    Attributes:
+        id: Primary key
+        entity_type: "notebook", "chapter", "note" or "content"
+        entity_id: ID the entity had
+        owner_id: Owner of the notebook it belonged to
+        change_seq: Sync sequence value of the deletion
+        deleted_at: Deletion timestamp
+    """
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_owner_seq", "owner_id", "change_seq"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String(16), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    owner_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, SYNC_CHANGE_SEQ, server_default=SYNC_CHANGE_SEQ.next_value(), nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+def _synced_types() -> dict:
+    from app.models.notebook import Notebook
+    from app.models.chapter import Chapter
+    from app.models.note import Note
+    from app.models.note_content import NoteContent
+
+    return {Notebook: "notebook", Chapter: "chapter", Note: "note", NoteContent: "content"}
+
+
+def _owner_id(session, obj) -> Optional[int]:
+    # Walk up to the notebook; during cascades the parents are already in
+    # the identity map, so these many-to-one loads cost no queries. New rows
+    # may only have the parent's id set.
+    from app.models.notebook import Notebook
+    from app.models.chapter import Chapter
+    from app.models.note import Note
+
+    if isinstance(obj, Notebook):
+        return obj.owner_id
+    if isinstance(obj, Chapter):
+        parent, parent_type, parent_id = obj.notebook, Notebook, obj.notebook_id
+    elif isinstance(obj, Note):
+        parent, parent_type, parent_id = obj.chapter, Chapter, obj.chapter_id
+    else:
+        parent, parent_type, parent_id = obj.note, Note, obj.note_id
+
+    if parent is None and parent_id is not None:
+        parent = session.get(parent_type, parent_id)
+    return _owner_id(session, parent) if parent is not None else None
+
+
+@event.listens_for(Session, "before_flush")
+def record_tombstones(session, flush_context, instances):
+    """
+    Lock the owners of synced rows written in this flush, and add a
+    Tombstone for every synced entity deleted in it.
+    """
+    entity_types = _synced_types()
+    written = [obj for obj in (*session.new, *session.dirty, *session.deleted) if type(obj) in entity_types]
+    if not written:
+        return
+
+    with session.no_autoflush:
+        owners = {obj: _owner_id(session, obj) for obj in written}
+
+    # Sorted, so transactions writing several owners cannot deadlock
+    for owner_id in sorted({owner for owner in owners.values() if owner is not None}):
+        session.connection().execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :owner_id)"),
+            {"namespace": SYNC_OWNER_LOCK_NAMESPACE, "owner_id": owner_id},
+        )
+
+    for obj in list(session.deleted):
+        entity_type = entity_types.get(type(obj))
+        if entity_type is None:
+            continue
+        session.add(Tombstone(entity_type=entity_type, entity_id=obj.id, owner_id=owners[obj]))
@@ -0,0 +1,15 @@
+"""
+Direct Postgres repositories for hot Supabase-table reads.
+Used instead of PostgREST when SUPABASE_DIRECT_READS is enabled.
+"""
+from app.repositories.base import SupabaseRepository
+from app.repositories.resource_repository import ResourceRepository
+from app.repositories.notification_repository import NotificationRepository
+from app.repositories.message_repository import MessageRepository
+
+__all__ = [
+    "SupabaseRepository",
+    "ResourceRepository",
+    "NotificationRepository",
+    "MessageRepository",
+]
@@ -0,0 +1,72 @@
+"""
+Direct Postgres reads of the Supabase tables, under the caller's RLS.
+
+Each read runs in its own short transaction that first takes the request's
+database role and JWT claims, the same way PostgREST does:
+
+    SELECT set_config('role', 'authenticated', true),
+           set_config('request.jwt.claims', '{"sub": ...}', true)
+
+so `auth.uid()` and every RLS policy see the caller, and the settings end
+with the transaction (`true` = local). Queries also carry explicit
+predicates where they are cheap (e.g. `user_id = :user_id`), so a missing
+policy cannot widen a result.
+
+Statements are module-level constants with a fixed text (optional filters
+are `CAST(:x AS ...) IS NULL OR ...`, not string building), so psycopg
+prepares each one per connection after DATABASE_PREPARE_THRESHOLD runs.
+
+The DATABASE_URL role must be allowed to SET ROLE to anon and
+authenticated (true for the Supabase `postgres` user).
+"""
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+import json
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Roles a request may run as (never service_role or the connection's own)
+REQUEST_ROLES = ("anon", "authenticated")
+
+SET_REQUEST_CONTEXT = text(
+    "SELECT set_config('role', :role, true), set_config('request.jwt.claims', :claims, true)"
+)
+
+
+class SupabaseRepository:
+    """Base for repositories that read Supabase tables as the requesting user."""
+
+    def __init__(self, db: AsyncSession, claims: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            db: Async session with no transaction in progress (each read
+                rolls back when done)
+            claims: Verified JWT claims of the caller, or None for anonymous
+        """
+        role = claims.get("role", "authenticated") if claims else "anon"
+        if role not in REQUEST_ROLES:
+            raise ValueError(f"Unsupported request role: {role}")
+
+        self.db = db
+        self.role = role
+        self.claims = claims or {"role": "anon"}
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return self.claims.get("sub")
+
+    @asynccontextmanager
+    async def request_scope(self):
+        """Transaction running as the caller; rolled back on exit."""
+        await self.db.execute(SET_REQUEST_CONTEXT, {"role": self.role, "claims": json.dumps(self.claims)})
+        try:
+            yield self.db
+        finally:
+            await self.db.rollback()
+
+    async def fetch_all(self, statement, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Run one read statement as the caller and return its rows as dicts."""
+        async with self.request_scope() as db:
+            result = await db.execute(statement, params)
+            return [dict(row) for row in result.mappings().all()]
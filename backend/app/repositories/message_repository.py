@@ -0,0 +1,71 @@
+"""
+Direct reads of conversation messages.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.repositories.base import SupabaseRepository
+
+# See get_user_conversations() in messaging_schema.sql
+LIST_CONVERSATIONS = text("SELECT * FROM get_user_conversations(:limit, :offset)")
+
+TOTAL_UNREAD = text("SELECT get_total_unread_count()")
+
+IS_MEMBER = text("""
+    SELECT EXISTS (
+        SELECT 1
+        FROM public.conversation_members
+        WHERE conversation_id = CAST(:conversation_id AS uuid)
+          AND user_id = CAST(:user_id AS uuid)
+    )
+""")
+
+LIST_MESSAGES = text("""
+    SELECT *
+    FROM public.messages
+    WHERE conversation_id = CAST(:conversation_id AS uuid)
+      AND (CAST(:before AS timestamptz) IS NULL OR created_at < :before)
+    ORDER BY created_at DESC
+    LIMIT :limit
+""")
+
+
+class MessageRepository(SupabaseRepository):
+    """Conversation and message reads."""
+
+    async def list_conversations(self, limit: int, offset: int) -> List[Dict[str, Any]]:
+        """A page of the caller's conversations with last message and unread count."""
+        return await self.fetch_all(LIST_CONVERSATIONS, {"limit": limit, "offset": offset})
+
+    async def total_unread(self) -> int:
+        """Unread messages of the caller across all conversations."""
+        async with self.request_scope() as db:
+            return (await db.execute(TOTAL_UNREAD)).scalar() or 0
+
+    async def list_messages(
+        self,
+        conversation_id: str,
+        limit: int,
+        before: Optional[datetime] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        A page of a conversation's messages, newest first.
+
+        Args:
+            conversation_id: Conversation ID
+            limit: Page size
+            before: Only messages created before this time
+
+        Returns:
+            Message rows, or None if the caller is not a member
+        """
+        params = {"conversation_id": conversation_id, "user_id": self.user_id}
+        async with self.request_scope() as db:
+            is_member = (await db.execute(IS_MEMBER, params)).scalar()
+            if not is_member:
+                return None
+
+            result = await db.execute(LIST_MESSAGES, {**params, "before": before, "limit": limit})
+            return [dict(row) for row in result.mappings().all()]
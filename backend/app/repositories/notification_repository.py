@@ -0,0 +1,40 @@
+"""
+Direct reads of the caller's notifications.
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+
+from app.repositories.base import SupabaseRepository
+
+LIST_NOTIFICATIONS = text("""
+    SELECT *
+    FROM public.notifications
+    WHERE user_id = CAST(:user_id AS uuid)
+      AND (NOT :unread_only OR is_read = false)
+    ORDER BY created_at DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+
+class NotificationRepository(SupabaseRepository):
+    """Notification reads (always scoped to the caller)."""
+
+    async def list_notifications(self, unread_only: bool, limit: int, offset: int) -> List[Dict[str, Any]]:
+        """
+        The caller's notifications, newest first.
+
+        Args:
+            unread_only: Only unread notifications
+            limit: Page size
+            offset: Rows to skip
+
+        Returns:
+            Notification rows
+        """
+        return await self.fetch_all(LIST_NOTIFICATIONS, {
+            "user_id": self.user_id,
+            "unread_only": unread_only,
+            "limit": limit,
+            "offset": offset,
+        })
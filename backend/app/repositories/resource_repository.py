@@ -0,0 +1,68 @@
+"""
+Direct reads of resources and their comments.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.repositories.base import SupabaseRepository
+
+# RLS limits rows to approved resources plus the caller's own (all for admins)
+LIST_RESOURCES = text("""
+    SELECT *
+    FROM public.resources
+    WHERE (CAST(:subject AS text) IS NULL OR subject = :subject)
+      AND (CAST(:resource_type AS text) IS NULL OR resource_type = :resource_type)
+      AND (NOT :approved_only OR is_approved)
+    ORDER BY created_at DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+LIST_COMMENTS = text("""
+    SELECT *
+    FROM public.comments
+    WHERE resource_id = CAST(:resource_id AS uuid)
+    ORDER BY created_at ASC
+    LIMIT :limit OFFSET :offset
+""")
+
+
+class ResourceRepository(SupabaseRepository):
+    """Resource and comment reads."""
+
+    async def list_resources(
+        self,
+        subject: Optional[str],
+        resource_type: Optional[str],
+        approved_only: bool,
+        limit: int,
+        offset: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Resources visible to the caller, newest first.
+
+        Args:
+            subject: Only this subject, if given
+            resource_type: Only this type, if given
+            approved_only: Only approved resources
+            limit: Page size
+            offset: Rows to skip
+
+        Returns:
+            Resource rows
+        """
+        return await self.fetch_all(LIST_RESOURCES, {
+            "subject": subject,
+            "resource_type": resource_type,
+            "approved_only": approved_only,
+            "limit": limit,
+            "offset": offset,
+        })
+
+    async def list_comments(self, resource_id: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+        """Comments on a resource visible to the caller, oldest first."""
+        return await self.fetch_all(LIST_COMMENTS, {
+            "resource_id": resource_id,
+            "limit": limit,
+            "offset": offset,
+        })
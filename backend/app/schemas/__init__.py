@@ -2,11 +2,24 @@
 Pydantic schemas for request/response validation.
 """
 from app.schemas.user import UserCreate, UserResponse, Token, LoginRequest
-from app.schemas.notebook import NotebookCreate, NotebookUpdate, NotebookResponse
+from app.schemas.notebook import (
+    NotebookCreate,
+    NotebookUpdate,
+    NotebookResponse,
+    NotebookTreeResponse,
+    ChapterTreeItem,
+    NoteTreeItem,
+)
 from app.schemas.chapter import ChapterCreate, ChapterUpdate, ChapterResponse
 from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse
 from app.schemas.note_content import NoteContentCreate, NoteContentResponse
-from app.schemas.rag import RAGQueryRequest, RAGAnswerResponse, RAGSource
+from app.schemas.rag import (
+    RAGQueryRequest,
+    RAGAnswerResponse,
+    RAGSource,
+    RAGBatchQueryRequest,
+    RAGBatchAnswerLine,
+)
 
 __all__ = [
     "UserCreate",
@@ -16,6 +29,9 @@ __all__ = [
     "NotebookCreate",
     "NotebookUpdate",
     "NotebookResponse",
+    "NotebookTreeResponse",
+    "ChapterTreeItem",
+    "NoteTreeItem",
     "ChapterCreate",
     "ChapterUpdate",
     "ChapterResponse",
@@ -27,5 +43,7 @@ __all__ = [
     "RAGQueryRequest",
     "RAGAnswerResponse",
     "RAGSource",
+    "RAGBatchQueryRequest",
+    "RAGBatchAnswerLine",
 ]
 
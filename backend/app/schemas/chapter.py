@@ -28,6 +28,7 @@ class ChapterResponse(BaseModel):
     description: Optional[str]
     order_index: int
     notebook_id: int
+    ai_summary: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime]
     notes: List[NoteResponse] = []
@@ -33,3 +33,18 @@ class NoteResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class NoteSummaryResponse(BaseModel):
+    """Schema for a note in list views: note columns and a content count, no content blocks."""
+    id: int
+    title: str
+    chapter_id: int
+    is_ai_structured: bool
+    ai_summary: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    content_count: int
+    
+    class Config:
+        from_attributes = True
@@ -28,6 +28,7 @@ class NotebookResponse(BaseModel):
     description: Optional[str]
     color: str
     owner_id: int
+    ai_summary: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime]
     chapters: List[ChapterResponse] = []
@@ -35,3 +36,25 @@ class NotebookResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class NoteTreeItem(BaseModel):
+    """Note entry of a notebook tree (title only)."""
+    id: int
+    title: str
+
+
+class ChapterTreeItem(BaseModel):
+    """Chapter entry of a notebook tree."""
+    id: int
+    title: str
+    order_index: int
+    notes: List[NoteTreeItem] = []
+
+
+class NotebookTreeResponse(BaseModel):
+    """Notebook -> chapters -> note titles, as shown in the sidebar."""
+    id: int
+    title: str
+    color: str
+    chapters: List[ChapterTreeItem] = []
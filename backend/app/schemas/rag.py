@@ -1,8 +1,8 @@
 """
 Pydantic schemas for RAG (Retrieval-Augmented Generation) operations.
 """
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 
 class RAGSource(BaseModel):
@@ -20,6 +20,7 @@ class RAGQueryRequest(BaseModel):
     note_id: Optional[int] = None  # Restrict search to a specific note (optional)
     top_k: int = 5
     threshold: float = 0.6
+    mode: Literal["llm", "fast"] = "llm"  # "fast" = extractive answer, no LLM call
 
 
 class RAGAnswerResponse(BaseModel):
@@ -27,6 +28,23 @@ class RAGAnswerResponse(BaseModel):
 
     answer: str
     sources: List[RAGSource]
+    mode: Literal["llm", "fast"] = "llm"  # How the answer was produced
+
+
+class RAGBatchQueryRequest(BaseModel):
+    """Request schema for answering many questions in one call."""
+
+    queries: List[RAGQueryRequest] = Field(..., min_length=1, max_length=100)
+
+
+class RAGBatchAnswerLine(BaseModel):
+    """One NDJSON line of a batch response, matched to its query by index."""
+
+    index: int
+    answer: Optional[str] = None
+    sources: List[RAGSource] = []
+    mode: Optional[Literal["llm", "fast"]] = None
+    error: Optional[str] = None
 
 {
   "cells": [],
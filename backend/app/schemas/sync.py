@@ -0,0 +1,97 @@
+"""
+Pydantic schemas for delta sync.
+"""
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, List
+from app.models.note_content import ContentType
+
+
+class NotebookChange(BaseModel):
+    """Notebook created or updated since the token."""
+    id: int
+    title: str
+    description: Optional[str]
+    color: str
+    ai_summary: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime]
+    change_seq: int
+    
+    class Config:
+        from_attributes = True
+
+
+class ChapterChange(BaseModel):
+    """Chapter created or updated since the token."""
+    id: int
+    notebook_id: int
+    title: str
+    description: Optional[str]
+    order_index: int
+    ai_summary: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime]
+    change_seq: int
+    
+    class Config:
+        from_attributes = True
+
+
+class NoteChange(BaseModel):
+    """Note created or updated since the token."""
+    id: int
+    chapter_id: int
+    title: str
+    is_ai_structured: bool
+    ai_summary: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    change_seq: int
+    
+    class Config:
+        from_attributes = True
+
+
+class NoteContentChange(BaseModel):
+    """Content block created or updated since the token."""
+    id: int
+    note_id: int
+    content_type: ContentType
+    content: Optional[str]
+    file_url: Optional[str]
+    file_name: Optional[str]
+    file_size: Optional[int]
+    order_index: int
+    metadata: Optional[str] = Field(None, validation_alias="Note_metadata")
+    created_at: datetime
+    change_seq: int
+    
+    class Config:
+        from_attributes = True
+
+
+class DeletedEntity(BaseModel):
+    """Tombstone of an entity deleted since the token."""
+    entity_type: str  # notebook, chapter, note or content
+    entity_id: int
+    change_seq: int
+    
+    class Config:
+        from_attributes = True
+
+
+class SyncChangesResponse(BaseModel):
+    """
+    Changes after a sync token.
+    
+    Apply upserts and deletions, then call again with `token`. While
+    `has_more` is true there are further changes past `token`.
+    """
+    token: int
+    has_more: bool
+    notebooks: List[NotebookChange] = []
+    chapters: List[ChapterChange] = []
+    notes: List[NoteChange] = []
+    contents: List[NoteContentChange] = []
+    deleted: List[DeletedEntity] = []
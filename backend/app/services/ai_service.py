@@ -2,15 +2,24 @@
 AI Service for automatic resource summarization.
 Integrates with existing LLM service and runs as background tasks.
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import asyncio
-from app.services.llm_service import LLMService
+from app.services.llm_service import get_llm_service
+from app.services.summary_cache import summary_cache, content_key
 from app.core.supabase_client import supabase_db
+from app.utils.text_chunking import split_stable_chunks
+from app.utils.single_flight import AsyncSingleFlight
 from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bump when the prompts change so cached partial summaries are not reused
+SUMMARY_PROMPT_VERSION = "v2"
+
+# Generation budget for one chunk's partial summary
+PARTIAL_SUMMARY_TOKENS = 200
+
 
 class AIService:
     """
@@ -20,25 +29,34 @@ class AIService:
     
     def __init__(self):
         try:
-            self.llm_service = LLMService()
+            self.llm_service = get_llm_service()
             self.enabled = True
         except Exception as e:
             logger.warning(f"LLM service unavailable: {e}. AI features disabled.")
             self.enabled = False
+        
+        # Collapse concurrent generations for the same resource / same content
+        self._resource_flight = AsyncSingleFlight()
+        self._summary_flight = AsyncSingleFlight()
     
     async def generate_summary_async(
         self,
         resource_id: str,
         content: str,
-        max_length: int = 500
+        max_length: int = 500,
+        use_cache: bool = True
     ) -> Optional[Dict[str, Any]]:
         """
         Generate AI summary for a resource (async).
         
+        Concurrent calls for the same resource share one generation, and a
+        resource that already has a summary is not summarized again.
+        
         Args:
             resource_id: UUID of the resource
             content: Text content to summarize
             max_length: Maximum summary length
+            use_cache: Reuse a cached summary of identical content
             
         Returns:
             Dictionary with summary details or None if failed
@@ -47,45 +65,232 @@ class AIService:
             logger.info("AI service disabled, skipping summary generation")
             return None
         
+        if not self.llm_service.is_available():
+            # Left for backfill_summaries.py once the LLM recovers
+            logger.info(f"LLM circuit open, skipping summary for resource {resource_id}")
+            return None
+        
         try:
-            # Build summarization prompt
-            prompt = self._build_summarization_prompt(content, max_length)
-            
-            # Generate summary using LLM
-            summary = await asyncio.to_thread(
-                self.llm_service.generate_answer,
-                question=prompt,
-                contexts=[]  # No RAG context needed for summarization
+            return await self._resource_flight.do(
+                resource_id,
+                lambda: self._generate_and_store(resource_id, content, max_length, use_cache),
             )
-            
-            # Calculate approximate tokens (rough estimate)
-            tokens_used = len(content.split()) + len(summary.split())
-            
-            # Store in database using service client (bypasses RLS)
-            result = supabase_db.service_client.table("ai_summaries").insert({
+        except Exception as e:
+            logger.error(f"Failed to generate AI summary: {e}")
+            return None
+    
+    async def _generate_and_store(
+        self,
+        resource_id: str,
+        content: str,
+        max_length: int,
+        use_cache: bool
+    ) -> Optional[Dict[str, Any]]:
+        """Summarize a resource and store the result unless one already exists."""
+        existing = await asyncio.to_thread(
+            lambda: supabase_db.service_client.table("ai_summaries")
+            .select("*").eq("resource_id", resource_id).execute()
+        )
+        if existing.data:
+            logger.info(f"AI summary already exists for resource {resource_id}, skipping")
+            return existing.data[0]
+        
+        summary, tokens_used = await self.summarize(content, max_length, use_cache=use_cache)
+        
+        # Store in database using service client (bypasses RLS).
+        # ai_summaries.resource_id is unique, so a summary stored by another
+        # worker in the meantime wins and this insert is ignored.
+        result = await asyncio.to_thread(
+            lambda: supabase_db.service_client.table("ai_summaries").upsert({
                 "resource_id": resource_id,
                 "summary": summary,
                 "model_used": self.llm_service.model_name,
                 "tokens_used": tokens_used,
                 "confidence_score": 0.85  # Placeholder heuristic
-            }).execute()
-            
-            if result.data:
-                logger.info(f"✅ AI summary generated for resource {resource_id}")
-                return result.data[0]
+            }, on_conflict="resource_id", ignore_duplicates=True).execute()
+        )
+        
+        if result.data:
+            logger.info(f"✅ AI summary generated for resource {resource_id}")
+            return result.data[0]
+        
+        return None
+    
+    async def summarize(self, content: str, max_length: int = 500, use_cache: bool = True) -> Tuple[str, int]:
+        """
+        Summarize content, reusing earlier results for identical content.
+        
+        Summaries are cached by a hash of (prompt version, model, length,
+        content), so duplicate uploads cost no LLM calls. Concurrent requests
+        for the same key share one in-flight generation.
+        
+        Args:
+            content: Text to summarize
+            max_length: Maximum summary length in words
+            use_cache: Read the cached summary if present (the result is cached either way)
             
-            return None
+        Returns:
+            Tuple of (summary, tokens used by LLM calls actually made)
+        """
+        key = content_key(
+            SUMMARY_PROMPT_VERSION, self.llm_service.model_name, "summary", str(max_length), content
+        )
+        if use_cache:
+            cached = await asyncio.to_thread(summary_cache.get, key)
+            if cached is not None:
+                return cached, 0
+        
+        async def generate() -> Tuple[str, int]:
+            summary, tokens = await self._map_reduce(content, max_length)
+            await asyncio.to_thread(summary_cache.set, key, summary)
+            return summary, tokens
+        
+        return await self._summary_flight.do(key, generate)
+    
+    async def _map_reduce(self, content: str, max_length: int) -> Tuple[str, int]:
+        """
+        Summarize content of any length with map-reduce.
+        
+        Short content is summarized in one call. Longer content is split into
+        stable chunks that are summarized concurrently (map); the partial
+        summaries are then combined, recursively if they are still too long
+        (reduce). Partial summaries are cached by chunk hash, so after a small
+        edit only the changed chunks go back to the LLM.
+        
+        Args:
+            content: Text to summarize
+            max_length: Maximum summary length in words
             
-        except Exception as e:
-            logger.error(f"Failed to generate AI summary: {e}")
-            return None
+        Returns:
+            Tuple of (summary, tokens used by LLM calls actually made)
+        """
+        chunk_chars = settings.AI_SUMMARY_CHUNK_CHARS
+        chunks = split_stable_chunks(content, target_size=chunk_chars, max_size=chunk_chars * 3 // 2)
+        
+        if len(chunks) <= 1:
+            prompt = self._build_summarization_prompt(content, max_length)
+            return await self._generate(prompt, self._summary_token_budget(max_length))
+        
+        semaphore = asyncio.Semaphore(settings.AI_SUMMARY_MAX_CONCURRENCY)
+        tokens_used = 0
+        
+        # Map: one partial summary per chunk
+        results = await asyncio.gather(*[
+            self._summarize_chunk(semaphore, chunk, i, len(chunks))
+            for i, chunk in enumerate(chunks)
+        ])
+        partials = [summary for summary, _ in results]
+        tokens_used += sum(tokens for _, tokens in results)
+        
+        # Reduce: merge groups of partials until they fit in one prompt
+        while len(partials) > 1 and sum(len(p) for p in partials) > chunk_chars:
+            groups = self._group_partials(partials, chunk_chars)
+            if len(groups) == len(partials):
+                break
+            results = await asyncio.gather(*[
+                self._combine_group(semaphore, group) for group in groups
+            ])
+            partials = [summary for summary, _ in results]
+            tokens_used += sum(tokens for _, tokens in results)
+        
+        prompt = self._build_combine_prompt(partials, max_length)
+        summary, tokens = await self._generate(prompt, self._summary_token_budget(max_length))
+        return summary, tokens_used + tokens
+    
+    async def _summarize_chunk(
+        self,
+        semaphore: asyncio.Semaphore,
+        chunk: str,
+        index: int,
+        total: int
+    ) -> Tuple[str, int]:
+        """Summarize one chunk, reusing the cached partial summary if present."""
+        key = content_key(SUMMARY_PROMPT_VERSION, self.llm_service.model_name, "chunk", chunk)
+        cached = await asyncio.to_thread(summary_cache.get, key)
+        if cached is not None:
+            return cached, 0
+        
+        async with semaphore:
+            prompt = self._build_chunk_prompt(chunk, index, total)
+            summary, tokens = await self._generate(prompt, PARTIAL_SUMMARY_TOKENS)
+        
+        await asyncio.to_thread(summary_cache.set, key, summary)
+        return summary, tokens
+    
+    async def _combine_group(self, semaphore: asyncio.Semaphore, partials: List[str]) -> Tuple[str, int]:
+        """Merge a group of partial summaries into one intermediate summary."""
+        key = content_key(SUMMARY_PROMPT_VERSION, self.llm_service.model_name, "combine", *partials)
+        cached = await asyncio.to_thread(summary_cache.get, key)
+        if cached is not None:
+            return cached, 0
+        
+        async with semaphore:
+            prompt = self._build_combine_prompt(partials, None)
+            summary, tokens = await self._generate(prompt, PARTIAL_SUMMARY_TOKENS * 2)
+        
+        await asyncio.to_thread(summary_cache.set, key, summary)
+        return summary, tokens
+    
+    async def _generate(self, prompt: str, max_new_tokens: int) -> Tuple[str, int]:
+        """Run one LLM call in a worker thread and count its prompt + output tokens."""
+        def run() -> Tuple[str, int]:
+            text = self.llm_service.generate_text(prompt, max_new_tokens=max_new_tokens)
+            tokens = self.llm_service.count_tokens(prompt) + self.llm_service.count_tokens(text)
+            return text, tokens
+        
+        return await asyncio.to_thread(run)
+    
+    @staticmethod
+    def _group_partials(partials: List[str], max_chars: int) -> List[List[str]]:
+        """Pack consecutive partial summaries into groups of at most max_chars."""
+        groups: List[List[str]] = []
+        current: List[str] = []
+        size = 0
+        for partial in partials:
+            if current and size + len(partial) > max_chars:
+                groups.append(current)
+                current, size = [], 0
+            current.append(partial)
+            size += len(partial)
+        if current:
+            groups.append(current)
+        return groups
+    
+    @staticmethod
+    def _summary_token_budget(max_length: int) -> int:
+        """Generation budget for a summary of max_length words (~1.4 tokens per word)."""
+        return max(128, min(1024, int(max_length * 1.4)))
     
     def _build_summarization_prompt(self, content: str, max_length: int) -> str:
         """Build a prompt for summarization."""
         prompt = (
             f"Summarize the following academic content in {max_length} words or less. "
             "Focus on key concepts and main ideas. Be concise and clear.\n\n"
-            f"Content:\n{content[:2000]}\n\n"  # Limit input length
+            f"Content:\n{content}\n\n"
+            "Summary:"
+        )
+        return prompt
+    
+    def _build_chunk_prompt(self, chunk: str, index: int, total: int) -> str:
+        """Build a prompt for summarizing one section of a long document."""
+        prompt = (
+            f"The following is section {index + 1} of {total} of a longer academic document. "
+            "Summarize the key concepts, definitions and results of this section "
+            "in a few sentences. Do not add information that is not in the text.\n\n"
+            f"Section:\n{chunk}\n\n"
+            "Summary:"
+        )
+        return prompt
+    
+    def _build_combine_prompt(self, partials: List[str], max_length: Optional[int]) -> str:
+        """Build a prompt that merges section summaries into one summary."""
+        sections = "\n\n".join(f"[Section {i + 1}] {p}" for i, p in enumerate(partials))
+        limit = f" in {max_length} words or less" if max_length else ""
+        prompt = (
+            "Below are summaries of consecutive sections of one academic document. "
+            f"Combine them into a single coherent summary{limit}. "
+            "Focus on key concepts and main ideas, remove repetition, and keep the original order.\n\n"
+            f"Section summaries:\n{sections}\n\n"
             "Summary:"
         )
         return prompt
@@ -113,7 +318,7 @@ class AIService:
             supabase_db.service_client.table("ai_summaries").delete().eq("resource_id", resource_id).execute()
             
             # Generate new summary
-            return await self.generate_summary_async(resource_id, content)
+            return await self.generate_summary_async(resource_id, content, use_cache=False)
             
         except Exception as e:
             logger.error(f"Failed to regenerate summary: {e}")
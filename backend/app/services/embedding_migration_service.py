@@ -0,0 +1,177 @@
+"""
+Zero-downtime embedding model migration.
+
+Lifecycle of a model switch:
+1. start:    create a versioned table for the new model and register it as
+             "backfilling". From now on every indexed note is written to both
+             the active table and the new one.
+2. backfill: re-embed every note of the active table into the new table, in
+             small resumable batches, while queries keep using the old table.
+3. cutover:  once coverage reaches 100%, build the ANN index and atomically
+             make the new model the active one.
+"""
+from typing import Dict, Any, Optional
+import logging
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.note import Note
+from app.services.embedding_service import get_embedding_service
+from app.services.vector_service import (
+    VectorService,
+    embedding_table_name,
+    MODEL_STATUS_ACTIVE,
+    MODEL_STATUS_BACKFILLING,
+)
+from app.services.rag_service import RAGService
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingMigrationService:
+    """Moves note embeddings from the active model to a new one."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.vector_service = VectorService(db)
+        self.rag_service = RAGService(db)
+
+    def start(self, model_name: str) -> Dict[str, Any]:
+        """
+        Create and register the table for a new embedding model.
+
+        The vector dimension is read from the loaded model.
+
+        Returns:
+            Registry entry for the new model
+        """
+        self.vector_service.create_model_registry_if_not_exists()
+
+        existing = self.vector_service.get_model(model_name)
+        if existing:
+            return existing
+
+        service = get_embedding_service(model_name)
+        table_name = embedding_table_name(model_name)
+
+        # The ANN index is built at cutover, once the table holds real data
+        self.vector_service.create_embeddings_table_if_not_exists(
+            table_name=table_name,
+            dimension=service.dimension,
+            create_ann_index=False,
+        )
+
+        entry = self.vector_service.register_model(
+            model_name=model_name,
+            table_name=table_name,
+            dimension=service.dimension,
+            status=MODEL_STATUS_BACKFILLING,
+        )
+        logger.info(f"Started embedding migration to {model_name} ({table_name}, dim={service.dimension})")
+        return entry
+
+    def status(self, model_name: str) -> Dict[str, Any]:
+        """
+        Report how much of the active table the new model already covers.
+
+        Returns:
+            Dict with source/target tables, note counts and coverage (0-1)
+        """
+        target = self._require_model(model_name)
+        active = self.vector_service.get_active_model(use_cache=False)
+
+        coverage = self.vector_service.get_migration_coverage(
+            source_table=active["table_name"],
+            target_table=target["table_name"],
+        )
+        source_notes = coverage["source_notes"]
+        covered = coverage["covered_notes"]
+
+        return {
+            "model_name": model_name,
+            "status": target["status"],
+            "source_table": active["table_name"],
+            "target_table": target["table_name"],
+            "source_notes": source_notes,
+            "covered_notes": covered,
+            "coverage": covered / source_notes if source_notes else 1.0,
+        }
+
+    def backfill(self, model_name: str, batch_size: int = 50, max_batches: Optional[int] = None) -> int:
+        """
+        Re-embed notes that are missing from the new model's table.
+
+        Safe to interrupt: progress is committed per note and the next run
+        picks up the notes that are still missing.
+
+        Args:
+            model_name: Model being migrated to
+            batch_size: Notes fetched per batch
+            max_batches: Stop after this many batches (None = until done)
+
+        Returns:
+            Number of notes processed
+        """
+        target = self._require_model(model_name)
+        if target["status"] != MODEL_STATUS_BACKFILLING:
+            raise ValueError(f"Embedding model {model_name} is {target['status']}, not backfilling")
+
+        processed = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            active = self.vector_service.get_active_model(use_cache=False)
+            note_ids = self.vector_service.get_notes_missing_from(
+                source_table=active["table_name"],
+                target_table=target["table_name"],
+                limit=batch_size,
+            )
+            if not note_ids:
+                break
+
+            notes = (
+                self.db.query(Note)
+                .options(selectinload(Note.contents))
+                .filter(Note.id.in_(note_ids))
+                .all()
+            )
+            for note in notes:
+                chunks = self.rag_service.chunk_note(note)
+                if chunks:
+                    self.rag_service.index_chunks_into(note.id, chunks, target)
+                else:
+                    # Note lost its text since it was indexed: drop it everywhere
+                    self.rag_service.index_note(note)
+                processed += 1
+
+            batches += 1
+            logger.info(f"Embedding backfill to {model_name}: {processed} notes processed")
+
+        return processed
+
+    def cutover(self, model_name: str) -> Dict[str, Any]:
+        """
+        Switch queries to the new model once it covers every indexed note.
+
+        Raises:
+            ValueError: If the backfill has not reached 100% coverage
+        """
+        report = self.status(model_name)
+        if report["status"] == MODEL_STATUS_ACTIVE:
+            return report
+        if report["covered_notes"] < report["source_notes"]:
+            raise ValueError(
+                f"Cannot cut over to {model_name}: "
+                f"{report['covered_notes']}/{report['source_notes']} notes backfilled"
+            )
+
+        self.vector_service.create_embedding_index(report["target_table"])
+        self.vector_service.activate_model(model_name)
+        logger.info(f"✅ Embedding model {model_name} is now active")
+
+        return self.status(model_name)
+
+    def _require_model(self, model_name: str) -> Dict[str, Any]:
+        entry = self.vector_service.get_model(model_name)
+        if not entry:
+            raise ValueError(f"Embedding model {model_name} is not registered; run start first")
+        return entry
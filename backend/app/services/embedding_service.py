@@ -2,9 +2,10 @@
 Service for generating embeddings using HuggingFace.
 Supports both local models (sentence-transformers) and HuggingFace Inference API.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.config import settings
 import os
+import threading
 
 # Try to import sentence-transformers for local embeddings
 try:
@@ -24,10 +25,9 @@ except ImportError:
 class EmbeddingService:
     """Service for generating text embeddings using HuggingFace."""
     
-    def __init__(self):
-        self.model_name = settings.HUGGINGFACE_EMBEDDING_MODEL
+    def __init__(self, model_name: Optional[str] = None):
+        self.model_name = model_name or settings.HUGGINGFACE_EMBEDDING_MODEL
         self.use_api = bool(settings.HUGGINGFACE_API_KEY)
-        self.dimension = self._get_model_dimension()
         
         # Initialize: Use local sentence-transformers model (recommended)
         # Local models are faster, more reliable, and don't require API calls or rate limits
@@ -35,6 +35,7 @@ class EmbeddingService:
             print(f"Loading HuggingFace model: {self.model_name}")
             self.model = SentenceTransformer(self.model_name)
             self.client = None
+            self.dimension = self._get_model_dimension()
             print(f"✓ Model loaded. Embedding dimension: {self.dimension}")
         else:
             raise ImportError(
@@ -44,21 +45,19 @@ class EmbeddingService:
     
     def _get_model_dimension(self) -> int:
         """
-        Get the embedding dimension for the configured model.
+        Get the embedding dimension of the loaded model.
+        
+        Read from the model itself so that unknown models never end up in a
+        table with the wrong vector size.
         
         Returns:
             Embedding dimension
         """
-        # Common model dimensions
-        dimension_map = {
-            "sentence-transformers/all-MiniLM-L6-v2": 384,
-            "sentence-transformers/all-mpnet-base-v2": 768,
-            "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2": 384,
-            "sentence-transformers/all-MiniLM-L12-v2": 384,
-            "intfloat/multilingual-e5-base": 768,
-        }
-        
-        return dimension_map.get(self.model_name, 384)  # Default to 384
+        dimension = self.model.get_sentence_embedding_dimension()
+        if not dimension:
+            # Some models don't report their output size; measure it instead
+            dimension = len(self.model.encode("dimension probe", convert_to_numpy=True))
+        return int(dimension)
     
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -107,6 +106,24 @@ class EmbeddingService:
             else:
                 raise ImportError("sentence-transformers is required for embeddings")
     
+    def generate_embeddings_array(self, texts: List[str], normalize: bool = False):
+        """
+        Generate embeddings for multiple texts as a numpy matrix.
+        
+        Args:
+            texts: List of texts to embed
+            normalize: Scale every vector to unit length
+        
+        Returns:
+            numpy array of shape (len(texts), dimension)
+        """
+        return self.model.encode(
+            texts,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+            normalize_embeddings=normalize,
+        )
+    
     def chunk_text(
         self,
         text: str,
@@ -154,3 +171,28 @@ class EmbeddingService:
 # Global embedding service instance
 embedding_service = EmbeddingService()
 
+# Additional models loaded on demand (e.g. while migrating to a new model)
+_embedding_services: Dict[str, EmbeddingService] = {embedding_service.model_name: embedding_service}
+_embedding_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: Optional[str] = None) -> EmbeddingService:
+    """
+    Get the embedding service for a specific model, loading it on first use.
+    
+    Args:
+        model_name: HuggingFace model id (defaults to the configured model)
+    
+    Returns:
+        EmbeddingService instance for that model
+    """
+    model_name = model_name or embedding_service.model_name
+    service = _embedding_services.get(model_name)
+    if service is None:
+        with _embedding_services_lock:
+            service = _embedding_services.get(model_name)
+            if service is None:
+                service = EmbeddingService(model_name)
+                _embedding_services[model_name] = service
+    return service
+
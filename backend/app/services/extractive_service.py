@@ -0,0 +1,70 @@
+"""
+Extractive answers for RAG.
+
+Instead of generating text with an LLM, ranks the sentences of the retrieved
+chunks by similarity to the question and returns the best ones. Runs locally
+in milliseconds, so it serves both as an explicit fast mode and as the
+fallback when the LLM is unavailable or too slow.
+"""
+from typing import List
+import re
+
+import numpy as np
+
+from app.services.embedding_service import EmbeddingService
+
+# Split after sentence punctuation or on line breaks
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Sentences shorter than this are usually headings or fragments
+MIN_SENTENCE_CHARS = 20
+
+# Cap on sentences embedded per answer, to keep latency bounded
+MAX_CANDIDATE_SENTENCES = 200
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a chunk into sentences, dropping very short fragments."""
+    sentences = [s.strip() for s in _SENTENCE_BOUNDARY.split(text)]
+    return [s for s in sentences if len(s) >= MIN_SENTENCE_CHARS]
+
+
+def extractive_answer(
+    question_embedding: List[float],
+    contexts: List[str],
+    embedder: EmbeddingService,
+    max_sentences: int = 3,
+) -> str:
+    """
+    Build an answer from the context sentences closest to the question.
+
+    Args:
+        question_embedding: Embedding of the question (same model as embedder)
+        contexts: Retrieved chunk texts, most relevant first
+        embedder: Embedding service used for the sentences
+        max_sentences: Number of sentences in the answer
+
+    Returns:
+        Selected sentences joined in their original reading order
+    """
+    sentences: List[str] = []
+    seen = set()
+    for context in contexts:
+        for sentence in split_sentences(context):
+            if sentence not in seen:
+                seen.add(sentence)
+                sentences.append(sentence)
+    sentences = sentences[:MAX_CANDIDATE_SENTENCES]
+
+    if not sentences:
+        return contexts[0].strip() if contexts else ""
+
+    vectors = embedder.generate_embeddings_array(sentences, normalize=True)
+    query = np.asarray(question_embedding, dtype=vectors.dtype)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    scores = vectors @ query
+    count = min(max_sentences, len(sentences))
+    best = np.argpartition(-scores, count - 1)[:count]
+
+    return " ".join(sentences[i] for i in sorted(best))
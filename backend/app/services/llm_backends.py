@@ -0,0 +1,210 @@
+"""
+Text generation backends for the LLM service.
+
+- huggingface: HuggingFace Inference API (needs HUGGINGFACE_API_KEY)
+- local:       small instruct model run on CPU with transformers
+- stub:        deterministic output after a fixed delay, for offline
+               development and load tests that should measure our own
+               overhead rather than inference time
+
+Select one with the LLM_BACKEND setting.
+"""
+from abc import ABC, abstractmethod
+from typing import Optional
+import hashlib
+import logging
+import threading
+import time
+
+from app.config import settings
+
+try:
+    from huggingface_hub import InferenceClient
+
+    HF_HUB_AVAILABLE = True
+except ImportError:  # pragma: no cover - import guard
+    HF_HUB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend(ABC):
+    """Interface implemented by every generation backend."""
+
+    model_name: str = ""
+
+    @abstractmethod
+    def generate(self, prompt: str, max_new_tokens: int = 256, temperature: float = 0.4) -> str:
+        """Generate a completion of the prompt."""
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens; backends without a tokenizer estimate by words."""
+        return len(text.split())
+
+
+class HuggingFaceInferenceBackend(LLMBackend):
+    """Generation through the HuggingFace Inference API."""
+
+    def __init__(self, model_name: Optional[str] = None) -> None:
+        if not settings.HUGGINGFACE_API_KEY:
+            raise RuntimeError(
+                "HUGGINGFACE_API_KEY is required for LLM generation. "
+                "Set it in your .env file, or use LLM_BACKEND=local or stub."
+            )
+        if not HF_HUB_AVAILABLE:
+            raise ImportError(
+                "huggingface-hub is required. Install with: pip install huggingface-hub"
+            )
+
+        self.model_name = model_name or settings.HUGGINGFACE_LLM_MODEL
+        self.client = InferenceClient(token=settings.HUGGINGFACE_API_KEY)
+
+        # Tokenizer for token accounting, loaded on first use
+        self._tokenizer = None
+        self._tokenizer_failed = False
+        self._tokenizer_lock = threading.Lock()
+
+    def generate(self, prompt: str, max_new_tokens: int = 256, temperature: float = 0.4) -> str:
+        response = self.client.text_generation(
+            model=self.model_name,
+            prompt=prompt,
+            max_new_tokens=max_new_tokens,
+            temperature=temperature,
+        )
+
+        # InferenceClient.text_generation can return a string or object depending on version
+        if isinstance(response, str):
+            return response.strip()
+
+        text = getattr(response, "generated_text", None)
+        if text:
+            return text.strip()
+
+        return str(response).strip()
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count tokens with the model's own tokenizer.
+
+        Falls back to a word count if the tokenizer cannot be loaded
+        (e.g. transformers missing or no access to the model repo).
+        """
+        tokenizer = self._get_tokenizer()
+        if tokenizer is None:
+            return super().count_tokens(text)
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    def _get_tokenizer(self):
+        if self._tokenizer is not None or self._tokenizer_failed:
+            return self._tokenizer
+
+        with self._tokenizer_lock:
+            if self._tokenizer is None and not self._tokenizer_failed:
+                try:
+                    from transformers import AutoTokenizer
+
+                    self._tokenizer = AutoTokenizer.from_pretrained(
+                        self.model_name,
+                        token=settings.HUGGINGFACE_API_KEY or None,
+                    )
+                except Exception as e:
+                    logger.warning(f"Tokenizer for {self.model_name} unavailable ({e}), estimating tokens by words")
+                    self._tokenizer_failed = True
+
+        return self._tokenizer
+
+
+class LocalTransformersBackend(LLMBackend):
+    """Generation with a small model loaded locally (CPU by default)."""
+
+    def __init__(self, model_name: Optional[str] = None) -> None:
+        try:
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+        except ImportError:
+            raise ImportError(
+                "transformers and torch are required for LLM_BACKEND=local. "
+                "Install with: pip install transformers torch"
+            )
+
+        self.model_name = model_name or settings.LLM_LOCAL_MODEL
+        logger.info(f"Loading local LLM: {self.model_name}")
+
+        self._torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self.model = AutoModelForCausalLM.from_pretrained(self.model_name, torch_dtype=torch.float32)
+        self.model.eval()
+
+        # One generation at a time: the model is not safe to share across threads
+        self._lock = threading.Lock()
+        logger.info(f"✅ Local LLM loaded: {self.model_name}")
+
+    def generate(self, prompt: str, max_new_tokens: int = 256, temperature: float = 0.4) -> str:
+        if getattr(self.tokenizer, "chat_template", None):
+            text = self.tokenizer.apply_chat_template(
+                [{"role": "user", "content": prompt}],
+                tokenize=False,
+                add_generation_prompt=True,
+            )
+        else:
+            text = prompt
+
+        inputs = self.tokenizer(text, return_tensors="pt")
+        with self._lock, self._torch.no_grad():
+            output = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=temperature > 0,
+                temperature=temperature if temperature > 0 else None,
+                pad_token_id=self.tokenizer.eos_token_id,
+            )
+
+        generated = output[0][inputs["input_ids"].shape[1]:]
+        return self.tokenizer.decode(generated, skip_special_tokens=True).strip()
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic backend for offline use and load testing.
+
+    Sleeps for a fixed latency and returns text derived from the prompt, so
+    the same prompt always yields the same output.
+    """
+
+    def __init__(self, latency_ms: Optional[int] = None) -> None:
+        self.model_name = "stub"
+        self.latency = (settings.LLM_STUB_LATENCY_MS if latency_ms is None else latency_ms) / 1000.0
+
+    def generate(self, prompt: str, max_new_tokens: int = 256, temperature: float = 0.4) -> str:
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        words = prompt.split()
+        # Echo part of the prompt, bounded like a real generation
+        excerpt = " ".join(words[-min(len(words), max_new_tokens // 2, 40):])
+        return f"[stub {digest}] {excerpt}"
+
+
+BACKENDS = {
+    "huggingface": HuggingFaceInferenceBackend,
+    "local": LocalTransformersBackend,
+    "stub": StubBackend,
+}
+
+
+def create_llm_backend(name: Optional[str] = None) -> LLMBackend:
+    """
+    Create the backend named in settings (or the given name).
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    name = (name or settings.LLM_BACKEND).lower()
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Unknown LLM_BACKEND '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return backend_class()
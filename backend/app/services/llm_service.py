@@ -1,38 +1,86 @@
 """
-LLM service using HuggingFace for answer generation.
+LLM service for answer generation.
 
 This is used by the RAG pipeline to generate answers conditioned
-on retrieved note chunks.
+on retrieved note chunks. Generation itself is delegated to the backend
+selected by LLM_BACKEND (see llm_backends.py).
+
+Every call goes through a shared resilience layer: a token-bucket rate
+limiter, a circuit breaker that opens after consecutive failures or slow
+calls, and jittered exponential backoff for transient errors. When the
+circuit is open calls fail immediately with LLMUnavailableError, so
+callers can degrade instead of piling up behind a broken endpoint.
 """
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+import logging
+import random
+import threading
+import time
+
 from app.config import settings
+from app.services.llm_backends import LLMBackend, create_llm_backend
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying
+TRANSIENT_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Never sleep longer than this between retries, whatever Retry-After says
+MAX_RETRY_DELAY_SECONDS = 10.0
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when the LLM is not called because its circuit is open or the rate limit is exhausted."""
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Timeouts, connection errors, 429 and 5xx are retried; everything else is not."""
+    status = _status_code(exc)
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name
 
-try:
-    from huggingface_hub import InferenceClient
 
-    HF_HUB_AVAILABLE = True
-except ImportError:  # pragma: no cover - import guard
-    HF_HUB_AVAILABLE = False
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Seconds requested by a Retry-After header, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
 
 
 class LLMService:
-    """Service for generating answers using a HuggingFace text generation model."""
-
-    def __init__(self) -> None:
-        if not settings.HUGGINGFACE_API_KEY:
-            raise RuntimeError(
-                "HUGGINGFACE_API_KEY is required for LLM generation. "
-                "Set it in your .env file."
-            )
-        if not HF_HUB_AVAILABLE:
-            raise ImportError(
-                "huggingface-hub is required. Install with: pip install huggingface-hub"
-            )
-
-        # You can customize this to any instruct/chat model hosted on HuggingFace.
-        # For production, prefer a hosted inference endpoint or a smaller local model.
-        self.model_name = "mistralai/Mistral-7B-Instruct-v0.3"
-        self.client = InferenceClient(token=settings.HUGGINGFACE_API_KEY)
+    """Service for generating answers with the configured LLM backend."""
+
+    def __init__(self, backend: Optional[LLMBackend] = None) -> None:
+        self.backend = backend or create_llm_backend()
+        self.model_name = self.backend.model_name
+
+        self.rate_limiter = TokenBucket(
+            rate=settings.LLM_RATE_LIMIT_PER_SECOND,
+            capacity=settings.LLM_RATE_LIMIT_BURST,
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_BREAKER_RESET_SECONDS,
+            slow_call_seconds=settings.LLM_BREAKER_SLOW_CALL_SECONDS,
+        )
+        self._counters = {"calls": 0, "successes": 0, "failures": 0, "retries": 0, "rejected": 0, "rate_limited": 0}
+        self._counters_lock = threading.Lock()
 
     def build_prompt(self, question: str, contexts: List[str]) -> str:
         """Build a simple prompt combining context chunks and the question."""
@@ -51,36 +99,111 @@ class LLMService:
     def generate_answer(self, question: str, contexts: List[str]) -> str:
         """Generate an answer given a question and retrieved contexts."""
         prompt = self.build_prompt(question, contexts)
+        return self.generate_text(prompt, max_new_tokens=256)
 
-        response = self.client.text_generation(
-            model=self.model_name,
-            prompt=prompt,
-            max_new_tokens=256,
-            temperature=0.4,
-        )
-
-        # InferenceClient.text_generation can return a string or object depending on version
-        if isinstance(response, str):
-            return response.strip()
+    def generate_text(self, prompt: str, max_new_tokens: int = 256, temperature: float = 0.4) -> str:
+        """
+        Generate a completion for a raw prompt.
 
-        text = getattr(response, "generated_text", None)
-        if text:
-            return text.strip()
+        Raises:
+            LLMUnavailableError: If the circuit is open or the rate limit is exhausted
+        """
+        return self._call(
+            lambda: self.backend.generate(prompt, max_new_tokens=max_new_tokens, temperature=temperature)
+        )
 
-        return str(response).strip()
+    def count_tokens(self, text: str) -> int:
+        """Count tokens as the backend's model sees them."""
+        return self.backend.count_tokens(text)
+
+    def is_available(self) -> bool:
+        """False while the circuit is open; callers should degrade instead of calling."""
+        return not self.breaker.is_open()
+
+    def _call(self, fn: Callable[[], T]) -> T:
+        """Run one backend call under the rate limiter, circuit breaker and retry policy."""
+        max_retries = settings.LLM_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            # Breaker first: while it is open, calls are rejected without
+            # waiting for (and spending) a rate-limit token
+            if not self.breaker.allow_request():
+                self._count("rejected")
+                raise LLMUnavailableError(
+                    f"LLM circuit open, retry in {self.breaker.retry_after():.0f}s"
+                )
+            if not self.rate_limiter.acquire(timeout=settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS):
+                self.breaker.cancel_request()
+                self._count("rate_limited")
+                raise LLMUnavailableError("LLM rate limit exhausted")
+
+            self._count("calls")
+            started = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                if not _is_transient(e):
+                    # The endpoint answered; the request itself was bad
+                    self.breaker.record_success(time.monotonic() - started)
+                    self._count("failures")
+                    raise
+
+                self.breaker.record_failure()
+                if attempt >= max_retries or self.breaker.is_open():
+                    self._count("failures")
+                    raise
+
+                # Full jitter, but never sooner than the server asked for
+                delay = random.uniform(0, settings.LLM_RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+                delay = min(max(delay, _retry_after(e) or 0.0), MAX_RETRY_DELAY_SECONDS)
+                self._count("retries")
+                logger.warning(f"Transient LLM error ({e}), retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            self.breaker.record_success(time.monotonic() - started)
+            self._count("successes")
+            return result
+
+        raise LLMUnavailableError("LLM retries exhausted")  # pragma: no cover - loop always returns or raises
+
+    def _count(self, name: str):
+        with self._counters_lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Resilience state and call counters, for the metrics endpoint."""
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return {
+            "backend": type(self.backend).__name__,
+            "model_name": self.model_name,
+            "circuit": self.breaker.stats(),
+            "rate_limiter_tokens": round(self.rate_limiter.available, 2),
+            **counters,
+        }
 
 
 # Global LLM service instance (lazy init)
 _llm_service: LLMService | None = None
+_llm_service_lock = threading.Lock()
 
 
 def get_llm_service() -> LLMService:
     """Get or create a global LLM service instance."""
     global _llm_service
     if _llm_service is None:
-        _llm_service = LLMService()
+        with _llm_service_lock:
+            if _llm_service is None:
+                _llm_service = LLMService()
     return _llm_service
 
+
+def llm_metrics() -> Dict[str, Any]:
+    """LLM metrics without creating the service if nothing has used it yet."""
+    if _llm_service is None:
+        return {"initialized": False}
+    return {"initialized": True, **_llm_service.stats()}
+
 {
   "cells": [],
   "metadata": {
@@ -0,0 +1,454 @@
+"""
+Server-side AI summaries for notes, chapters and notebooks.
+
+Note summaries are generated from the note corpus. For long notes only the
+most salient chunks are sent to the LLM: they are picked from the chunk
+embeddings already stored for RAG (closest to the note centroid, with MMR
+for diversity), so the prompt stays small without re-embedding anything.
+
+Chapter and notebook summaries roll up from the summaries one level below
+instead of re-reading raw note content.
+"""
+from typing import Dict, List, Optional, Set
+import logging
+import threading
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+
+from app.database import SessionLocal
+from app.models.note import Note
+from app.models.chapter import Chapter
+from app.models.notebook import Notebook
+from app.services.llm_service import get_llm_service
+from app.services.rag_service import RAGService
+from app.services.summary_cache import summary_cache, content_key
+from app.utils.rate_limiter import TokenBucket
+from app.utils.ttl_cache import TTLCache
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompts change so cached summaries are not reused
+NOTE_SUMMARY_PROMPT_VERSION = "v1"
+
+NOTE_SUMMARY_TOKENS = 300
+ROLLUP_SUMMARY_TOKENS = 400
+
+# Relevance vs. diversity trade-off for salient chunk selection
+MMR_LAMBDA = 0.7
+
+# A bucket idle for its refill time is full again, so it is dropped then and
+# recreated full on next use (no budget is lost or gained)
+_rate = settings.AI_NOTE_SUMMARIES_PER_MINUTE
+_user_buckets = TTLCache(maxsize=10000, ttl=60.0 * max(1.0, _rate) / _rate if _rate > 0 else 3600.0)
+_user_buckets_lock = threading.Lock()
+
+
+def user_throttle(user_id: int) -> TokenBucket:
+    """Get the per-user token bucket for summary generation."""
+    with _user_buckets_lock:
+        bucket = _user_buckets.get(user_id)
+        if bucket is None:
+            rate = settings.AI_NOTE_SUMMARIES_PER_MINUTE
+            bucket = TokenBucket(rate=rate / 60.0, capacity=max(1.0, rate))
+        # Every use restarts the idle timer
+        _user_buckets.set(user_id, bucket)
+        return bucket
+
+
+def reserve_summary_job(user_id: int) -> bool:
+    """
+    Take one unit of the user's summary budget for a job about to be queued.
+
+    The job passes the reservation on (`reserved=1`), so its first LLM call
+    is not charged twice. Returns False when the user is over budget.
+    """
+    return user_throttle(user_id).try_acquire()
+
+
+def select_salient_chunks(
+    chunks: List[str],
+    embeddings: List[List[float]],
+    budget_chars: int,
+    mmr_lambda: float = MMR_LAMBDA
+) -> List[int]:
+    """
+    Pick representative chunks within a character budget.
+
+    Chunks are ranked by maximal marginal relevance: similarity to the note
+    centroid minus similarity to chunks already picked.
+
+    Args:
+        chunks: Chunk texts
+        embeddings: One vector per chunk
+        budget_chars: Maximum total characters to select
+        mmr_lambda: Weight of relevance vs. redundancy (1 = relevance only)
+
+    Returns:
+        Indices of the selected chunks, in document order
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    centroid = vectors.mean(axis=0)
+    centroid /= np.linalg.norm(centroid) + 1e-12
+    relevance = vectors @ centroid
+
+    selected: List[int] = []
+    remaining = list(range(len(chunks)))
+    used = 0
+    while remaining:
+        if selected:
+            redundancy = (vectors[remaining] @ vectors[selected].T).max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining), dtype=np.float32)
+        scores = mmr_lambda * relevance[remaining] - (1 - mmr_lambda) * redundancy
+        best = remaining.pop(int(np.argmax(scores)))
+
+        if used + len(chunks[best]) > budget_chars and selected:
+            continue
+        selected.append(best)
+        used += len(chunks[best])
+
+    return sorted(selected)
+
+
+class NoteSummaryService:
+    """Generates and stores ai_summary for notes, chapters and notebooks."""
+
+    def __init__(self, db: Session, reserved: int = 0):
+        """
+        Args:
+            db: Database session
+            reserved: Throttle tokens already taken for this work (by
+                reserve_summary_job); used before charging the bucket again
+        """
+        self.db = db
+        self.rag_service = RAGService(db)
+        self.reserved = reserved
+
+    # -------------------------
+    # Notes
+    # -------------------------
+    def summarize_note(self, note: Note, owner_id: int, block: bool = True) -> Optional[str]:
+        """
+        Generate and store a note's summary and mark it as AI-structured.
+
+        Args:
+            note: Note with contents loaded
+            owner_id: Owner of the note (for throttling)
+            block: Wait (up to AI_NOTE_SUMMARY_MAX_WAIT_SECONDS) for the
+                owner's throttle instead of giving up at once
+
+        Returns:
+            The summary, or None if the note has no text or was throttled
+        """
+        context = self.build_note_context(note)
+        if not context:
+            return None
+
+        prompt = (
+            "You are organizing an engineering student's notes. "
+            "Summarize the note below in a short paragraph followed by 3-5 bullet points "
+            "with the key concepts. Use only information from the note.\n\n"
+            f"Note:\n{context}\n\n"
+            "Summary:"
+        )
+        summary = self._generate(prompt, NOTE_SUMMARY_TOKENS, owner_id, block)
+        if summary is None:
+            return None
+
+        note.ai_summary = summary
+        note.is_ai_structured = True
+        self.db.commit()
+        return summary
+
+    def build_note_context(self, note: Note) -> str:
+        """
+        Build the text sent to the LLM for a note.
+
+        Short notes are used as is. Longer notes are reduced to their most
+        salient chunks using the embeddings stored in the active table. The
+        note is (re)indexed first when its stored chunks are missing or no
+        longer match its current text (edits do not re-index).
+        """
+        corpus = self.rag_service.build_note_corpus(note)
+        budget = settings.AI_NOTE_SUMMARY_CONTEXT_CHARS
+        if len(corpus) <= budget:
+            return corpus.strip()
+
+        table_name = self.rag_service.vector_service.get_active_model()["table_name"]
+        stored = self.rag_service.vector_service.get_note_chunk_vectors(note.id, table_name)
+        chunks = self.rag_service.chunk_note(note)
+        if [c["content_text"] for c in stored] != chunks:
+            self.rag_service.index_note(note)
+            stored = self.rag_service.vector_service.get_note_chunk_vectors(note.id, table_name)
+        if [c["content_text"] for c in stored] != chunks:
+            return corpus[:budget]
+
+        picked = select_salient_chunks(chunks, [c["embedding"] for c in stored], budget)
+        return "\n\n[...]\n\n".join(chunks[i] for i in picked)
+
+    # -------------------------
+    # Roll-ups
+    # -------------------------
+    def summarize_chapter(self, chapter: Chapter, owner_id: int, block: bool = True) -> Optional[str]:
+        """
+        Roll a chapter summary up from its note summaries.
+
+        Notes without a summary are summarized first.
+        """
+        items = []
+        for note in chapter.notes:
+            summary = note.ai_summary
+            if not summary:
+                summary = self.summarize_note(note, owner_id, block)
+            if summary:
+                items.append((note.title, summary))
+
+        summary = self._roll_up("chapter", chapter.title, "note", items, owner_id, block)
+        if summary is not None:
+            chapter.ai_summary = summary
+            self.db.commit()
+        return summary
+
+    def summarize_notebook(self, notebook: Notebook, block: bool = True) -> Optional[str]:
+        """
+        Roll a notebook summary up from its chapter summaries.
+
+        Chapters without a summary are rolled up first.
+        """
+        items = []
+        for chapter in notebook.chapters:
+            summary = chapter.ai_summary
+            if not summary:
+                summary = self.summarize_chapter(chapter, notebook.owner_id, block)
+            if summary:
+                items.append((chapter.title, summary))
+
+        summary = self._roll_up("subject", notebook.title, "chapter", items, notebook.owner_id, block)
+        if summary is not None:
+            notebook.ai_summary = summary
+            self.db.commit()
+        return summary
+
+    def _roll_up(
+        self,
+        level: str,
+        title: str,
+        child_level: str,
+        items: List[tuple],
+        owner_id: int,
+        block: bool
+    ) -> Optional[str]:
+        """Combine child summaries, in groups first if they do not fit in one prompt."""
+        if not items:
+            return None
+
+        max_chars = settings.AI_SUMMARY_CHUNK_CHARS
+        while len(items) > 1 and sum(len(t) + len(s) for t, s in items) > max_chars:
+            groups: List[List[tuple]] = [[]]
+            size = 0
+            for item in items:
+                item_size = len(item[0]) + len(item[1])
+                if groups[-1] and size + item_size > max_chars:
+                    groups.append([])
+                    size = 0
+                groups[-1].append(item)
+                size += item_size
+            if len(groups) == len(items):
+                break
+
+            merged = []
+            for group in groups:
+                summary = self._generate(
+                    self._rollup_prompt(level, title, child_level, group),
+                    ROLLUP_SUMMARY_TOKENS, owner_id, block
+                )
+                if summary is None:
+                    return None
+                merged.append((f"{group[0][0]} - {group[-1][0]}", summary))
+            items = merged
+
+        return self._generate(
+            self._rollup_prompt(level, title, child_level, items),
+            ROLLUP_SUMMARY_TOKENS, owner_id, block
+        )
+
+    @staticmethod
+    def _rollup_prompt(level: str, title: str, child_level: str, items: List[tuple]) -> str:
+        sections = "\n\n".join(f"[{child_level.title()}: {t}]\n{s}" for t, s in items)
+        return (
+            f"Below are summaries of each {child_level} in the {level} \"{title}\" "
+            "from an engineering student's notes. Write an overview of the whole "
+            f"{level}: a short paragraph followed by the main topics as bullet points. "
+            "Use only information from the summaries.\n\n"
+            f"{sections}\n\n"
+            "Overview:"
+        )
+
+    def _generate(self, prompt: str, max_new_tokens: int, owner_id: int, block: bool) -> Optional[str]:
+        """Generate text through the summary cache and the owner's throttle."""
+        llm = get_llm_service()
+        key = content_key(NOTE_SUMMARY_PROMPT_VERSION, llm.model_name, prompt)
+        cached = summary_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self.reserved > 0:
+            self.reserved -= 1
+        else:
+            bucket = user_throttle(owner_id)
+            # Bounded wait: a job never sleeps long or runs the bucket into debt
+            timeout = settings.AI_NOTE_SUMMARY_MAX_WAIT_SECONDS if block else 0.0
+            if not bucket.acquire(timeout=timeout):
+                logger.info(f"Summary for user {owner_id} dropped: over the summary throttle")
+                return None
+
+        text = llm.generate_text(prompt, max_new_tokens=max_new_tokens)
+        summary_cache.set(key, text)
+        return text
+
+    # -------------------------
+    # Batch job
+    # -------------------------
+    def run_batch(
+        self,
+        batch_size: int = 50,
+        max_batches: Optional[int] = None,
+        refresh: bool = False,
+        owner_id: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Summarize notes in batches, then roll up the chapters and notebooks touched.
+
+        Users over their throttle are skipped rather than waited for; their
+        notes stay unstructured and are picked up by the next run.
+
+        Args:
+            batch_size: Notes loaded per batch
+            max_batches: Stop after this many batches (None = until done)
+            refresh: Re-summarize notes that already have a summary
+            owner_id: Only process this user's notes
+
+        Returns:
+            Dict with summarized, skipped and deferred note counts and rolled-up chapters/notebooks
+        """
+        stats = {"summarized": 0, "skipped": 0, "deferred": 0, "chapters": 0, "notebooks": 0}
+        touched_chapters: Set[int] = set()
+        touched_notebooks: Set[int] = set()
+
+        after_id = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            query = (
+                self.db.query(Note, Notebook.owner_id, Chapter.notebook_id)
+                .join(Chapter, Note.chapter_id == Chapter.id)
+                .join(Notebook, Chapter.notebook_id == Notebook.id)
+                .options(selectinload(Note.contents))
+                .filter(Note.id > after_id)
+            )
+            if not refresh:
+                query = query.filter(or_(Note.is_ai_structured.isnot(True), Note.ai_summary.is_(None)))
+            if owner_id is not None:
+                query = query.filter(Notebook.owner_id == owner_id)
+
+            rows = query.order_by(Note.id).limit(batch_size).all()
+            if not rows:
+                break
+            after_id = rows[-1][0].id
+
+            for note, note_owner_id, notebook_id in rows:
+                try:
+                    summary = self.summarize_note(note, note_owner_id, block=False)
+                except Exception as e:
+                    self.db.rollback()
+                    logger.warning(f"Summary failed for note {note.id}: {e}")
+                    stats["skipped"] += 1
+                    continue
+
+                if summary is not None:
+                    stats["summarized"] += 1
+                    touched_chapters.add(note.chapter_id)
+                    touched_notebooks.add(notebook_id)
+                elif self.rag_service.build_note_corpus(note).strip():
+                    stats["deferred"] += 1
+                else:
+                    stats["skipped"] += 1
+
+            batches += 1
+            logger.info(
+                f"Note summaries: {stats['summarized']} summarized, "
+                f"{stats['deferred']} deferred (throttled), {stats['skipped']} skipped"
+            )
+
+        for chapter in self._load_chapters(touched_chapters):
+            if self.summarize_chapter(chapter, chapter.notebook.owner_id, block=False) is not None:
+                stats["chapters"] += 1
+        for notebook in self._load_notebooks(touched_notebooks):
+            if self.summarize_notebook(notebook, block=False) is not None:
+                stats["notebooks"] += 1
+
+        return stats
+
+    def _load_chapters(self, chapter_ids: Set[int]) -> List[Chapter]:
+        if not chapter_ids:
+            return []
+        return (
+            self.db.query(Chapter)
+            .options(selectinload(Chapter.notebook), selectinload(Chapter.notes).selectinload(Note.contents))
+            .filter(Chapter.id.in_(chapter_ids))
+            .all()
+        )
+
+    def _load_notebooks(self, notebook_ids: Set[int]) -> List[Notebook]:
+        if not notebook_ids:
+            return []
+        return (
+            self.db.query(Notebook)
+            .options(selectinload(Notebook.chapters).selectinload(Chapter.notes).selectinload(Note.contents))
+            .filter(Notebook.id.in_(notebook_ids))
+            .all()
+        )
+
+
+# -------------------------
+# Background task entry points (own session: the request's is closed by then)
+# -------------------------
+def summarize_note_job(note_id: int, owner_id: int):
+    db = SessionLocal()
+    try:
+        note = db.query(Note).options(selectinload(Note.contents)).filter(Note.id == note_id).first()
+        if note:
+            NoteSummaryService(db, reserved=1).summarize_note(note, owner_id)
+    except Exception as e:
+        logger.error(f"Failed to summarize note {note_id}: {e}")
+    finally:
+        db.close()
+
+
+def summarize_chapter_job(chapter_id: int, owner_id: int):
+    db = SessionLocal()
+    try:
+        service = NoteSummaryService(db, reserved=1)
+        chapters = service._load_chapters({chapter_id})
+        if chapters:
+            service.summarize_chapter(chapters[0], owner_id)
+    except Exception as e:
+        logger.error(f"Failed to summarize chapter {chapter_id}: {e}")
+    finally:
+        db.close()
+
+
+def summarize_notebook_job(notebook_id: int):
+    db = SessionLocal()
+    try:
+        service = NoteSummaryService(db, reserved=1)
+        notebooks = service._load_notebooks({notebook_id})
+        if notebooks:
+            service.summarize_notebook(notebooks[0])
+    except Exception as e:
+        logger.error(f"Failed to summarize notebook {notebook_id}: {e}")
+    finally:
+        db.close()
@@ -45,7 +45,7 @@ class NotificationService:
             if resource_id:
                 data["resource_id"] = resource_id
             
-            result = supabase_db.service_client.table("notifications").insert(data).execute()
+            result = await supabase_db.service_async.table("notifications").insert(data).execute()
             
             if result.data:
                 logger.info(f"✅ Notification created for user {user_id}")
@@ -100,7 +100,7 @@ class NotificationService:
     async def mark_as_read(self, notification_id: str, user_id: str) -> bool:
         """Mark a notification as read."""
         try:
-            result = supabase_db.service_client.table("notifications").update({"is_read": True}).eq("id", notification_id).eq("user_id", user_id).execute()
+            result = await supabase_db.service_async.table("notifications").update({"is_read": True}).eq("id", notification_id).eq("user_id", user_id).execute()
             return bool(result.data)
         except Exception as e:
             logger.error(f"Failed to mark notification as read: {e}")
@@ -109,7 +109,7 @@ class NotificationService:
     async def mark_all_as_read(self, user_id: str) -> bool:
         """Mark all notifications as read for a user."""
         try:
-            result = supabase_db.service_client.table("notifications").update({"is_read": True}).eq("user_id", user_id).eq("is_read", False).execute()
+            result = await supabase_db.service_async.table("notifications").update({"is_read": True}).eq("user_id", user_id).eq("is_read", False).execute()
             return True
         except Exception as e:
             logger.error(f"Failed to mark all notifications as read: {e}")
@@ -0,0 +1,163 @@
+"""
+Cache for the user profile fields used by auth and role checks.
+
+Only id, role, full_name and avatar_url are cached: enough for role checks
+and notification text. Entries live in a per-process LRU and, when Redis is
+reachable, in Redis so all workers share them. The local tier has a
+shorter TTL than Redis so an invalidation from another worker is seen
+quickly.
+
+Profiles are edited outside this API (through Supabase directly), so the
+TTLs bound how long a role or name change can take to show up; code that
+changes a profile here must call `profile_cache.invalidate`. Checks that
+cannot tolerate that delay (admin access) load the profile uncached.
+
+`get_async` goes through the asyncio Redis client so a slow Redis never
+blocks the event loop.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+import json
+import logging
+
+from app.config import settings
+from app.core.redis_client import get_redis, get_async_redis
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "profile:"
+PROFILE_COLUMNS = "id, role, full_name, avatar_url"
+
+
+class ProfileCache:
+    """Two-tier (local LRU + optional Redis) cache of user profiles."""
+
+    def __init__(self, ttl: float, local_ttl: float, local_maxsize: int = 10000):
+        self.ttl = ttl
+        self._local = TTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.redis_hits = 0
+        self.loads = 0
+
+    def get(self, user_id: str, loader: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached profile, loading and caching it on a miss.
+
+        Args:
+            user_id: User ID
+            loader: Fetches the profile (PROFILE_COLUMNS) from the database
+
+        Returns:
+            Profile dict, or None if the loader found no profile
+        """
+        profile = self._local.get(user_id)
+        if profile is not None:
+            return profile
+
+        profile = self._get_shared(user_id)
+        if profile is not None:
+            self.redis_hits += 1
+            self._local.set(user_id, profile)
+            return profile
+
+        self.loads += 1
+        profile = loader(user_id)
+        if profile is not None:
+            self.set(user_id, profile)
+        return profile
+
+    async def get_async(
+        self,
+        user_id: str,
+        loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        """Like get, with an async loader (and the asyncio Redis client)."""
+        profile = self._local.get(user_id)
+        if profile is not None:
+            return profile
+
+        profile = await self._get_shared_async(user_id)
+        if profile is not None:
+            self.redis_hits += 1
+            self._local.set(user_id, profile)
+            return profile
+
+        self.loads += 1
+        profile = await loader(user_id)
+        if profile is not None:
+            await self.set_async(user_id, profile)
+        return profile
+
+    def set(self, user_id: str, profile: Dict[str, Any]):
+        self._local.set(user_id, profile)
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.set(KEY_PREFIX + user_id, json.dumps(profile), ex=int(self.ttl))
+        except Exception as e:
+            logger.warning(f"Profile cache write failed: {e}")
+
+    async def set_async(self, user_id: str, profile: Dict[str, Any]):
+        """Like set, without blocking the event loop on Redis."""
+        self._local.set(user_id, profile)
+
+        client = await get_async_redis()
+        if client is None:
+            return
+        try:
+            await client.set(KEY_PREFIX + user_id, json.dumps(profile), ex=int(self.ttl))
+        except Exception as e:
+            logger.warning(f"Profile cache write failed: {e}")
+
+    def invalidate(self, user_id: str):
+        """Drop a profile from both tiers (call after changing it)."""
+        self._local.delete(user_id)
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.delete(KEY_PREFIX + user_id)
+        except Exception as e:
+            logger.warning(f"Profile cache invalidation failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        local = self._local.stats()
+        lookups = local["hits"] + local["misses"]
+        return {
+            **local,
+            "redis_hits": self.redis_hits,
+            "loads": self.loads,
+            # Lookups served by either tier
+            "overall_hit_rate": (local["hits"] + self.redis_hits) / lookups if lookups else 0.0,
+        }
+
+    def _get_shared(self, user_id: str) -> Optional[Dict[str, Any]]:
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            value = client.get(KEY_PREFIX + user_id)
+        except Exception as e:
+            logger.warning(f"Profile cache read failed: {e}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    async def _get_shared_async(self, user_id: str) -> Optional[Dict[str, Any]]:
+        client = await get_async_redis()
+        if client is None:
+            return None
+        try:
+            value = await client.get(KEY_PREFIX + user_id)
+        except Exception as e:
+            logger.warning(f"Profile cache read failed: {e}")
+            return None
+        return json.loads(value) if value is not None else None
+
+
+# Global profile cache instance
+profile_cache = ProfileCache(
+    ttl=settings.PROFILE_CACHE_TTL_SECONDS,
+    local_ttl=settings.PROFILE_CACHE_LOCAL_TTL_SECONDS,
+)
@@ -8,17 +8,42 @@ Pipeline:
 4. For a question, compute query embedding
 5. Retrieve similar chunks
 6. Ask LLM to answer using only retrieved chunks
+   (or extract the best sentences when the LLM is slow or unavailable)
 """
 
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, AsyncIterator
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import asyncio
+import hashlib
+import logging
+import threading
 
 from sqlalchemy.orm import Session
 
 from app.models.note import Note
 from app.models.note_content import NoteContent, ContentType
-from app.services.embedding_service import embedding_service
-from app.services.vector_service import VectorService
-from app.services.llm_service import get_llm_service
+from app.services.embedding_service import embedding_service, get_embedding_service
+from app.services.vector_service import VectorService, MODEL_STATUS_ACTIVE
+from app.services.llm_service import get_llm_service, LLMUnavailableError
+from app.services.extractive_service import extractive_answer
+from app.utils.single_flight import SingleFlight
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+NO_RESULTS_ANSWER = "I could not find relevant information in your notes."
+
+# LLM calls run here so a request can stop waiting once the deadline passes
+LLM_WORKERS = 8
+_llm_executor = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="rag-llm")
+
+# One slot per worker, held until the call actually finishes (a call past its
+# deadline keeps its thread). When all are taken we answer extractively
+# instead of queueing behind hung calls.
+_llm_slots = threading.Semaphore(LLM_WORKERS)
+
+# Concurrent index requests for the same note content share one embedding run
+_index_flight = SingleFlight()
 
 
 class RAGService:
@@ -64,30 +89,122 @@ class RAGService:
         """
         Index a note into pgvector.
 
+        While an embedding model migration is running the note is written to
+        both the active table and the table being backfilled. Concurrent calls
+        for the same note and content run the embedding only once; writes of
+        different content for the same note are serialized in
+        VectorService.store_embeddings.
+
         Returns:
             Number of chunks indexed
         """
-        # Prevent duplicates
-        self.vector_service.delete_embeddings_by_note_id(note.id)
+        chunks = self.chunk_note(note)
+        digest = hashlib.sha256("\x00".join(chunks).encode("utf-8")).hexdigest()
+
+        return _index_flight.do((note.id, digest), lambda: self._index_chunks(note.id, chunks))
 
+    def _index_chunks(self, note_id: int, chunks: List[str]) -> int:
+        count = 0
+        for target in self.vector_service.get_write_targets():
+            indexed = self.index_chunks_into(note_id, chunks, target)
+            if target["status"] == MODEL_STATUS_ACTIVE:
+                count = indexed
+
+        return count
+
+    def chunk_note(self, note: Note) -> List[str]:
+        """Split a note's corpus into chunks ready for embedding."""
         corpus = self.build_note_corpus(note)
         if not corpus.strip():
-            return 0
+            return []
+        return embedding_service.chunk_text(corpus)
 
-        chunks = embedding_service.chunk_text(corpus)
+    def index_chunks_into(
+        self,
+        note_id: int,
+        chunks: List[str],
+        target: Dict[str, Any],
+    ) -> int:
+        """
+        Replace a note's chunks in one embedding table.
 
-        count = 0
-        for idx, chunk in enumerate(chunks):
-            embedding = embedding_service.generate_embedding(chunk)
-            self.vector_service.store_embedding(
-                note_id=note.id,
-                content_text=chunk,
-                embedding=embedding,
-                metadata={"chunk_index": idx},
+        Args:
+            note_id: Note the chunks belong to
+            chunks: Chunk texts (empty removes the note from the table)
+            target: Registry entry (model_name, table_name) to write to
+
+        Returns:
+            Number of chunks stored
+        """
+        embeddings: List[List[float]] = []
+        if chunks:
+            service = get_embedding_service(target["model_name"])
+            embeddings = service.generate_embeddings_batch(chunks)
+
+        return self.vector_service.store_embeddings(
+            note_id=note_id,
+            chunks=chunks,
+            embeddings=embeddings,
+            table_name=target["table_name"],
+        )
+
+    # -------------------------
+    # Retrieval
+    # -------------------------
+    def retrieve(
+        self,
+        query_embedding: List[float],
+        *,
+        top_k: int = 5,
+        threshold: float = 0.6,
+        note_id: Optional[int] = None,
+        owner_id: Optional[int] = None,
+        hierarchical: Optional[bool] = None,
+        table_name: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the chunks most similar to a query embedding.
+
+        With hierarchical retrieval (and an owner), the owner's notes are first
+        ranked by centroid and only the chunks of the top
+        RAG_CENTROID_TOP_N notes are searched. Falls back to flat search when
+        there is no centroid table or no centroids for the owner yet
+        (notes indexed before centroids existed, until init_vector_db.py
+        rebuilds them). Either way only the owner's chunks are returned.
+
+        Returns:
+            Retrieved chunks with similarity scores
+        """
+        if table_name is None:
+            table_name = self.vector_service.get_active_model()["table_name"]
+        if hierarchical is None:
+            hierarchical = settings.RAG_HIERARCHICAL_RETRIEVAL
+
+        candidate_note_ids: Optional[List[int]] = None
+        if (
+            hierarchical
+            and owner_id is not None
+            and note_id is None
+            and self.vector_service.has_centroid_table(table_name)
+        ):
+            top_notes = self.vector_service.search_notes_by_centroid(
+                query_embedding=query_embedding,
+                owner_id=owner_id,
+                limit=settings.RAG_CENTROID_TOP_N,
+                table_name=table_name,
             )
-            count += 1
+            if top_notes:
+                candidate_note_ids = [n["note_id"] for n in top_notes]
 
-        return count
+        return self.vector_service.search_similar(
+            query_embedding=query_embedding,
+            limit=top_k,
+            note_id_filter=note_id,
+            threshold=threshold,
+            table_name=table_name,
+            note_ids=candidate_note_ids,
+            owner_id=owner_id,
+        )
 
     # -------------------------
     # Question Answering
@@ -99,32 +216,191 @@ class RAGService:
         top_k: int = 5,
         threshold: float = 0.6,
         note_id: Optional[int] = None,
-    ) -> Tuple[str, List[Dict[str, Any]]]:
+        owner_id: Optional[int] = None,
+        mode: str = "llm",
+    ) -> Tuple[str, List[Dict[str, Any]], str]:
         """
         Run full RAG pipeline.
 
+        In "llm" mode the answer is generated by the LLM; if the LLM is
+        unavailable (including while its circuit breaker is open) or misses
+        RAG_LLM_TIMEOUT_SECONDS, an extractive answer is returned instead. "fast" mode always answers extractively.
+
         Returns:
-            answer: LLM generated answer
+            answer: generated or extracted answer
             sources: retrieved chunks with similarity scores
+            mode: "llm" or "fast", depending on what produced the answer
         """
-        query_embedding = embedding_service.generate_embedding(question)
+        # Queries always use the active model and its table, even while a
+        # newer model is being backfilled.
+        active = self.vector_service.get_active_model()
+        embedder = get_embedding_service(active["model_name"])
+        query_embedding = embedder.generate_embedding(question)
 
-        results = self.vector_service.search_similar(
-            query_embedding=query_embedding,
-            limit=top_k,
-            note_id_filter=note_id,
+        results = self.retrieve(
+            query_embedding,
+            top_k=top_k,
             threshold=threshold,
+            note_id=note_id,
+            owner_id=owner_id,
+            table_name=active["table_name"],
         )
 
         if not results:
-            return "I could not find relevant information in your notes.", []
+            return NO_RESULTS_ANSWER, [], mode
 
         contexts = [r["content_text"] for r in results]
+        sources = self._format_sources(results)
+
+        if mode == "llm":
+            try:
+                llm = get_llm_service()
+                if not llm.is_available():
+                    raise LLMUnavailableError("LLM circuit open")
+                if not _llm_slots.acquire(blocking=False):
+                    raise LLMUnavailableError("All LLM workers busy")
+                future = _llm_executor.submit(llm.generate_answer, question, contexts)
+                future.add_done_callback(lambda _: _llm_slots.release())
+                return future.result(timeout=settings.RAG_LLM_TIMEOUT_SECONDS), sources, "llm"
+            except FutureTimeoutError:
+                logger.warning("LLM answer missed its deadline, falling back to extractive answer")
+            except LLMUnavailableError as e:
+                logger.info(f"{e}, answering extractively")
+            except Exception as e:
+                logger.warning(f"LLM unavailable ({e}), falling back to extractive answer")
 
-        llm = get_llm_service()
-        answer = llm.generate_answer(question, contexts)
+        answer = extractive_answer(query_embedding, contexts, embedder)
+        return answer, sources, "fast"
 
-        sources = [
+    # -------------------------
+    # Batch Question Answering
+    # -------------------------
+    def retrieve_batch(
+        self,
+        queries: List[Dict[str, Any]],
+        *,
+        owner_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve chunks for many questions at once.
+
+        All questions are embedded in a single batch and every search runs on
+        this service's session (one connection).
+
+        Args:
+            queries: Dicts with question, top_k, threshold, note_id and mode
+            owner_id: Owner of the notes being searched
+
+        Returns:
+            Per query (in input order): query_embedding, results and model_name
+        """
+        active = self.vector_service.get_active_model()
+        embedder = get_embedding_service(active["model_name"])
+        embeddings = embedder.generate_embeddings_batch([q["question"] for q in queries])
+
+        return [
+            {
+                "query_embedding": embedding,
+                "model_name": active["model_name"],
+                "results": self.retrieve(
+                    embedding,
+                    top_k=q["top_k"],
+                    threshold=q["threshold"],
+                    note_id=q.get("note_id"),
+                    owner_id=owner_id,
+                    table_name=active["table_name"],
+                ),
+            }
+            for q, embedding in zip(queries, embeddings)
+        ]
+
+    async def stream_batch_answers(
+        self,
+        queries: List[Dict[str, Any]],
+        retrievals: List[Dict[str, Any]],
+        *,
+        max_concurrency: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate answers for retrieved batches, yielding each one as soon as it is ready.
+
+        LLM calls run in worker threads, at most `max_concurrency` at a time,
+        with the same deadline and extractive fallback as answer_question.
+        A call that misses its deadline keeps its concurrency slot until its
+        thread returns, so hung calls cannot push the batch over the limit.
+        Does not touch the database, so it can outlive the request session.
+
+        Yields:
+            Dicts with index, answer, sources and mode, or index and error
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or settings.RAG_BATCH_LLM_CONCURRENCY)
+
+        def release_when_done(call: asyncio.Future) -> None:
+            # Release when the thread is done, not when we stop waiting
+            semaphore.release()
+            if not call.cancelled():
+                call.exception()  # Already handled (or abandoned) by answer_one
+
+        async def answer_one(index: int, query: Dict[str, Any], retrieval: Dict[str, Any]) -> Dict[str, Any]:
+            results = retrieval["results"]
+            mode = query.get("mode", "llm")
+            if not results:
+                return {"index": index, "answer": NO_RESULTS_ANSWER, "sources": [], "mode": mode}
+
+            contexts = [r["content_text"] for r in results]
+            sources = self._format_sources(results)
+
+            if mode == "llm":
+                try:
+                    await semaphore.acquire()
+                    try:
+                        llm = get_llm_service()
+                        if not llm.is_available():
+                            raise LLMUnavailableError("LLM circuit open")
+                        call = asyncio.ensure_future(
+                            asyncio.to_thread(llm.generate_answer, query["question"], contexts)
+                        )
+                    except BaseException:
+                        semaphore.release()
+                        raise
+                    call.add_done_callback(release_when_done)
+                    answer = await asyncio.wait_for(
+                        asyncio.shield(call), timeout=settings.RAG_LLM_TIMEOUT_SECONDS
+                    )
+                    return {"index": index, "answer": answer, "sources": sources, "mode": "llm"}
+                except asyncio.TimeoutError:
+                    logger.warning("LLM answer missed its deadline, falling back to extractive answer")
+                except LLMUnavailableError as e:
+                    logger.info(f"{e}, answering extractively")
+                except Exception as e:
+                    logger.warning(f"LLM unavailable ({e}), falling back to extractive answer")
+
+            try:
+                answer = await asyncio.to_thread(
+                    extractive_answer,
+                    retrieval["query_embedding"],
+                    contexts,
+                    get_embedding_service(retrieval["model_name"]),
+                )
+            except Exception as e:
+                return {"index": index, "error": f"RAG query failed: {str(e)}"}
+            return {"index": index, "answer": answer, "sources": sources, "mode": "fast"}
+
+        tasks = [
+            asyncio.create_task(answer_one(index, query, retrieval))
+            for index, (query, retrieval) in enumerate(zip(queries, retrievals))
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away: don't keep generating answers nobody reads
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _format_sources(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
             {
                 "note_id": r["note_id"],
                 "content_text": r["content_text"],
@@ -133,8 +409,6 @@ class RAGService:
             for r in results
         ]
 
-        return answer, sources
-
 
 # -------------------------
 # FastAPI dependency factory
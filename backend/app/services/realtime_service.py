@@ -0,0 +1,287 @@
+"""
+Real-time delivery of chat messages to WebSocket clients.
+
+send_message and send_community_message publish every new message to a
+Redis channel per conversation or community. Each worker keeps one pub/sub
+connection, subscribed only to the channels its connected clients follow,
+and fans incoming messages out to their queues, so a message reaches
+members connected to any worker.
+
+Leaving a community (or conversation) through the API calls `revoke`,
+which tells every worker, over a control channel, to drop the user's
+sockets from that channel. Memberships removed elsewhere are caught by
+the periodic re-check in app/api/realtime.py.
+
+Without Redis, messages are delivered within the process only (enough for
+a single worker); while clients are connected the gateway keeps retrying
+and picks Redis up once it becomes reachable.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Set
+import asyncio
+import json
+import logging
+
+from app.config import settings
+from app.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "chat:"
+
+# Membership revocations, followed by every worker with a pub/sub connection
+CONTROL_CHANNEL = f"{CHANNEL_PREFIX}control"
+
+# Give up on a Redis publish after this long and deliver locally, so a
+# stalled Redis never holds up send_message (seconds)
+PUBLISH_TIMEOUT = 2.0
+
+# While Redis is unreachable and clients are connected, retry the pub/sub
+# connection this often (seconds; get_async_redis adds its own backoff)
+RESUBSCRIBE_INTERVAL = 5.0
+
+
+def conversation_channel(conversation_id) -> str:
+    return f"{CHANNEL_PREFIX}conversation:{conversation_id}"
+
+
+def community_channel(community_id) -> str:
+    return f"{CHANNEL_PREFIX}community:{community_id}"
+
+
+def message_event(channel: str, message: Dict[str, Any]) -> str:
+    """
+    Wire format of a pushed message. `cursor` is what a client passes back
+    on reconnect to receive what it missed.
+    """
+    return json.dumps(
+        {"type": "message", "channel": channel, "cursor": message.get("created_at"), "message": message},
+        default=str,
+    )
+
+
+class Subscriber:
+    """Mailbox of one WebSocket connection."""
+
+    def __init__(self, user_id: str, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.channels: Set[str] = set()
+        # Set when the client fell too far behind; the connection is then
+        # closed and the client resumes from its cursor
+        self.overflowed = False
+
+    def deliver(self, event: str) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+
+class RealtimeGateway:
+    """Per-process fan-out of chat channels to WebSocket subscribers."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._reconnector: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """
+        Push a message to everyone following the channel, on any worker.
+        Never raises: a failed push only delays delivery until the client
+        next resumes or refetches.
+        """
+        event = message_event(channel, message)
+        self.published += 1
+        if not await self._publish(channel, event):
+            self._dispatch(channel, event)
+
+    async def revoke(self, user_id: str, channel: str) -> None:
+        """
+        Stop delivering the channel to the user's sockets, on any worker
+        (call after removing the user from the conversation or community).
+        """
+        event = json.dumps({"user_id": user_id, "channel": channel})
+        if not await self._publish(CONTROL_CHANNEL, event):
+            await self._handle_control(event)
+
+    async def subscribe(self, subscriber: Subscriber, channels: Iterable[str]) -> None:
+        first = []
+        for channel in channels:
+            if channel in subscriber.channels:
+                continue
+            if not self._subscribers[channel]:
+                first.append(channel)
+            self._subscribers[channel].add(subscriber)
+            subscriber.channels.add(channel)
+
+        pubsub = await self._ensure_pubsub()
+        if pubsub is None:
+            self._schedule_reconnect()
+        elif first:
+            try:
+                await pubsub.subscribe(*first)
+            except Exception as e:
+                logger.warning(f"Redis subscribe failed: {e}")
+
+    async def unsubscribe(self, subscriber: Subscriber, channels: Optional[Iterable[str]] = None) -> None:
+        """Stop following the given channels (all of the subscriber's by default)."""
+        last = []
+        for channel in list(channels if channels is not None else subscriber.channels):
+            subscriber.channels.discard(channel)
+            followers = self._subscribers.get(channel)
+            if followers is None:
+                continue
+            followers.discard(subscriber)
+            if not followers:
+                del self._subscribers[channel]
+                last.append(channel)
+
+        if self._pubsub is not None and last:
+            try:
+                await self._pubsub.unsubscribe(*last)
+            except Exception as e:
+                logger.warning(f"Redis unsubscribe failed: {e}")
+
+    def connect(self, user_id: str) -> Subscriber:
+        self.connections += 1
+        return Subscriber(user_id, settings.REALTIME_QUEUE_SIZE)
+
+    async def disconnect(self, subscriber: Subscriber) -> None:
+        self.connections -= 1
+        await self.unsubscribe(subscriber)
+
+    async def aclose(self) -> None:
+        """Stop the listener and release the pub/sub connection (call on shutdown)."""
+        if self._reconnector is not None:
+            self._reconnector.cancel()
+            self._reconnector = None
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": self.connections,
+            "channels": len(self._subscribers),
+            "redis": self._pubsub is not None,
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
+
+    async def _publish(self, channel: str, event: str) -> bool:
+        """
+        Publish through Redis. False if this worker must deliver the event
+        itself (Redis unreachable, or this worker not listening yet).
+        """
+        client = await get_async_redis()
+        if client is None:
+            return False
+        if self._pubsub is None and self._subscribers:
+            # Redis is back: start listening before the event goes out
+            await self._ensure_pubsub()
+        try:
+            await asyncio.wait_for(client.publish(channel, event), timeout=PUBLISH_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Publishing to {channel} failed, delivering locally: {e}")
+            return False
+        return self._pubsub is not None
+
+    def _dispatch(self, channel: str, event: str) -> None:
+        for subscriber in list(self._subscribers.get(channel, ())):
+            if subscriber.deliver(event):
+                self.delivered += 1
+            else:
+                self.overflows += 1
+
+    async def _handle_control(self, data: str) -> None:
+        event = json.loads(data)
+        channel = event["channel"]
+        for subscriber in list(self._subscribers.get(channel, ())):
+            if subscriber.user_id == event["user_id"]:
+                await self.unsubscribe(subscriber, [channel])
+                subscriber.deliver(json.dumps({"type": "unsubscribed", "channel": channel}))
+
+    async def _ensure_pubsub(self):
+        """
+        The worker's pub/sub connection, created on first use. The listener
+        is started only once the subscribe succeeded (reading a pub/sub
+        with no subscriptions raises).
+        """
+        if self._pubsub is not None:
+            return self._pubsub
+
+        async with self._lock:
+            if self._pubsub is not None:
+                return self._pubsub
+            client = await get_async_redis()
+            if client is None:
+                return None
+
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                # Plus channels followed while Redis was unreachable
+                await pubsub.subscribe(CONTROL_CHANNEL, *self._subscribers)
+            except Exception as e:
+                logger.warning(f"Redis subscribe failed: {e}")
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+                return None
+            self._pubsub = pubsub
+            self._listener = asyncio.create_task(self._listen(pubsub))
+            return pubsub
+
+    def _schedule_reconnect(self) -> None:
+        if not settings.REDIS_URL:
+            return
+        if self._reconnector is None or self._reconnector.done():
+            self._reconnector = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        """Retry the pub/sub connection while clients are connected without it."""
+        while self._pubsub is None and self._subscribers:
+            await asyncio.sleep(RESUBSCRIBE_INTERVAL)
+            await self._ensure_pubsub()
+
+    async def _listen(self, pubsub) -> None:
+        while True:
+            try:
+                message = await pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py reconnects and resubscribes on the next read
+                logger.warning(f"Redis pub/sub read failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            if message["channel"] == CONTROL_CHANNEL:
+                try:
+                    await self._handle_control(message["data"])
+                except Exception as e:
+                    logger.warning(f"Bad realtime control event: {e}")
+            else:
+                self._dispatch(message["channel"], message["data"])
+
+
+# Global gateway instance
+realtime_gateway = RealtimeGateway()
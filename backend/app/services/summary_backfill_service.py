@@ -0,0 +1,199 @@
+"""
+Backfill AI summaries for approved resources that never got one.
+
+Summaries are normally generated by request background tasks, which are
+lost when a worker dies or the LLM is down. This job finds the gaps with a
+single anti-join and fills them in batches. It is resumable by design:
+resources that already have a summary drop out of the anti-join, so a rerun
+continues where the previous one stopped.
+"""
+from typing import Dict, Any, List, Optional
+import asyncio
+import json
+import logging
+import math
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.ai_service import ai_service, PARTIAL_SUMMARY_TOKENS
+from app.utils.rate_limiter import TokenBucket
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Resources with shorter descriptions are not summarized (same rule as upload)
+MIN_CONTENT_CHARS = 50
+
+# Rough tokenizer-free estimate used for dry runs
+CHARS_PER_TOKEN = 4
+PROMPT_OVERHEAD_TOKENS = 60
+
+_MISSING_FILTER = """
+    FROM resources r
+    LEFT JOIN ai_summaries s ON s.resource_id = r.id
+    WHERE s.id IS NULL
+      AND r.is_approved = true
+      AND length(r.description) > :min_chars
+"""
+
+
+class SummaryBackfillService:
+    """Generates missing resource summaries with bounded concurrency."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def find_missing(self, limit: int, after_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch the next page of approved resources without a summary.
+        
+        Args:
+            limit: Page size
+            after_id: Keyset cursor (last resource id of the previous page)
+            
+        Returns:
+            List of dicts with id and description, ordered by id
+        """
+        cursor_filter = "AND r.id > CAST(:after_id AS uuid)" if after_id else ""
+        rows = self.db.execute(
+            text(f"""
+                SELECT r.id::text AS id, r.description
+                {_MISSING_FILTER}
+                {cursor_filter}
+                ORDER BY r.id
+                LIMIT :limit
+            """),
+            {"min_chars": MIN_CONTENT_CHARS, "after_id": after_id, "limit": limit},
+        ).mappings().all()
+        return [dict(row) for row in rows]
+    
+    def estimate(self, max_length: int = 500) -> Dict[str, Any]:
+        """
+        Report how many resources a run would summarize and the expected token cost.
+        
+        Returns:
+            Dict with resources, total_chars and estimated_tokens
+        """
+        chunk_chars = settings.AI_SUMMARY_CHUNK_CHARS
+        row = self.db.execute(
+            text(f"""
+                SELECT COUNT(*) AS resources,
+                       COALESCE(SUM(length(r.description)), 0) AS total_chars,
+                       COALESCE(SUM(CEIL(length(r.description)::float / :chunk_chars)), 0) AS chunks
+                {_MISSING_FILTER}
+            """),
+            {"min_chars": MIN_CONTENT_CHARS, "chunk_chars": chunk_chars},
+        ).mappings().one()
+        
+        resources = int(row["resources"])
+        chunks = int(row["chunks"])
+        multi_chunk_extra = max(0, chunks - resources)
+        
+        prompt_tokens = row["total_chars"] / CHARS_PER_TOKEN + chunks * PROMPT_OVERHEAD_TOKENS
+        output_tokens = resources * ai_service._summary_token_budget(max_length)
+        # Long resources also pay for partial summaries, once written and once read back
+        partial_tokens = multi_chunk_extra * PARTIAL_SUMMARY_TOKENS * 2
+        
+        return {
+            "resources": resources,
+            "total_chars": int(row["total_chars"]),
+            "estimated_tokens": math.ceil(prompt_tokens + output_tokens + partial_tokens),
+        }
+    
+    async def run(
+        self,
+        batch_size: int = 20,
+        concurrency: int = 4,
+        requests_per_minute: float = 30.0,
+        max_batches: Optional[int] = None,
+        max_length: int = 500,
+    ) -> Dict[str, int]:
+        """
+        Summarize missing resources page by page.
+        
+        Each page is summarized concurrently (at most `concurrency` at once,
+        started no faster than `requests_per_minute`) and written with one
+        batched insert. Failures are logged and left for the next run; the
+        run stops early if the LLM circuit breaker opens.
+        
+        Returns:
+            Dict with processed, stored and failed counts
+        """
+        if not ai_service.enabled:
+            raise RuntimeError("AI service is disabled; cannot generate summaries")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        limiter = TokenBucket(rate=requests_per_minute / 60.0, capacity=concurrency)
+        stats = {"processed": 0, "stored": 0, "failed": 0}
+        
+        async def summarize(resource: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                await limiter.acquire_async()
+                try:
+                    summary, tokens = await ai_service.summarize(resource["description"], max_length)
+                except Exception as e:
+                    logger.warning(f"Summary failed for resource {resource['id']}: {e}")
+                    return None
+            return {
+                "resource_id": resource["id"],
+                "summary": summary,
+                "model_used": ai_service.llm_service.model_name,
+                "tokens_used": tokens,
+                "confidence_score": 0.85,
+            }
+        
+        after_id = None
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            if not ai_service.llm_service.is_available():
+                logger.warning("LLM circuit open, stopping summary backfill; rerun to resume")
+                break
+            
+            resources = await asyncio.to_thread(self.find_missing, batch_size, after_id)
+            if not resources:
+                break
+            after_id = resources[-1]["id"]
+            
+            results = await asyncio.gather(*[summarize(r) for r in resources])
+            rows = [row for row in results if row is not None]
+            stored = await asyncio.to_thread(self.store, rows)
+            
+            stats["processed"] += len(resources)
+            stats["stored"] += stored
+            stats["failed"] += len(resources) - len(rows)
+            batches += 1
+            logger.info(
+                f"Summary backfill: {stats['processed']} processed, "
+                f"{stats['stored']} stored, {stats['failed']} failed (cursor {after_id})"
+            )
+        
+        return stats
+    
+    def store(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert a batch of summaries in one round trip.
+        
+        Rows for resources that got a summary meanwhile are skipped.
+        
+        Returns:
+            Number of rows actually inserted
+        """
+        if not rows:
+            return 0
+        
+        result = self.db.execute(
+            text("""
+                INSERT INTO ai_summaries (resource_id, summary, model_used, tokens_used, confidence_score)
+                SELECT resource_id, summary, model_used, tokens_used, confidence_score
+                FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+                    resource_id uuid, summary text, model_used text, tokens_used integer, confidence_score numeric
+                )
+                ON CONFLICT (resource_id) DO NOTHING
+                RETURNING resource_id
+            """),
+            {"rows": json.dumps(rows, default=str)},
+        )
+        inserted = len(result.fetchall())
+        self.db.commit()
+        return inserted
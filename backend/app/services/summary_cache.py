@@ -0,0 +1,71 @@
+"""
+Cache for LLM-generated summaries.
+
+Entries live in Redis when it is reachable so all workers share them, and
+in a per-process TTL cache otherwise. Keys are content hashes, so a cached
+summary never goes stale: changed content simply maps to a new key.
+"""
+from typing import Optional
+import hashlib
+import logging
+
+from app.core.redis_client import get_redis
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "summary:"
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+
+
+def content_key(*parts: str) -> str:
+    """Build a cache key from the SHA-256 of the given parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Content-addressed summary store backed by Redis with a local fallback."""
+    
+    def __init__(self, ttl: int = DEFAULT_TTL_SECONDS, local_maxsize: int = 2048):
+        self.ttl = ttl
+        self._local = TTLCache(maxsize=local_maxsize, ttl=ttl)
+    
+    def get(self, key: str) -> Optional[str]:
+        value = self._local.get(key)
+        if value is not None:
+            return value
+        
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            value = client.get(KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"Summary cache read failed: {e}")
+            return None
+        
+        if value is not None:
+            self._local.set(key, value)
+        return value
+    
+    def set(self, key: str, value: str):
+        self._local.set(key, value)
+        
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.set(KEY_PREFIX + key, value, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Summary cache write failed: {e}")
+    
+    def stats(self):
+        return self._local.stats()
+
+
+# Global summary cache instance
+summary_cache = SummaryCache()
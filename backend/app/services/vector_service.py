@@ -5,6 +5,66 @@ Handles embeddings storage and similarity search for RAG functionality.
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
+import hashlib
+import json
+import re
+import time
+
+from app.config import settings
+
+# Table holding embeddings created before versioned tables existed
+LEGACY_EMBEDDINGS_TABLE = "note_embeddings"
+
+# Registry of embedding tables, one row per embedding model
+EMBEDDING_MODELS_TABLE = "embedding_models"
+
+# Embedding model lifecycle states
+MODEL_STATUS_BACKFILLING = "backfilling"
+MODEL_STATUS_ACTIVE = "active"
+MODEL_STATUS_RETIRED = "retired"
+
+# How long readers may reuse the active model lookup (seconds)
+ACTIVE_MODEL_CACHE_TTL = 5.0
+
+# First key of the per-note advisory lock taken while replacing embeddings
+# (the second key is the note id)
+NOTE_INDEX_LOCK_NAMESPACE = 31001
+
+_active_model_cache: Dict[str, Any] = {"value": None, "expires_at": 0.0}
+
+# Centroid tables known to exist in this process
+_checked_centroid_tables: set = set()
+
+
+def embedding_table_name(model_name: str) -> str:
+    """
+    Build the embeddings table name for a model id.
+    
+    Example: "sentence-transformers/all-MiniLM-L6-v2"
+    -> "note_embeddings_sentence_transformers_all_minilm_l6_v2"
+    
+    Long names are shortened with a hash suffix so that the table and its
+    index names stay within PostgreSQL's 63 character identifier limit.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "_", model_name.lower()).strip("_")
+    if len(slug) > 32:
+        digest = hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:8]
+        slug = f"{slug[:23]}_{digest}"
+    return f"{LEGACY_EMBEDDINGS_TABLE}_{slug}"
+
+
+def centroid_table_name(table_name: str) -> str:
+    """
+    Build the per-note centroid table name for an embeddings table.
+    
+    Example: "note_embeddings" -> "note_centroids"
+    """
+    return table_name.replace(LEGACY_EMBEDDINGS_TABLE, "note_centroids", 1)
+
+
+def _vector_literal(embedding: List[float]) -> str:
+    """Convert an embedding list to pgvector's text format."""
+    return "[" + ",".join(map(str, embedding)) + "]"
 
 
 class VectorService:
@@ -29,8 +89,9 @@ class VectorService:
     
     def create_embeddings_table_if_not_exists(
         self, 
-        table_name: str = "note_embeddings",
-        dimension: int = 384
+        table_name: str = LEGACY_EMBEDDINGS_TABLE,
+        dimension: int = 384,
+        create_ann_index: bool = True
     ):
         """
         Create embeddings table with vector column if it doesn't exist.
@@ -38,6 +99,9 @@ class VectorService:
         Args:
             table_name: Name of the embeddings table
             dimension: Embedding vector dimension (default: 384 for all-MiniLM-L6-v2)
+            create_ann_index: Create the ivfflat index right away. Tables that are
+                about to be backfilled should build it afterwards instead, so the
+                IVF lists are trained on real data.
         """
         create_table_sql = f"""
         CREATE TABLE IF NOT EXISTS {table_name} (
@@ -49,19 +113,436 @@ class VectorService:
             created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
         );
         
-        -- Create index for similarity search
+        CREATE INDEX IF NOT EXISTS {table_name}_note_id_idx
+        ON {table_name} (note_id);
+        """
+        
+        try:
+            self.db.execute(text(create_table_sql))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise Exception(f"Failed to create embeddings table: {e}")
+        
+        self.create_centroid_table_if_not_exists(table_name, dimension)
+        
+        if create_ann_index:
+            self.create_embedding_index(table_name, lists=100)
+    
+    def create_centroid_table_if_not_exists(self, table_name: str, dimension: int):
+        """
+        Create the per-note centroid table for an embeddings table.
+        
+        One row per note holding the mean of its chunk embeddings, plus the
+        notebook owner so a user's notes can be ranked without touching chunks.
+        
+        Args:
+            table_name: Name of the embeddings table
+            dimension: Embedding vector dimension
+        """
+        centroids = centroid_table_name(table_name)
+        create_table_sql = f"""
+        CREATE TABLE IF NOT EXISTS {centroids} (
+            note_id INTEGER PRIMARY KEY REFERENCES notes(id) ON DELETE CASCADE,
+            owner_id INTEGER NOT NULL,
+            chunk_count INTEGER NOT NULL,
+            centroid vector({dimension}),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        );
+        
+        CREATE INDEX IF NOT EXISTS {centroids}_owner_id_idx
+        ON {centroids} (owner_id);
+        """
+        
+        try:
+            self.db.execute(text(create_table_sql))
+            self.db.commit()
+            _checked_centroid_tables.add(table_name)
+        except Exception as e:
+            self.db.rollback()
+            raise Exception(f"Failed to create centroid table: {e}")
+    
+    def _ensure_centroid_table(self, table_name: str, dimension: Optional[int] = None) -> bool:
+        """
+        Make sure the centroid table of an embeddings table exists.
+        
+        Creates it when the dimension is known, otherwise only checks for it.
+        Checked once per process.
+        
+        Returns:
+            Whether the centroid table exists
+        """
+        if table_name in _checked_centroid_tables:
+            return True
+        
+        if dimension:
+            self.create_centroid_table_if_not_exists(table_name, dimension)
+            return True
+        
+        exists = self.db.execute(
+            text("SELECT to_regclass(:name)"),
+            {"name": centroid_table_name(table_name)}
+        ).scalar()
+        if exists:
+            _checked_centroid_tables.add(table_name)
+        return bool(exists)
+    
+    def has_centroid_table(self, table_name: str) -> bool:
+        """Whether hierarchical retrieval can use centroids for this table."""
+        return self._ensure_centroid_table(table_name)
+    
+    def refresh_centroids(
+        self,
+        table_name: str = LEGACY_EMBEDDINGS_TABLE,
+        note_id: Optional[int] = None,
+        commit: bool = True
+    ):
+        """
+        Recompute note centroids from the stored chunk embeddings.
+        
+        Args:
+            table_name: Name of the embeddings table
+            note_id: Only refresh this note (default: all notes)
+            commit: Commit the transaction when done
+        """
+        centroids = centroid_table_name(table_name)
+        note_filter = "WHERE e.note_id = :note_id" if note_id is not None else ""
+        params = {"note_id": note_id} if note_id is not None else {}
+        
+        if note_id is not None:
+            self.db.execute(text(f"DELETE FROM {centroids} WHERE note_id = :note_id"), params)
+        
+        self.db.execute(
+            text(f"""
+            INSERT INTO {centroids} (note_id, owner_id, chunk_count, centroid, updated_at)
+            SELECT e.note_id, nb.owner_id, COUNT(*), AVG(e.embedding), NOW()
+            FROM {table_name} e
+            JOIN notes n ON n.id = e.note_id
+            JOIN chapters c ON c.id = n.chapter_id
+            JOIN notebooks nb ON nb.id = c.notebook_id
+            {note_filter}
+            GROUP BY e.note_id, nb.owner_id
+            ON CONFLICT (note_id) DO UPDATE SET
+                owner_id = EXCLUDED.owner_id,
+                chunk_count = EXCLUDED.chunk_count,
+                centroid = EXCLUDED.centroid,
+                updated_at = NOW()
+            """),
+            params
+        )
+        if commit:
+            self.db.commit()
+    
+    def search_notes_by_centroid(
+        self,
+        query_embedding: List[float],
+        owner_id: int,
+        limit: int = 20,
+        table_name: str = LEGACY_EMBEDDINGS_TABLE
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank a user's notes by similarity of their centroid to the query.
+        
+        This is the first stage of hierarchical retrieval: the centroid table
+        has one row per note, so an exact scan over one user is cheap.
+        
+        Returns:
+            List of dicts with note_id, chunk_count and similarity
+        """
+        centroids = centroid_table_name(table_name)
+        result = self.db.execute(
+            text(f"""
+            SELECT note_id, chunk_count, 1 - (centroid <=> CAST(:embedding AS vector)) AS similarity
+            FROM {centroids}
+            WHERE owner_id = :owner_id
+            ORDER BY centroid <=> CAST(:embedding AS vector)
+            LIMIT :limit
+            """),
+            {"embedding": _vector_literal(query_embedding), "owner_id": owner_id, "limit": limit}
+        )
+        
+        return [
+            {"note_id": row[0], "chunk_count": row[1], "similarity": float(row[2])}
+            for row in result.fetchall()
+        ]
+    
+    def get_owner_chunk_stats(
+        self,
+        owner_id: int,
+        table_name: str = LEGACY_EMBEDDINGS_TABLE
+    ) -> Dict[str, int]:
+        """
+        Count a user's indexed notes and chunks (from the centroid table).
+        
+        Returns:
+            Dict with notes and chunks
+        """
+        centroids = centroid_table_name(table_name)
+        row = self.db.execute(
+            text(f"""
+            SELECT COUNT(*), COALESCE(SUM(chunk_count), 0)
+            FROM {centroids}
+            WHERE owner_id = :owner_id
+            """),
+            {"owner_id": owner_id}
+        ).fetchone()
+        
+        return {"notes": int(row[0]), "chunks": int(row[1])}
+    
+    def create_embedding_index(self, table_name: str, lists: Optional[int] = None):
+        """
+        Create the ivfflat similarity index for an embeddings table.
+        
+        Args:
+            table_name: Name of the embeddings table
+            lists: Number of IVF lists (default: rows / 1000, at least 1)
+        """
+        if lists is None:
+            row_count = self.db.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar() or 0
+            lists = max(1, row_count // 1000)
+        
+        index_sql = f"""
         CREATE INDEX IF NOT EXISTS {table_name}_embedding_idx 
         ON {table_name} 
         USING ivfflat (embedding vector_cosine_ops)
-        WITH (lists = 100);
+        WITH (lists = {int(lists)})
         """
         
         try:
-            self.db.execute(text(create_table_sql))
+            self.db.execute(text(index_sql))
             self.db.commit()
         except Exception as e:
             self.db.rollback()
-            raise Exception(f"Failed to create embeddings table: {e}")
+            raise Exception(f"Failed to create embedding index: {e}")
+    
+    # -------------------------
+    # Embedding model registry
+    # -------------------------
+    def create_model_registry_if_not_exists(self):
+        """
+        Create the registry that maps embedding models to their tables.
+        At most one model can be active (serving queries) at a time.
+        """
+        create_sql = f"""
+        CREATE TABLE IF NOT EXISTS {EMBEDDING_MODELS_TABLE} (
+            model_name TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL UNIQUE,
+            dimension INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT '{MODEL_STATUS_BACKFILLING}',
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            activated_at TIMESTAMP WITH TIME ZONE
+        );
+        
+        CREATE UNIQUE INDEX IF NOT EXISTS {EMBEDDING_MODELS_TABLE}_single_active_idx
+        ON {EMBEDDING_MODELS_TABLE} (status)
+        WHERE status = '{MODEL_STATUS_ACTIVE}';
+        """
+        
+        try:
+            self.db.execute(text(create_sql))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise Exception(f"Failed to create embedding model registry: {e}")
+    
+    def register_model(
+        self,
+        model_name: str,
+        table_name: str,
+        dimension: int,
+        status: str = MODEL_STATUS_BACKFILLING
+    ) -> Dict[str, Any]:
+        """
+        Register an embedding model and its table (no-op if already registered).
+        
+        Returns:
+            Registry entry for the model
+        """
+        self.db.execute(
+            text(f"""
+            INSERT INTO {EMBEDDING_MODELS_TABLE} (model_name, table_name, dimension, status, activated_at)
+            VALUES (:model_name, :table_name, :dimension, :status,
+                    CASE WHEN CAST(:status AS TEXT) = '{MODEL_STATUS_ACTIVE}' THEN NOW() END)
+            ON CONFLICT (model_name) DO NOTHING
+            """),
+            {
+                "model_name": model_name,
+                "table_name": table_name,
+                "dimension": dimension,
+                "status": status
+            }
+        )
+        self.db.commit()
+        _active_model_cache["expires_at"] = 0.0
+        
+        return self.get_model(model_name)
+    
+    def get_model(self, model_name: str) -> Optional[Dict[str, Any]]:
+        """Get the registry entry for a model, or None if unknown."""
+        row = self.db.execute(
+            text(f"""
+            SELECT model_name, table_name, dimension, status
+            FROM {EMBEDDING_MODELS_TABLE}
+            WHERE model_name = :model_name
+            """),
+            {"model_name": model_name}
+        ).fetchone()
+        
+        return self._model_row_to_dict(row) if row else None
+    
+    def get_active_model(self, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Get the embedding model that currently serves queries.
+        
+        Falls back to the legacy `note_embeddings` table and the configured
+        model when the registry has not been set up.
+        
+        Args:
+            use_cache: Reuse a lookup younger than ACTIVE_MODEL_CACHE_TTL
+        
+        Returns:
+            Dict with model_name, table_name, dimension and status
+        """
+        now = time.monotonic()
+        if use_cache and _active_model_cache["value"] and _active_model_cache["expires_at"] > now:
+            return _active_model_cache["value"]
+        
+        try:
+            row = self.db.execute(
+                text(f"""
+                SELECT model_name, table_name, dimension, status
+                FROM {EMBEDDING_MODELS_TABLE}
+                WHERE status = '{MODEL_STATUS_ACTIVE}'
+                """)
+            ).fetchone()
+        except Exception:
+            # Registry not created yet
+            self.db.rollback()
+            row = None
+        
+        if row:
+            active = self._model_row_to_dict(row)
+        else:
+            active = {
+                "model_name": settings.HUGGINGFACE_EMBEDDING_MODEL,
+                "table_name": LEGACY_EMBEDDINGS_TABLE,
+                "dimension": None,
+                "status": MODEL_STATUS_ACTIVE,
+            }
+        
+        _active_model_cache["value"] = active
+        _active_model_cache["expires_at"] = now + ACTIVE_MODEL_CACHE_TTL
+        return active
+    
+    def get_write_targets(self) -> List[Dict[str, Any]]:
+        """
+        Get every embedding table that must receive writes.
+        
+        This is the active table plus any table still being backfilled, so a
+        note edited during a migration is never missing from the new table.
+        Always read from the database (never cached).
+        """
+        try:
+            rows = self.db.execute(
+                text(f"""
+                SELECT model_name, table_name, dimension, status
+                FROM {EMBEDDING_MODELS_TABLE}
+                WHERE status IN ('{MODEL_STATUS_ACTIVE}', '{MODEL_STATUS_BACKFILLING}')
+                ORDER BY status
+                """)
+            ).fetchall()
+        except Exception:
+            self.db.rollback()
+            rows = []
+        
+        targets = [self._model_row_to_dict(row) for row in rows]
+        if not any(t["status"] == MODEL_STATUS_ACTIVE for t in targets):
+            targets.insert(0, self.get_active_model(use_cache=False))
+        return targets
+    
+    def activate_model(self, model_name: str):
+        """
+        Atomically switch query traffic to another embedding model.
+        
+        The previous active model is retired in the same transaction, so
+        readers see either the old or the new table, never neither.
+        Retired tables are kept so the switch can be rolled back.
+        """
+        try:
+            self.db.execute(
+                text(f"""
+                UPDATE {EMBEDDING_MODELS_TABLE}
+                SET status = '{MODEL_STATUS_RETIRED}'
+                WHERE status = '{MODEL_STATUS_ACTIVE}' AND model_name <> :model_name
+                """),
+                {"model_name": model_name}
+            )
+            result = self.db.execute(
+                text(f"""
+                UPDATE {EMBEDDING_MODELS_TABLE}
+                SET status = '{MODEL_STATUS_ACTIVE}', activated_at = NOW()
+                WHERE model_name = :model_name
+                """),
+                {"model_name": model_name}
+            )
+            if result.rowcount == 0:
+                raise ValueError(f"Embedding model {model_name} is not registered")
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            _active_model_cache["expires_at"] = 0.0
+    
+    def get_migration_coverage(self, source_table: str, target_table: str) -> Dict[str, int]:
+        """
+        Count how many notes indexed in the source table also exist in the target.
+        
+        Returns:
+            Dict with source_notes and covered_notes
+        """
+        row = self.db.execute(
+            text(f"""
+            SELECT
+                (SELECT COUNT(DISTINCT note_id) FROM {source_table}) AS source_notes,
+                (SELECT COUNT(DISTINCT s.note_id) FROM {source_table} s
+                 WHERE EXISTS (SELECT 1 FROM {target_table} t WHERE t.note_id = s.note_id)) AS covered_notes
+            """)
+        ).fetchone()
+        
+        return {"source_notes": int(row[0] or 0), "covered_notes": int(row[1] or 0)}
+    
+    def get_notes_missing_from(
+        self,
+        source_table: str,
+        target_table: str,
+        limit: int = 100
+    ) -> List[int]:
+        """
+        Get ids of notes indexed in the source table but not yet in the target.
+        Ordered by note id so a backfill can be stopped and resumed.
+        """
+        rows = self.db.execute(
+            text(f"""
+            SELECT DISTINCT s.note_id
+            FROM {source_table} s
+            WHERE NOT EXISTS (SELECT 1 FROM {target_table} t WHERE t.note_id = s.note_id)
+            ORDER BY s.note_id
+            LIMIT :limit
+            """),
+            {"limit": limit}
+        ).fetchall()
+        
+        return [row[0] for row in rows]
+    
+    @staticmethod
+    def _model_row_to_dict(row) -> Dict[str, Any]:
+        return {
+            "model_name": row[0],
+            "table_name": row[1],
+            "dimension": row[2],
+            "status": row[3],
+        }
     
     def store_embedding(
         self,
@@ -69,7 +550,7 @@ class VectorService:
         content_text: str,
         embedding: List[float],
         metadata: Optional[Dict[str, Any]] = None,
-        table_name: str = "note_embeddings"
+        table_name: str = LEGACY_EMBEDDINGS_TABLE
     ) -> int:
         """
         Store an embedding in the database.
@@ -85,16 +566,15 @@ class VectorService:
             ID of the inserted embedding record
         """
         # Convert embedding list to string format for pgvector
-        embedding_str = "[" + ",".join(map(str, embedding)) + "]"
+        embedding_str = _vector_literal(embedding)
         
         metadata_json = None
         if metadata:
-            import json
             metadata_json = json.dumps(metadata)
         
         insert_sql = f"""
         INSERT INTO {table_name} (note_id, content_text, embedding, metadata)
-        VALUES (:note_id, :content_text, :embedding::vector, :metadata::jsonb)
+        VALUES (:note_id, :content_text, CAST(:embedding AS vector), CAST(:metadata AS jsonb))
         RETURNING id
         """
         
@@ -111,13 +591,79 @@ class VectorService:
         
         return result.scalar()
     
+    def store_embeddings(
+        self,
+        note_id: int,
+        chunks: List[str],
+        embeddings: List[List[float]],
+        table_name: str = LEGACY_EMBEDDINGS_TABLE
+    ) -> int:
+        """
+        Replace all embeddings of a note with the given chunks in one transaction.
+        The note's centroid is refreshed in the same transaction.
+        
+        Replacements of the same note are serialized with a transaction-level
+        advisory lock: under READ COMMITTED two concurrent DELETE + INSERT
+        runs would not see each other's rows and both chunk sets would stay.
+        
+        Args:
+            note_id: ID of the note the chunks belong to
+            chunks: Chunk texts, in order
+            embeddings: One vector per chunk
+            table_name: Name of the embeddings table
+        
+        Returns:
+            Number of stored embeddings
+        """
+        rows = [
+            {
+                "note_id": note_id,
+                "content_text": chunk,
+                "embedding": _vector_literal(embedding),
+                "metadata": json.dumps({"chunk_index": idx}),
+            }
+            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+        ]
+        
+        has_centroids = self._ensure_centroid_table(
+            table_name, len(embeddings[0]) if embeddings else None
+        )
+        
+        try:
+            self.db.execute(
+                text("SELECT pg_advisory_xact_lock(:namespace, :note_id)"),
+                {"namespace": NOTE_INDEX_LOCK_NAMESPACE, "note_id": note_id}
+            )
+            self.db.execute(
+                text(f"DELETE FROM {table_name} WHERE note_id = :note_id"),
+                {"note_id": note_id}
+            )
+            if rows:
+                self.db.execute(
+                    text(f"""
+                    INSERT INTO {table_name} (note_id, content_text, embedding, metadata)
+                    VALUES (:note_id, :content_text, CAST(:embedding AS vector), CAST(:metadata AS jsonb))
+                    """),
+                    rows
+                )
+            if has_centroids:
+                self.refresh_centroids(table_name, note_id=note_id, commit=False)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        return len(rows)
+    
     def search_similar(
         self,
         query_embedding: List[float],
         limit: int = 10,
         note_id_filter: Optional[int] = None,
         threshold: float = 0.7,
-        table_name: str = "note_embeddings"
+        table_name: str = LEGACY_EMBEDDINGS_TABLE,
+        note_ids: Optional[List[int]] = None,
+        owner_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar embeddings using cosine similarity.
@@ -128,11 +674,13 @@ class VectorService:
             note_id_filter: Optional filter by note_id
             threshold: Minimum similarity threshold (0-1)
             table_name: Name of the embeddings table
+            note_ids: Optional candidate notes to restrict the search to
+            owner_id: Optional owner whose notes (via their notebooks) to restrict the search to
         
         Returns:
             List of similar embeddings with similarity scores
         """
-        embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
+        embedding_str = _vector_literal(query_embedding)
         
         # Build query with optional note_id filter
         where_clause = ""
@@ -145,6 +693,20 @@ class VectorService:
         if note_id_filter:
             where_clause = "AND note_id = :note_id"
             params["note_id"] = note_id_filter
+        elif note_ids is not None:
+            where_clause = "AND note_id = ANY(:note_ids)"
+            params["note_ids"] = list(note_ids)
+        
+        if owner_id is not None:
+            where_clause += """
+            AND note_id IN (
+                SELECT n.id
+                FROM notes n
+                JOIN chapters c ON c.id = n.chapter_id
+                JOIN notebooks nb ON nb.id = c.notebook_id
+                WHERE nb.owner_id = :owner_id
+            )"""
+            params["owner_id"] = owner_id
         
         search_sql = f"""
         SELECT 
@@ -152,11 +714,11 @@ class VectorService:
             note_id,
             content_text,
             metadata,
-            1 - (embedding <=> :embedding::vector) as similarity
+            1 - (embedding <=> CAST(:embedding AS vector)) as similarity
         FROM {table_name}
-        WHERE 1 - (embedding <=> :embedding::vector) >= :threshold
+        WHERE 1 - (embedding <=> CAST(:embedding AS vector)) >= :threshold
         {where_clause}
-        ORDER BY embedding <=> :embedding::vector
+        ORDER BY embedding <=> CAST(:embedding AS vector)
         LIMIT :limit
         """
         
@@ -177,7 +739,7 @@ class VectorService:
     def delete_embeddings_by_note_id(
         self,
         note_id: int,
-        table_name: str = "note_embeddings"
+        table_name: str = LEGACY_EMBEDDINGS_TABLE
     ) -> int:
         """
         Delete all embeddings for a specific note.
@@ -198,7 +760,7 @@ class VectorService:
     def get_embeddings_by_note_id(
         self,
         note_id: int,
-        table_name: str = "note_embeddings"
+        table_name: str = LEGACY_EMBEDDINGS_TABLE
     ) -> List[Dict[str, Any]]:
         """
         Get all embeddings for a specific note.
@@ -230,6 +792,43 @@ class VectorService:
             for row in rows
         ]
 
+    
+    def get_note_chunk_vectors(
+        self,
+        note_id: int,
+        table_name: str = LEGACY_EMBEDDINGS_TABLE
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a note's chunks together with their stored vectors, in chunk order.
+        
+        Args:
+            note_id: ID of the note
+            table_name: Name of the embeddings table
+        
+        Returns:
+            List of dicts with chunk_index, content_text and embedding (list of floats)
+        """
+        select_sql = f"""
+        SELECT content_text, CAST(embedding AS text), metadata
+        FROM {table_name}
+        WHERE note_id = :note_id
+        ORDER BY id
+        """
+        
+        rows = self.db.execute(text(select_sql), {"note_id": note_id}).fetchall()
+        
+        chunks = []
+        for position, row in enumerate(rows):
+            metadata = row[2] if row[2] else {}
+            chunks.append({
+                "chunk_index": metadata.get("chunk_index", position),
+                "content_text": row[0],
+                # pgvector's text form "[0.1,0.2,...]" is valid JSON
+                "embedding": json.loads(row[1]),
+            })
+        chunks.sort(key=lambda c: c["chunk_index"])
+        return chunks
+
 
 def get_vector_service(db: Session) -> VectorService:
     """
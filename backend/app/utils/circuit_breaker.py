@@ -0,0 +1,113 @@
+"""
+Circuit breaker for calls to an unreliable dependency.
+
+closed     calls go through; consecutive failures (or slow calls) are counted
+open       calls are rejected immediately until `reset_timeout` has passed
+half_open  a single probe call is let through; success closes the circuit,
+           failure opens it again
+"""
+from typing import Any, Dict, Optional
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure circuit breaker."""
+    
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        slow_call_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            failure_threshold: Consecutive failures/slow calls that open the circuit
+            reset_timeout: Seconds to stay open before letting a probe through
+            slow_call_seconds: Successful calls slower than this count as failures
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.times_opened = 0
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+    
+    def is_open(self) -> bool:
+        """Whether calls would currently be rejected without trying."""
+        return self.state == OPEN
+    
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed (0 if not open)."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+    
+    def allow_request(self) -> bool:
+        """
+        Ask to make a call. Every allowed call must be followed by
+        record_success or record_failure.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = HALF_OPEN
+                self._probe_in_flight = False
+            # Half-open: one probe at a time
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+    
+    def cancel_request(self):
+        """Give back an allowed call that was not made after all."""
+        with self._lock:
+            self._probe_in_flight = False
+    
+    def record_success(self, duration: float = 0.0):
+        """Report a completed call and how long it took."""
+        if self.slow_call_seconds is not None and duration > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+    
+    def record_failure(self):
+        """Report a failed call."""
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.times_opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "times_opened": self.times_opened,
+            "retry_after_seconds": round(self.retry_after(), 1),
+        }
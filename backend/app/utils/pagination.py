@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A page is "the next `limit` rows after the last row the client saw", written
+as a row comparison on the sort key, e.g. (created_at, id) < (:c, :i). With a
+composite index on (parent_id, <sort key>) every page is an index range
+scan, however deep the client pages; OFFSET would scan and throw away all
+earlier rows.
+
+Cursors are opaque to clients: base64url-encoded JSON of the last row's key.
+Endpoints return the cursor for the next page in the X-Next-Cursor header
+(absent on the last page).
+"""
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import json
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import DateTime, Select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PageParams:
+    """Query parameters shared by paginated endpoints (use as a dependency)."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+class Keyset:
+    """
+    Sort key of a paginated listing.
+
+    The last column must be unique (the primary key) so the key is a total
+    order and no row is skipped or repeated between pages.
+    """
+
+    def __init__(self, *columns, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+
+    def apply(self, query: Select, page: PageParams) -> Select:
+        """
+        Order the query by the key, start after the cursor and fetch one row
+        more than the page size (to tell whether another page exists).
+        """
+        order = [column.desc() if self.descending else column.asc() for column in self.columns]
+        query = query.order_by(*order).limit(page.limit + 1)
+
+        if page.cursor:
+            values = self.decode(page.cursor)
+            key = tuple_(*self.columns)
+            query = query.where(key < tuple_(*values) if self.descending else key > tuple_(*values))
+
+        return query
+
+    def page(self, rows: Sequence[Any], page: PageParams, response: Response) -> List[Any]:
+        """
+        Trim the extra row and set the next-page cursor header.
+
+        Rows may be ORM objects or result rows; key values are read by
+        column name.
+        """
+        rows = list(rows)
+        if len(rows) > page.limit:
+            rows = rows[:page.limit]
+            response.headers[NEXT_CURSOR_HEADER] = self.encode(rows[-1])
+        return rows
+
+    def encode(self, row: Any) -> str:
+        values = []
+        for column in self.columns:
+            value = getattr(row, column.key)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def decode(self, cursor: str) -> Tuple[Any, ...]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError("wrong number of key values")
+            return tuple(
+                datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+                for column, value in zip(self.columns, values)
+            )
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
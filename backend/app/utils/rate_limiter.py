@@ -0,0 +1,79 @@
+"""
+Token-bucket rate limiter usable from threads and coroutines.
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Allows `rate` operations per second on average, with bursts up to `capacity`.
+    """
+    
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+    
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available right now."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+    
+    def _reserve(self, tokens: float, timeout: float | None) -> float | None:
+        """
+        Take tokens, going into debt if needed, and return how long to wait.
+        Returns None (taking nothing) if the wait would exceed `timeout`.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            delay = max(0.0, (tokens - self._tokens) / self.rate)
+            if timeout is not None and delay > timeout:
+                return None
+            self._tokens -= tokens
+            return delay
+    
+    def acquire(self, tokens: float = 1.0, timeout: float | None = None) -> bool:
+        """
+        Block until tokens are available.
+        
+        Returns:
+            False without waiting if they would not be available within `timeout`
+        """
+        delay = self._reserve(tokens, timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+    
+    async def acquire_async(self, tokens: float = 1.0, timeout: float | None = None) -> bool:
+        """Like acquire, but waits without blocking the event loop."""
+        delay = self._reserve(tokens, timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return True
+    
+    @property
+    def available(self) -> float:
+        """Tokens currently available (may be negative while callers wait)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
@@ -0,0 +1,91 @@
+"""
+Text chunking helpers that keep chunk boundaries stable across edits.
+"""
+from typing import List
+import hashlib
+import re
+
+# Paragraphs are separated by one or more blank lines
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+# Split after sentence punctuation
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+def _is_anchor(paragraph: str, every: int = 4) -> bool:
+    """Decide from the paragraph's own content whether a chunk may end after it."""
+    digest = hashlib.md5(paragraph.encode("utf-8")).digest()
+    return digest[0] % every == 0
+
+
+def _split_long_paragraph(paragraph: str, max_size: int) -> List[str]:
+    """Split a paragraph longer than max_size at sentence boundaries."""
+    pieces: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_BREAK.split(paragraph):
+        while len(sentence) > max_size:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_size])
+            sentence = sentence[max_size:]
+        if current and len(current) + len(sentence) + 1 > max_size:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_stable_chunks(text: str, target_size: int = 6000, max_size: int = 9000) -> List[str]:
+    """
+    Split text into paragraph-aligned chunks whose boundaries survive small edits.
+    
+    A chunk ends after a paragraph once it holds at least half of
+    `target_size` characters and that paragraph is an "anchor" (decided by
+    hashing the paragraph itself), or when the next paragraph would exceed
+    `max_size`.
+    Because boundaries depend only on local content, editing one paragraph
+    changes only the chunk containing it instead of shifting every chunk after it.
+    
+    Args:
+        text: Text to split
+        target_size: Approximate chunk size; chunks may end at an anchor past half of it
+        max_size: Hard upper bound on chunk size
+    
+    Returns:
+        List of chunks (a single chunk when the text is short)
+    """
+    text = text.strip()
+    if len(text) <= target_size:
+        return [text] if text else []
+    
+    paragraphs: List[str] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) > max_size:
+            paragraphs.extend(_split_long_paragraph(paragraph, max_size))
+        else:
+            paragraphs.append(paragraph)
+    
+    min_size = target_size // 2
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for paragraph in paragraphs:
+        if current and size + len(paragraph) + 2 > max_size:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += len(paragraph) + 2
+        if size >= min_size and _is_anchor(paragraph):
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+    if current:
+        chunks.append("\n\n".join(current))
+    
+    return chunks
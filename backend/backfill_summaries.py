@@ -0,0 +1,49 @@
+"""
+Generate AI summaries for approved resources that are missing one.
+
+Usage:
+    python backfill_summaries.py --dry-run
+    python backfill_summaries.py [--batch-size 20] [--concurrency 4] [--rpm 30] [--max-batches N]
+
+Safe to interrupt and rerun: resources summarized by an earlier run are skipped.
+"""
+import argparse
+import asyncio
+
+from app.database import SessionLocal
+from app.services.summary_backfill_service import SummaryBackfillService
+from app.config import settings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill missing resource summaries")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be processed")
+    parser.add_argument("--batch-size", type=int, default=20, help="Resources per batch (one insert per batch)")
+    parser.add_argument("--concurrency", type=int, default=settings.AI_SUMMARY_MAX_CONCURRENCY, help="Parallel summaries")
+    parser.add_argument("--rpm", type=float, default=30.0, help="Maximum summaries started per minute")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches")
+    parser.add_argument("--max-length", type=int, default=500, help="Summary length in words")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        backfill = SummaryBackfillService(db)
+
+        if args.dry_run:
+            report = backfill.estimate(max_length=args.max_length)
+            print(
+                f"Would summarize {report['resources']} resources "
+                f"({report['total_chars']:,} chars, ~{report['estimated_tokens']:,} tokens)"
+            )
+        else:
+            stats = asyncio.run(backfill.run(
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                requests_per_minute=args.rpm,
+                max_batches=args.max_batches,
+                max_length=args.max_length,
+            ))
+            print(f"✓ {stats['stored']} summaries stored, {stats['failed']} failed, {stats['processed']} processed")
+
+    finally:
+        db.close()
@@ -0,0 +1,121 @@
+"""
+Measure API throughput of the notebook/chapter/note endpoints.
+
+Seeds a user with one notebook, a chapter and some notes, then hammers a mix
+of read endpoints at several concurrency levels and reports requests/sec
+and latency percentiles per level.
+
+To compare two builds (e.g. sync vs async sessions), start the server from
+each build with the same worker count and run this script against both:
+
+    uvicorn app.main:app --workers 1
+    python benchmark_api.py --base-url http://localhost:8000 [--levels 1,8,32,64] [--seconds 10]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+async def seed(client: httpx.AsyncClient, notes: int):
+    """Create a throwaway user with a notebook, chapter and notes; return (headers, ids)."""
+    email = f"bench-{uuid.uuid4().hex[:10]}@example.com"
+    password = "benchmark-password"
+    response = await client.post("/api/auth/register", json={"email": email, "password": password, "full_name": "Benchmark"})
+    response.raise_for_status()
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    notebook = (await client.post("/api/notebooks", json={"title": "Benchmark"}, headers=headers)).json()
+    chapter = (await client.post(
+        "/api/chapters", params={"notebook_id": notebook["id"]}, json={"title": "Chapter 1"}, headers=headers
+    )).json()
+    note_ids = []
+    for i in range(notes):
+        note = (await client.post(
+            "/api/notes", json={"title": f"Note {i}", "chapter_id": chapter["id"]}, headers=headers
+        )).json()
+        note_ids.append(note["id"])
+
+    return headers, {"notebook_id": notebook["id"], "chapter_id": chapter["id"], "note_ids": note_ids}
+
+
+def request_mix(ids):
+    """Endpoints hit in round-robin, roughly what the notebook UI loads."""
+    paths = [
+        "/api/notebooks",
+        f"/api/notebooks/{ids['notebook_id']}",
+        f"/api/chapters/notebook/{ids['notebook_id']}",
+        f"/api/notes/chapter/{ids['chapter_id']}",
+        "/api/auth/me",
+    ]
+    paths += [f"/api/notes/{note_id}" for note_id in ids["note_ids"][:5]]
+    return paths
+
+
+async def run_level(client: httpx.AsyncClient, headers, paths, concurrency: int, seconds: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(offset: int):
+        nonlocal errors
+        i = offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=max(args.levels) * 2, max_keepalive_connections=max(args.levels) * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0, limits=limits) as client:
+        headers, ids = await seed(client, args.notes)
+        paths = request_mix(ids)
+
+        # Warm up connections and server-side caches
+        await run_level(client, headers, paths, concurrency=4, seconds=1.0)
+
+        print(f"{'concurrency':>11} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for level in args.levels:
+            result = await run_level(client, headers, paths, level, args.seconds)
+            print(
+                f"{level:>11} {result['requests']:>9} {result['rps']:>9.1f} "
+                f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Notebook API throughput benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--levels", default="1,8,32,64", help="Comma-separated concurrency levels")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each level")
+    parser.add_argument("--notes", type=int, default=20, help="Notes created in the benchmark chapter")
+    args = parser.parse_args()
+    args.levels = [int(level) for level in args.levels.split(",")]
+
+    asyncio.run(main(args))
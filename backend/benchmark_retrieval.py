@@ -0,0 +1,116 @@
+"""
+Compare hierarchical (centroid-first) retrieval against flat chunk search.
+
+For one user, samples indexed chunks as queries and reports:
+- recall@k of hierarchical retrieval against exact flat search over the
+  same user's chunks
+- how many chunks each strategy has to consider per query
+
+Usage:
+    python benchmark_retrieval.py --user-id 1 [--queries 50] [--top-k 5] [--top-n 20]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.embedding_service import get_embedding_service
+from app.services.rag_service import RAGService
+from app.services.vector_service import centroid_table_name
+
+
+def sample_queries(db, table_name: str, owner_id: int, count: int):
+    """Use the first sentence of random chunks of the user as queries."""
+    rows = db.execute(
+        text(f"""
+        SELECT e.content_text
+        FROM {table_name} e
+        JOIN {centroid_table_name(table_name)} c ON c.note_id = e.note_id
+        WHERE c.owner_id = :owner_id
+        ORDER BY random()
+        LIMIT :count
+        """),
+        {"owner_id": owner_id, "count": count}
+    ).fetchall()
+    return [row[0].split(". ")[0][:300] for row in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hierarchical vs flat retrieval benchmark")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--top-n", type=int, default=settings.RAG_CENTROID_TOP_N)
+    args = parser.parse_args()
+
+    settings.RAG_CENTROID_TOP_N = args.top_n
+    random.seed(0)
+
+    db = SessionLocal()
+    try:
+        rag = RAGService(db)
+        active = rag.vector_service.get_active_model(use_cache=False)
+        table_name = active["table_name"]
+        embedder = get_embedding_service(active["model_name"])
+
+        stats = rag.vector_service.get_owner_chunk_stats(args.user_id, table_name)
+        all_note_ids = [
+            row[0] for row in db.execute(
+                text(f"SELECT note_id FROM {centroid_table_name(table_name)} WHERE owner_id = :owner_id"),
+                {"owner_id": args.user_id}
+            ).fetchall()
+        ]
+        print(f"User {args.user_id}: {stats['notes']} notes, {stats['chunks']} chunks in {table_name}")
+
+        queries = sample_queries(db, table_name, args.user_id, args.queries)
+        recalls, candidates, flat_ms, hier_ms = [], [], [], []
+
+        for query in queries:
+            embedding = embedder.generate_embedding(query)
+
+            start = time.perf_counter()
+            flat = rag.vector_service.search_similar(
+                query_embedding=embedding,
+                limit=args.top_k,
+                threshold=-1.0,
+                table_name=table_name,
+                note_ids=all_note_ids,
+            )
+            flat_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            top_notes = rag.vector_service.search_notes_by_centroid(
+                embedding, args.user_id, limit=args.top_n, table_name=table_name
+            )
+            hierarchical = rag.retrieve(
+                embedding,
+                top_k=args.top_k,
+                threshold=-1.0,
+                owner_id=args.user_id,
+                hierarchical=True,
+                table_name=table_name,
+            )
+            hier_ms.append((time.perf_counter() - start) * 1000)
+
+            expected = {r["id"] for r in flat}
+            found = {r["id"] for r in hierarchical}
+            if expected:
+                recalls.append(len(expected & found) / len(expected))
+            candidates.append(sum(n["chunk_count"] for n in top_notes))
+
+        if not recalls:
+            print("No indexed chunks for this user.")
+        else:
+            avg_candidates = statistics.mean(candidates)
+            print(f"Queries:                 {len(recalls)}")
+            print(f"Recall@{args.top_k} (hier vs flat): {statistics.mean(recalls):.3f}")
+            print(f"Chunks searched (flat):  {stats['chunks']}")
+            print(f"Chunks searched (hier):  {avg_candidates:.0f} avg "
+                  f"({stats['chunks'] / max(avg_candidates, 1):.1f}x fewer)")
+            print(f"Latency flat / hier:     {statistics.median(flat_ms):.1f} ms / {statistics.median(hier_ms):.1f} ms (median)")
+    finally:
+        db.close()
@@ -0,0 +1,103 @@
+"""
+Compare PostgREST and direct Postgres reads for the hot Supabase endpoints.
+
+Calls the list_resources, list_comments, get_notifications and
+get_conversation_messages handlers in-process, once with
+SUPABASE_DIRECT_READS off (PostgREST over HTTPS) and once with it on
+(app/repositories), and reports latency per endpoint and path. Both paths
+run as the same user, so row counts should match.
+
+The first --warmup calls per path are not measured (they open connections
+and let psycopg prepare the statements). Note that the messages endpoint
+also updates last_read_at on every call.
+
+Usage:
+    python benchmark_supabase_reads.py --token <access token> \\
+        [--resource-id <uuid>] [--conversation-id <uuid>] [--iterations 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import UUID
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.core.supabase_client import supabase_db, verified_claims
+from app.api.resources import list_resources
+from app.api.comments import list_comments
+from app.api.notifications import get_notifications
+from app.api.messaging import get_conversation_messages
+
+
+def endpoint_calls(args, user_id: str):
+    """Name -> coroutine factory taking a session, for each endpoint to measure."""
+    authorization = f"Bearer {args.token}"
+    calls = {
+        "list_resources": lambda db: list_resources(
+            subject=None, resource_type=None, approved_only=True, limit=50, offset=0,
+            authorization=authorization, db=db,
+        ),
+        "get_notifications": lambda db: get_notifications(
+            unread_only=False, limit=50, offset=0,
+            user_id=user_id, authorization=authorization, db=db,
+        ),
+    }
+    if args.resource_id:
+        calls["list_comments"] = lambda db: list_comments(
+            resource_id=args.resource_id, limit=50, offset=0,
+            authorization=authorization, db=db,
+        )
+    if args.conversation_id:
+        calls["get_conversation_messages"] = lambda db: get_conversation_messages(
+            conversation_id=UUID(args.conversation_id), limit=50, before=None,
+            user_id=user_id, authorization=authorization, db=db,
+        )
+    return calls
+
+
+async def measure(call, direct: bool, iterations: int, warmup: int):
+    settings.SUPABASE_DIRECT_READS = direct
+    timings, rows = [], 0
+    async with AsyncSessionLocal() as db:
+        for i in range(warmup + iterations):
+            start = time.perf_counter()
+            result = await call(db)
+            elapsed = (time.perf_counter() - start) * 1000
+            if i >= warmup:
+                timings.append(elapsed)
+            rows = len(result)
+    timings.sort()
+    return {
+        "rows": rows,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[int(len(timings) * 0.95) - 1],
+        "mean_ms": statistics.fmean(timings),
+    }
+
+
+async def main(args):
+    user_id = (await verified_claims(args.token))["sub"]
+    print(f"{'endpoint':<26} {'path':<10} {'rows':>5} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    try:
+        for name, call in endpoint_calls(args, user_id).items():
+            for path, direct in (("postgrest", False), ("direct", True)):
+                result = await measure(call, direct, args.iterations, args.warmup)
+                print(
+                    f"{name:<26} {path:<10} {result['rows']:>5} "
+                    f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['mean_ms']:>8.2f}"
+                )
+    finally:
+        await supabase_db.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PostgREST vs direct Postgres read benchmark")
+    parser.add_argument("--token", required=True, help="Supabase access token of the user to read as")
+    parser.add_argument("--resource-id", help="Resource whose comments to list")
+    parser.add_argument("--conversation-id", help="Conversation whose messages to list")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
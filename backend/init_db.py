@@ -3,7 +3,7 @@ Database initialization script.
 Creates all tables if they don't exist.
 """
 from app.database import engine, Base
-from app.models import User, Notebook, Chapter, Note, NoteContent, Share
+from app.models import User, Notebook, Chapter, Note, NoteContent, Share, Tombstone
 
 if __name__ == "__main__":
     print("Creating database tables...")
@@ -3,7 +3,7 @@ Initialize pgvector extension and embeddings table.
 Run this once after setting up the database.
 """
 from app.database import SessionLocal
-from app.services.vector_service import VectorService
+from app.services.vector_service import VectorService, LEGACY_EMBEDDINGS_TABLE, MODEL_STATUS_ACTIVE
 from app.services.embedding_service import embedding_service
 
 if __name__ == "__main__":
@@ -25,6 +25,23 @@ if __name__ == "__main__":
         vector_service.create_embeddings_table_if_not_exists(dimension=embedding_dimension)
         print("✓ Embeddings table created")
         
+        # Register the table as the active one for the configured model.
+        # Later model switches go through migrate_embeddings.py.
+        vector_service.create_model_registry_if_not_exists()
+        if vector_service.get_active_model(use_cache=False)["dimension"] is None:
+            vector_service.register_model(
+                model_name=embedding_service.model_name,
+                table_name=LEGACY_EMBEDDINGS_TABLE,
+                dimension=embedding_dimension,
+                status=MODEL_STATUS_ACTIVE,
+            )
+        print("✓ Embedding model registry ready")
+        
+        # Build per-note centroids for notes indexed before they existed
+        active_table = vector_service.get_active_model(use_cache=False)["table_name"]
+        vector_service.refresh_centroids(active_table)
+        print("✓ Note centroids refreshed")
+        
         print("\nVector database initialization complete!")
         print(f"You can now store and search embeddings using pgvector (dimension: {embedding_dimension}).")
         
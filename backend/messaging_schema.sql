@@ -63,6 +63,7 @@ CREATE TABLE IF NOT EXISTS public.conversation_members (
     user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
     joined_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     last_read_at TIMESTAMP WITH TIME ZONE,
+    unread_count INTEGER NOT NULL DEFAULT 0,  -- Others' messages after last_read_at (maintained by triggers)
     is_admin BOOLEAN DEFAULT false,  -- For group chats
     PRIMARY KEY (conversation_id, user_id)
 );
@@ -70,6 +71,8 @@ CREATE TABLE IF NOT EXISTS public.conversation_members (
 -- Indexes
 CREATE INDEX idx_conversation_members_user_id ON public.conversation_members(user_id);
 CREATE INDEX idx_conversation_members_conversation_id ON public.conversation_members(conversation_id);
+-- Total unread per user: index-only scan over conversations with unread messages
+CREATE INDEX idx_conversation_members_user_unread ON public.conversation_members(user_id) INCLUDE (unread_count) WHERE unread_count > 0;
 
 -- Enable RLS
 ALTER TABLE public.conversation_members ENABLE ROW LEVEL SECURITY;
@@ -445,6 +448,73 @@ CREATE TRIGGER trigger_update_conversation_last_message
     AFTER INSERT ON public.messages
     FOR EACH ROW EXECUTE FUNCTION update_conversation_last_message();
 
+-- Unread counters: conversation_members.unread_count counts messages from other
+-- members after the member's last_read_at, so listing conversations and the
+-- total unread badge never count messages.
+
+-- Upgrade an existing database (no-ops on a fresh install)
+ALTER TABLE public.conversation_members ADD COLUMN IF NOT EXISTS unread_count INTEGER NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS idx_conversation_members_user_unread
+    ON public.conversation_members(user_id) INCLUDE (unread_count) WHERE unread_count > 0;
+UPDATE public.conversation_members cm
+SET unread_count = (
+    SELECT COUNT(*)
+    FROM public.messages m
+    WHERE m.conversation_id = cm.conversation_id
+      AND m.sender_id <> cm.user_id
+      AND (cm.last_read_at IS NULL OR m.created_at > cm.last_read_at)
+);
+
+-- Function: Count a new message as unread for the other members (and uncount a
+-- deleted one). SECURITY DEFINER: members cannot update each other's rows.
+CREATE OR REPLACE FUNCTION update_conversation_unread_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE public.conversation_members
+        SET unread_count = unread_count + 1
+        WHERE conversation_id = NEW.conversation_id
+          AND user_id <> NEW.sender_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE public.conversation_members
+        SET unread_count = GREATEST(unread_count - 1, 0)
+        WHERE conversation_id = OLD.conversation_id
+          AND user_id <> OLD.sender_id
+          AND (last_read_at IS NULL OR last_read_at < OLD.created_at);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trigger_update_conversation_unread_counts ON public.messages;
+CREATE TRIGGER trigger_update_conversation_unread_counts
+    AFTER INSERT OR DELETE ON public.messages
+    FOR EACH ROW EXECUTE FUNCTION update_conversation_unread_counts();
+
+-- Function: Recount when a member's read marker advances. Only messages after
+-- the new marker are counted (normally none), via idx_messages_conversation_id.
+CREATE OR REPLACE FUNCTION reset_conversation_unread_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.last_read_at IS NOT NULL
+       AND (OLD.last_read_at IS NULL OR NEW.last_read_at > OLD.last_read_at) THEN
+        NEW.unread_count := (
+            SELECT COUNT(*)
+            FROM public.messages m
+            WHERE m.conversation_id = NEW.conversation_id
+              AND m.sender_id <> NEW.user_id
+              AND m.created_at > NEW.last_read_at
+        );
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_reset_conversation_unread_count ON public.conversation_members;
+CREATE TRIGGER trigger_reset_conversation_unread_count
+    BEFORE UPDATE OF last_read_at ON public.conversation_members
+    FOR EACH ROW EXECUTE FUNCTION reset_conversation_unread_count();
+
 -- Function: Update community member count
 CREATE OR REPLACE FUNCTION update_community_member_count()
 RETURNS TRIGGER AS $$
@@ -498,6 +568,83 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql SECURITY DEFINER;
 
+-- Function: Advance the caller's read marker in a conversation (resets its
+-- unread count). SECURITY DEFINER so members need no UPDATE policy on
+-- conversation_members, which would also let them change is_admin.
+CREATE OR REPLACE FUNCTION mark_conversation_read(p_conversation_id UUID)
+RETURNS VOID AS $$
+    UPDATE public.conversation_members
+    SET last_read_at = NOW()
+    WHERE conversation_id = p_conversation_id
+      AND user_id = auth.uid();
+$$ LANGUAGE sql SECURITY DEFINER;
+
+-- Function: Total unread messages of the caller across conversations
+CREATE OR REPLACE FUNCTION get_total_unread_count()
+RETURNS BIGINT AS $$
+    SELECT COALESCE(SUM(unread_count), 0)
+    FROM public.conversation_members
+    WHERE user_id = auth.uid()
+      AND unread_count > 0;
+$$ LANGUAGE sql STABLE;
+
+-- Function: One page of the caller's conversations, most recently active first,
+-- with last message preview, other participant (direct chats) and unread count.
+-- The page is cut before the LATERAL lookups run, so each costs one index probe
+-- per returned conversation; unread counts come from conversation_members.
+-- Runs as the caller (RLS applies).
+CREATE OR REPLACE FUNCTION get_user_conversations(p_limit INT DEFAULT 50, p_offset INT DEFAULT 0)
+RETURNS TABLE (
+    id UUID,
+    is_group BOOLEAN,
+    name TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    last_message_at TIMESTAMP WITH TIME ZONE,
+    last_message TEXT,
+    unread_count BIGINT,
+    other_user_name TEXT,
+    other_user_avatar TEXT
+) AS $$
+    WITH page AS (
+        SELECT c.*, me.user_id AS member_id, me.unread_count
+        FROM public.conversation_members me
+        JOIN public.conversations c ON c.id = me.conversation_id
+        WHERE me.user_id = auth.uid()
+        ORDER BY COALESCE(c.last_message_at, c.created_at) DESC, c.id
+        LIMIT p_limit OFFSET p_offset
+    )
+    SELECT
+        p.id,
+        p.is_group,
+        p.name,
+        p.created_at,
+        p.updated_at,
+        p.last_message_at,
+        last_msg.content,
+        p.unread_count::BIGINT,
+        other_user.full_name,
+        other_user.avatar_url
+    FROM page p
+    LEFT JOIN LATERAL (
+        SELECT m.content
+        FROM public.messages m
+        WHERE m.conversation_id = p.id
+        ORDER BY m.created_at DESC
+        LIMIT 1
+    ) last_msg ON true
+    LEFT JOIN LATERAL (
+        SELECT u.full_name, u.avatar_url
+        FROM public.conversation_members other
+        JOIN public.users u ON u.id = other.user_id
+        WHERE other.conversation_id = p.id
+          AND other.user_id <> p.member_id
+          AND NOT p.is_group
+        LIMIT 1
+    ) other_user ON true
+    ORDER BY COALESCE(p.last_message_at, p.created_at) DESC, p.id;
+$$ LANGUAGE sql STABLE;
+
 -- ============================================================================
 -- REALTIME CONFIGURATION
 -- ============================================================================
@@ -512,6 +659,7 @@ ALTER PUBLICATION supabase_realtime ADD TABLE public.conversations;
 -- ============================================================================
 
 -- View: Conversation with last message and unread count
+-- (the API uses get_user_conversations(), which pages before the lookups)
 CREATE OR REPLACE VIEW conversation_list AS
 SELECT
     c.id,
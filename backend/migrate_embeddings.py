@@ -0,0 +1,58 @@
+"""
+Migrate note embeddings to a new embedding model without downtime.
+
+Usage:
+    python migrate_embeddings.py start <model>
+    python migrate_embeddings.py backfill <model> [--batch-size 50] [--cutover]
+    python migrate_embeddings.py status <model>
+    python migrate_embeddings.py cutover <model>
+
+Queries keep using the current model until cutover succeeds.
+"""
+import argparse
+
+from app.database import SessionLocal
+from app.services.embedding_migration_service import EmbeddingMigrationService
+
+
+def print_status(report: dict):
+    print(
+        f"{report['model_name']} [{report['status']}]: "
+        f"{report['covered_notes']}/{report['source_notes']} notes "
+        f"({report['coverage']:.1%}) from {report['source_table']} -> {report['target_table']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding model migration")
+    parser.add_argument("command", choices=["start", "backfill", "status", "cutover"])
+    parser.add_argument("model", help="HuggingFace model id, e.g. sentence-transformers/all-mpnet-base-v2")
+    parser.add_argument("--batch-size", type=int, default=50, help="Notes per backfill batch")
+    parser.add_argument("--cutover", action="store_true", help="Cut over automatically after a complete backfill")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        migration = EmbeddingMigrationService(db)
+
+        if args.command == "start":
+            entry = migration.start(args.model)
+            print(f"✓ Registered {entry['model_name']} -> {entry['table_name']} (dimension {entry['dimension']})")
+            print_status(migration.status(args.model))
+
+        elif args.command == "backfill":
+            processed = migration.backfill(args.model, batch_size=args.batch_size)
+            print(f"✓ Backfilled {processed} notes")
+            report = migration.status(args.model)
+            print_status(report)
+            if args.cutover and report["covered_notes"] >= report["source_notes"]:
+                print_status(migration.cutover(args.model))
+
+        elif args.command == "status":
+            print_status(migration.status(args.model))
+
+        elif args.command == "cutover":
+            print_status(migration.cutover(args.model))
+
+    finally:
+        db.close()
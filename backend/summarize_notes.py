@@ -0,0 +1,37 @@
+"""
+Generate AI summaries for notes, then roll them up into chapter and notebook summaries.
+
+Usage:
+    python summarize_notes.py [--batch-size 50] [--max-batches N] [--owner-id ID] [--refresh]
+
+Users over their per-minute budget are skipped; rerun to pick up deferred notes.
+"""
+import argparse
+
+from app.database import SessionLocal
+from app.services.note_summary_service import NoteSummaryService
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch note summarization")
+    parser.add_argument("--batch-size", type=int, default=50, help="Notes per batch")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches")
+    parser.add_argument("--owner-id", type=int, default=None, help="Only summarize this user's notes")
+    parser.add_argument("--refresh", action="store_true", help="Also re-summarize notes that already have a summary")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = NoteSummaryService(db).run_batch(
+            batch_size=args.batch_size,
+            max_batches=args.max_batches,
+            refresh=args.refresh,
+            owner_id=args.owner_id,
+        )
+        print(
+            f"✓ {stats['summarized']} notes summarized, {stats['deferred']} deferred, "
+            f"{stats['skipped']} skipped; {stats['chapters']} chapters and "
+            f"{stats['notebooks']} notebooks rolled up"
+        )
+    finally:
+        db.close()
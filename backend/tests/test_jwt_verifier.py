@@ -0,0 +1,80 @@
+"""
+Only definitive rejections are negative-cached; failures to reach the JWKS
+or Supabase Auth surface as TokenVerificationUnavailable and are retried.
+The async entry point does its network calls off the event loop.
+"""
+import asyncio
+import base64
+import json
+import threading
+
+import httpx
+import pytest
+
+from app.core import jwt_verifier as verifier_module
+from app.core.jwt_verifier import (
+    SupabaseJWTVerifier,
+    TokenVerificationError,
+    TokenVerificationUnavailable,
+)
+
+
+def _segment(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+
+def _token(kid: str = "key-1") -> str:
+    header = _segment({"alg": "RS256", "kid": kid, "typ": "JWT"})
+    payload = _segment({"sub": "user-1"})
+    return f"{header}.{payload}.c2lnbmF0dXJl"
+
+
+def _jwks_response(status_code: int, keys=()):
+    def get(url, timeout):
+        request = httpx.Request("GET", url)
+        return httpx.Response(status_code, json={"keys": list(keys)}, request=request)
+    return get
+
+
+def test_jwks_outage_is_not_cached(monkeypatch):
+    verifier = SupabaseJWTVerifier()
+    token = _token()
+    monkeypatch.setattr(verifier_module.httpx, "get", _jwks_response(503))
+
+    with pytest.raises(TokenVerificationUnavailable):
+        verifier.verify(token)
+    assert verifier.negative_cache.stats()["size"] == 0
+
+
+def test_unknown_key_after_successful_fetch_is_cached(monkeypatch):
+    verifier = SupabaseJWTVerifier()
+    token = _token("rotated-away")
+    monkeypatch.setattr(verifier_module.httpx, "get", _jwks_response(200, [{"kid": "key-1"}]))
+
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(token)
+    assert verifier.negative_cache.stats()["size"] == 1
+
+    # Served from the cache without another JWKS fetch
+    monkeypatch.setattr(verifier_module.httpx, "get", None)
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(token)
+
+
+def test_verify_async_fetches_keys_off_the_event_loop(monkeypatch):
+    verifier = SupabaseJWTVerifier()
+    fetch_threads = []
+
+    def get(url, timeout):
+        fetch_threads.append(threading.get_ident())
+        return _jwks_response(200, [{"kid": "key-1"}])(url, timeout)
+
+    monkeypatch.setattr(verifier_module.httpx, "get", get)
+
+    async def scenario():
+        with pytest.raises(TokenVerificationError):
+            await verifier.verify_async(_token("rotated-away"))
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert fetch_threads and fetch_threads[0] != loop_thread
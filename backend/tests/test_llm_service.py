@@ -0,0 +1,32 @@
+"""
+An open circuit rejects LLM calls before they wait for or spend a
+rate-limit token.
+"""
+import pytest
+
+from app.services.llm_backends import StubBackend
+from app.services.llm_service import LLMService, LLMUnavailableError
+from app.utils.circuit_breaker import HALF_OPEN
+
+
+def test_open_circuit_does_not_spend_rate_limit_tokens(monkeypatch):
+    service = LLMService(backend=StubBackend())
+    for _ in range(service.breaker.failure_threshold):
+        service.breaker.record_failure()
+
+    def acquire(timeout=None):
+        raise AssertionError("rate limiter consulted while the circuit is open")
+
+    monkeypatch.setattr(service.rate_limiter, "acquire", acquire)
+    with pytest.raises(LLMUnavailableError, match="circuit open"):
+        service.generate_text("prompt")
+
+
+def test_rate_limited_probe_is_given_back(monkeypatch):
+    service = LLMService(backend=StubBackend())
+    monkeypatch.setattr(service.breaker, "_state", HALF_OPEN)
+    monkeypatch.setattr(service.rate_limiter, "acquire", lambda timeout=None: False)
+
+    with pytest.raises(LLMUnavailableError, match="rate limit"):
+        service.generate_text("prompt")
+    assert service.breaker.allow_request()
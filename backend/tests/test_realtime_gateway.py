@@ -0,0 +1,28 @@
+"""
+Revoking a membership drops only that user's sockets from the channel
+(tests run without Redis, so delivery is in-process).
+"""
+import asyncio
+import json
+
+from app.services.realtime_service import RealtimeGateway, community_channel
+
+
+def test_revoke_unsubscribes_only_that_user():
+    async def scenario():
+        gateway = RealtimeGateway()
+        channel = community_channel("c1")
+        leaving = gateway.connect("user-1")
+        staying = gateway.connect("user-2")
+        await gateway.subscribe(leaving, [channel])
+        await gateway.subscribe(staying, [channel])
+
+        await gateway.revoke("user-1", channel)
+        await gateway.publish(channel, {"id": "m1", "created_at": "2026-01-01T00:00:00Z"})
+
+        assert channel not in leaving.channels
+        assert json.loads(leaving.queue.get_nowait()) == {"type": "unsubscribed", "channel": channel}
+        assert leaving.queue.empty()
+        assert json.loads(staying.queue.get_nowait())["message"]["id"] == "m1"
+
+    asyncio.run(scenario())
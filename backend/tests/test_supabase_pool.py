@@ -0,0 +1,54 @@
+"""
+Per-user PostgREST clients must send through the shared pooled httpx
+clients (no client, connection or TLS handshake per request).
+"""
+import asyncio
+
+import httpx
+
+from app.core.supabase_client import supabase_db
+
+
+def _recording_transport(seen):
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json=[])
+    return httpx.MockTransport(handler)
+
+
+def test_user_clients_share_the_pool_client():
+    first = supabase_db.get_user_client_async("token-a")
+    second = supabase_db.get_user_client_async("token-b")
+
+    assert first.session is supabase_db.async_pool.client
+    assert second.session is supabase_db.async_pool.client
+    assert supabase_db.get_user_client("token-a").session is supabase_db.http_pool.client
+
+
+def test_async_requests_go_through_the_pool_with_user_headers(monkeypatch):
+    seen = []
+    pool = supabase_db.async_pool
+    monkeypatch.setattr(pool.client, "_transport", _recording_transport(seen))
+    before = pool.requests
+
+    async def run():
+        await supabase_db.get_user_client_async("token-a").table("resources").select("*").execute()
+        await supabase_db.get_user_client_async("token-b").table("resources").select("*").execute()
+
+    asyncio.run(run())
+
+    assert pool.requests - before == 2
+    assert [r.headers["authorization"] for r in seen] == ["Bearer token-a", "Bearer token-b"]
+    assert all(r.headers["apikey"] == "anon-key" for r in seen)
+
+
+def test_sync_requests_go_through_the_pool(monkeypatch):
+    seen = []
+    pool = supabase_db.http_pool
+    monkeypatch.setattr(pool.client, "_transport", _recording_transport(seen))
+    before = pool.requests
+
+    supabase_db.get_user_client("token-a").table("resources").select("*").execute()
+
+    assert pool.requests - before == 1
+    assert seen[0].headers["authorization"] == "Bearer token-a"